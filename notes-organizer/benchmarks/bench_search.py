@@ -0,0 +1,149 @@
+"""
+Benchmark the indexed get_notes search against the original full scan.
+
+Generates a synthetic notes folder for each requested size, then times:
+  - full scan: `search_in_content` on every note (the pre-index behaviour)
+  - index build: first `NoteIndex.sync()` on an empty index directory
+  - warm load: loading the persisted index in a fresh `NoteIndex`
+  - indexed search: `NoteIndex.search()` for the same queries
+  - ranked search: top 20 by BM25 with `BM25Ranker.rank()`
+  - boolean queries: `QueryEngine.search()` for a few query-language queries
+  - fuzzy queries: `FuzzyMatcher.search()` for misspelled words, against a
+    brute-force edit-distance pass over the whole vocabulary
+
+Usage:
+    uv run python benchmarks/bench_search.py --sizes 1000 10000 100000
+"""
+
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from notes_organizer.fuzzy import FuzzyMatcher, bounded_distance, default_distance  # noqa: E402
+from notes_organizer.index import NoteIndex  # noqa: E402
+from notes_organizer.main import search_in_content  # noqa: E402
+from notes_organizer.query import QueryEngine  # noqa: E402
+from notes_organizer.ranking import BM25Ranker  # noqa: E402
+
+QUERIES = ["protocol", "neural network", "overfit", "zebra", "data-pipeline", "e"]
+BOOLEAN_QUERIES = [
+    'neural AND network',
+    '"neural network" OR protocol',
+    'data* -pipeline',
+    'title:protocol OR (overfitting NOT data)',
+]
+FUZZY_QUERIES = ["protocl", "nueral netwrk", "overfiting", "pipelnie"]
+
+
+def make_vocabulary(rng: random.Random, size: int = 20000) -> list[str]:
+    """Build a pseudo-word vocabulary plus the words used by the queries."""
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = {
+        "".join(rng.choice(letters) for _ in range(rng.randint(3, 10)))
+        for _ in range(size)
+    }
+    words.update(["protocol", "neural", "network", "overfitting", "data", "pipeline"])
+    return sorted(words)
+
+
+def generate_corpus(notes_dir: Path, count: int, seed: int = 42) -> None:
+    """Write `count` synthetic notes shaped like the ones `add_note` creates."""
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng)
+    notes_dir.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        title = " ".join(rng.choices(vocabulary, k=4))
+        body = " ".join(rng.choices(vocabulary, k=rng.randint(80, 400)))
+        overview = body[:150]
+        content = f"# {title}\n{overview}\n\n## Content\n{body}\n"
+        (notes_dir / f"note-{i:06d}.md").write_text(content, encoding="utf-8")
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def full_scan(notes_dir: Path, query: str) -> int:
+    return sum(1 for path in notes_dir.glob("*.md") if search_in_content(path, query))
+
+
+def brute_force_fuzzy(index: NoteIndex, query: str) -> set[str]:
+    """Fuzzy search by checking the distance to every word in the vocabulary."""
+    result = None
+    for word in query.split():
+        limit = default_distance(word)
+        docs = set()
+        for term, postings in index.postings.items():
+            if bounded_distance(word, term, limit) is not None:
+                docs.update(postings)
+        result = docs if result is None else result & docs
+    return {index.docs[doc_id].file_name for doc_id in result}
+
+
+def run(count: int, workdir: Path) -> None:
+    notes_dir = workdir / f"notes-{count}"
+    index_dir = notes_dir / ".index"
+    generate_corpus(notes_dir, count)
+
+    index = NoteIndex(notes_dir, index_dir)
+    _, build_time = timed(index.sync)
+    index.compact()
+
+    warm = NoteIndex(notes_dir, index_dir)
+    _, load_time = timed(warm.sync)
+    ranker = BM25Ranker(warm)
+    queries = QueryEngine(warm)
+    fuzzy = FuzzyMatcher(warm)
+
+    print(f"\n{count} notes")
+    print(f"  index build: {build_time:8.3f}s   warm load + sync: {load_time:8.3f}s")
+    print(f"  {'query':<16}{'matches':>8}{'full scan':>12}{'indexed':>12}{'speedup':>10}{'ranked':>12}")
+    for query in QUERIES:
+        expected, scan_time = timed(lambda: full_scan(notes_dir, query))
+        matches, index_time = timed(lambda: warm.search(query))
+        assert len(matches) == expected, (query, len(matches), expected)
+        speedup = scan_time / index_time if index_time else float("inf")
+        _, rank_time = timed(lambda: ranker.rank(query, limit=20))
+        print(
+            f"  {query:<16}{expected:>8}{scan_time:>11.3f}s{index_time:>11.4f}s"
+            f"{speedup:>9.0f}x{rank_time:>11.4f}s"
+        )
+
+    print(f"  {'boolean query':<44}{'matches':>8}{'time':>12}")
+    for query in BOOLEAN_QUERIES:
+        queries.search(query)  # build the sorted posting lists once
+        matches, query_time = timed(lambda: queries.search(query))
+        print(f"  {query:<44}{len(matches):>8}{query_time:>11.4f}s")
+
+    print(f"  {'fuzzy query':<16}{'matches':>8}{'brute force':>12}{'trigram':>12}{'speedup':>10}")
+    for query in FUZZY_QUERIES:
+        expected, brute_time = timed(lambda: brute_force_fuzzy(warm, query))
+        matches, fuzzy_time = timed(lambda: fuzzy.search(query))
+        assert matches == expected, query
+        speedup = brute_time / fuzzy_time if fuzzy_time else float("inf")
+        print(f"  {query:<16}{len(matches):>8}{brute_time:>11.3f}s{fuzzy_time:>11.4f}s{speedup:>9.0f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="notes-bench-"))
+    try:
+        for count in args.sizes:
+            run(count, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Benchmark the MCP tools end to end on a synthetic corpus.
+
+Generates a notes folder with `corpus.py`, then measures the latency
+(mean, p50, p90, p95, p99, max) and throughput of:
+  - get_notes: the newest page, no filter
+  - get_notes_search: substring searches for common, mid-frequency and rare words
+  - get_notes_ranked: the same searches in "ranked" mode
+  - get_notes_date_range: a random 30-day window
+  - get_note: a random note
+  - add_note: a new note per call (run last, so reads see the generated corpus)
+
+Each operation is measured for each transport:
+  - in-process: the tool coroutines are awaited directly, as by `test_tools.py`
+  - stdio: a real MCP session with the server started as a subprocess, as by
+    `client.py` (adds JSON-RPC encoding and pipe round trips)
+
+Every transport gets its own copy of the corpus, generated from the same seed.
+Results are printed as a table and can be written to JSON and compared with
+an earlier run; the exit status is 1 when an operation's p50 latency regressed
+by more than the threshold.
+
+Usage:
+    uv run python benchmarks/bench_tools.py --notes 10000 --output results.json
+    uv run python benchmarks/bench_tools.py --notes 10000 --compare results.json
+    uv run python benchmarks/bench_tools.py --transports stdio --backend sqlite --concurrency 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from corpus import DISTRIBUTIONS, TextGenerator, date_range, generate_corpus, make_vocabulary  # noqa: E402
+
+TRANSPORTS = ("in-process", "stdio")
+BACKENDS = ("files", "sqlite")
+PERCENTILES = (50, 90, 95, 99)
+
+# Words at these frequency ranks of the corpus vocabulary are searched for:
+# in most notes, in a few percent of them, and in almost none
+SEARCH_RANKS = (0, 99, 2999)
+
+# Days covered by a get_notes_date_range call
+DATE_WINDOW_DAYS = 30
+
+Call = Callable[[str, dict], Awaitable[dict]]
+
+
+def search_terms(vocabulary: list[str]) -> list[str]:
+    return [vocabulary[rank] for rank in SEARCH_RANKS]
+
+
+def operations(args, file_names: list[str], seed: int) -> list[tuple[str, str, Callable[[int], dict]]]:
+    """
+    Build the benchmarked operations.
+
+    Returns:
+        (operation name, tool name, arguments for call i) triples, in the
+        order they are run
+    """
+    vocabulary = make_vocabulary(args.seed)
+    terms = search_terms(vocabulary)
+    rng = random.Random(seed)
+    text = TextGenerator(vocabulary, random.Random(seed + 1))
+    page = {"limit": args.limit} if args.limit else {}
+
+    def window(i: int) -> dict:
+        start_date, end_date = date_range(rng, args.days, DATE_WINDOW_DAYS)
+        return {"start_date": start_date, "end_date": end_date, **page}
+
+    return [
+        ("get_notes", "get_notes", lambda i: dict(page)),
+        ("get_notes_search", "get_notes", lambda i: {"search": terms[i % len(terms)], **page}),
+        ("get_notes_ranked", "get_notes", lambda i: {"search": terms[i % len(terms)], "mode": "ranked", **page}),
+        ("get_notes_date_range", "get_notes", window),
+        ("get_note", "get_note", lambda i: {"file_name": rng.choice(file_names)}),
+        ("add_note", "add_note", lambda i: {
+            "title": f"Benchmark note {i}",
+            "content": text.body(args.words),
+        }),
+    ]
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    """The q-th percentile of sorted values, interpolating between neighbours."""
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(latencies: list[float], errors: int, wall_time: float) -> dict:
+    ordered = sorted(latencies)
+    stats = {
+        "calls": len(latencies),
+        "errors": errors,
+        "mean_ms": sum(ordered) / len(ordered) * 1000 if ordered else 0.0,
+    }
+    for q in PERCENTILES:
+        stats[f"p{q}_ms"] = percentile(ordered, q) * 1000
+    stats["max_ms"] = ordered[-1] * 1000 if ordered else 0.0
+    stats["throughput_per_s"] = len(latencies) / wall_time if wall_time else 0.0
+    return stats
+
+
+async def measure(call: Call, tool: str, make_args: Callable[[int], dict], iterations: int,
+                  warmup: int, concurrency: int) -> dict:
+    """Run `iterations` calls of a tool, `concurrency` at a time, after `warmup` unmeasured ones."""
+    for i in range(warmup):
+        await call(tool, make_args(-1 - i))
+
+    latencies: list[float] = []
+    errors = 0
+    next_call = 0
+
+    async def worker():
+        nonlocal errors, next_call
+        while next_call < iterations:
+            arguments = make_args(next_call)
+            next_call += 1
+            start = time.perf_counter()
+            response = await call(tool, arguments)
+            latencies.append(time.perf_counter() - start)
+            if not response.get("success"):
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def run_operations(call: Call, args, file_names: list[str]) -> dict:
+    results = {}
+    for name, tool, make_args in operations(args, file_names, args.seed):
+        results[name] = await measure(call, tool, make_args, args.iterations, args.warmup, args.concurrency)
+    return results
+
+
+async def bench_in_process(args, notes_dir: Path, database_path: Path, file_names: list[str]) -> dict:
+    """Await the tool functions directly, against `notes_dir` (or the database)."""
+    from notes_organizer import main as server
+    from notes_organizer.database import NoteDatabase
+
+    start = time.perf_counter()
+    server.use_notes_dir(notes_dir)
+    if args.backend == "sqlite":
+        server.database = NoteDatabase(database_path)
+    else:
+        # As the server does: index the folder, then keep up with a watcher
+        server.store.start_watching()
+    startup = time.perf_counter() - start
+
+    async def call(tool: str, arguments: dict) -> dict:
+        return await getattr(server, tool)(**arguments)
+
+    try:
+        return {"startup_s": startup, "operations": await run_operations(call, args, file_names)}
+    finally:
+        server.store.stop_watching()
+        server.database = None
+
+
+async def bench_stdio(args, notes_dir: Path, database_path: Path, file_names: list[str]) -> dict:
+    """Call the tools over a stdio MCP session with the server running as a subprocess."""
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    server_args = [str(ROOT / "notes_organizer" / "main.py"), "--notes-dir", str(notes_dir)]
+    if args.backend == "sqlite":
+        server_args += ["--database", str(database_path)]
+    server_params = StdioServerParameters(command=sys.executable, args=server_args)
+
+    async def call(tool: str, arguments: dict) -> dict:
+        result = await session.call_tool(tool, arguments=arguments)
+        if result.isError:
+            return {"success": False}
+        return json.loads(result.content[0].text)
+
+    with open(os.devnull, "w") as errlog:
+        start = time.perf_counter()
+        async with stdio_client(server_params, errlog=errlog) as (read, write):
+            async with ClientSession(read, write) as session:
+                # The server builds its index before it answers the handshake
+                await session.initialize()
+                startup = time.perf_counter() - start
+                return {"startup_s": startup, "operations": await run_operations(call, args, file_names)}
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "commit": commit,
+    }
+
+
+def print_results(transport: str, result: dict) -> None:
+    print(f"\n{transport} (startup {result['startup_s']:.3f}s)")
+    header = "".join(f"{f'p{q}':>9}" for q in PERCENTILES)
+    print(f"  {'operation':<22}{'calls':>7}{'errors':>7}{'mean':>9}{header}{'max':>9}{'ops/s':>10}   (ms)")
+    for name, stats in result["operations"].items():
+        percentiles = "".join(f"{stats[f'p{q}_ms']:>9.2f}" for q in PERCENTILES)
+        print(f"  {name:<22}{stats['calls']:>7}{stats['errors']:>7}{stats['mean_ms']:>9.2f}"
+              f"{percentiles}{stats['max_ms']:>9.2f}{stats['throughput_per_s']:>10.1f}")
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> bool:
+    """
+    Print each operation's p50 latency and throughput against a baseline run.
+
+    Returns:
+        True if any p50 latency grew by more than `threshold` (a fraction)
+    """
+    regressed = False
+    print(f"\nAgainst baseline {baseline.get('environment', {}).get('commit') or '(unknown commit)'}")
+    old_config = baseline.get("config", {})
+    differences = [key for key, value in report["config"].items() if old_config.get(key, value) != value]
+    if differences:
+        print(f"  (configured differently: {', '.join(differences)}; the numbers are not comparable)")
+    results = report["results"]
+    print(f"  {'transport':<12}{'operation':<22}{'p50 ms':>18}{'change':>9}{'ops/s':>18}")
+    for transport, result in results.items():
+        old_result = baseline.get("results", {}).get(transport)
+        if old_result is None:
+            continue
+        for name, stats in result["operations"].items():
+            old = old_result["operations"].get(name)
+            if old is None or not old["p50_ms"]:
+                continue
+            change = stats["p50_ms"] / old["p50_ms"] - 1
+            flag = "  REGRESSED" if change > threshold else ""
+            regressed = regressed or bool(flag)
+            print(f"  {transport:<12}{name:<22}{old['p50_ms']:>8.2f} -> {stats['p50_ms']:<6.2f}{change:>+9.0%}"
+                  f"{old['throughput_per_s']:>8.1f} -> {stats['throughput_per_s']:<7.1f}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    corpus = parser.add_argument_group("corpus")
+    corpus.add_argument("--notes", type=int, default=1000, help="number of notes (default: 1000)")
+    corpus.add_argument("--distribution", choices=DISTRIBUTIONS, default="lognormal",
+                        help="note length distribution (default: lognormal)")
+    corpus.add_argument("--words", type=int, default=300,
+                        help="median words per note, or the mean for uniform (default: 300)")
+    corpus.add_argument("--max-words", type=int, default=20000, help="longest note in words (default: 20000)")
+    corpus.add_argument("--days", type=int, default=365,
+                        help="spread modification times over this many days (default: 365)")
+    corpus.add_argument("--seed", type=int, default=42)
+    run = parser.add_argument_group("run")
+    run.add_argument("--transports", choices=TRANSPORTS, nargs="+", default=list(TRANSPORTS))
+    run.add_argument("--backend", choices=BACKENDS, default="files",
+                     help="notes folder or the SQLite database (default: files)")
+    run.add_argument("--iterations", type=int, default=200, help="measured calls per operation (default: 200)")
+    run.add_argument("--warmup", type=int, default=5, help="unmeasured calls per operation (default: 5)")
+    run.add_argument("--concurrency", type=int, default=1, help="calls in flight at once (default: 1)")
+    run.add_argument("--limit", type=int, default=20,
+                     help="page size passed to get_notes, 0 for all notes (default: 20)")
+    output = parser.add_argument_group("output")
+    output.add_argument("--output", type=Path, help="write the results to this JSON file")
+    output.add_argument("--compare", type=Path, help="compare with the results in this JSON file")
+    output.add_argument("--threshold", type=float, default=0.2,
+                        help="p50 latency growth counted as a regression (default: 0.2 = 20%%)")
+    args = parser.parse_args()
+    if args.iterations < 1 or args.concurrency < 1 or args.warmup < 0:
+        parser.error("--iterations and --concurrency must be at least 1 and --warmup at least 0")
+
+    config = {key: value for key, value in vars(args).items() if key not in ("output", "compare", "threshold")}
+    report = {"created": datetime.now().isoformat(timespec="seconds"), "environment": environment(),
+              "config": config, "results": {}}
+
+    workdir = Path(tempfile.mkdtemp(prefix="notes-bench-"))
+    try:
+        for transport in args.transports:
+            notes_dir = workdir / transport / "notes"
+            start = time.perf_counter()
+            file_names = generate_corpus(notes_dir, args.notes, args.distribution, args.words,
+                                         args.max_words, args.days, args.seed)
+            database_path = workdir / transport / "notes.db"
+            if args.backend == "sqlite":
+                from notes_organizer.database import NoteDatabase
+                NoteDatabase(database_path).import_folder(notes_dir)
+            print(f"Generated {len(file_names)} notes for {transport} in {time.perf_counter() - start:.1f}s")
+
+            bench = bench_in_process if transport == "in-process" else bench_stdio
+            result = asyncio.run(bench(args, notes_dir, database_path, file_names))
+            report["results"][transport] = result
+            print_results(transport, result)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"\nWrote {args.output}")
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
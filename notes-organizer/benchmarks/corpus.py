@@ -0,0 +1,175 @@
+"""
+Generate a synthetic notes folder for benchmarking.
+
+Notes are shaped like the ones `add_note` creates (`# Title`, overview,
+`## Content` and a few `## ` sections). Words are drawn from a pseudo-word
+vocabulary with a Zipf-like frequency, so some words are in most notes and
+most words are rare, as in real text. Note lengths follow a configurable
+distribution and modification times are spread over a date range, so date
+filters select a predictable share of the notes. The same seed always
+produces the same folder.
+
+Usage:
+    uv run python benchmarks/corpus.py /tmp/notes --notes 10000 --distribution lognormal --words 300
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+from itertools import accumulate
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from notes_organizer.filenames import sanitize_filename  # noqa: E402
+
+DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+# Modification times end at this date, so runs on different days match
+LAST_MODIFIED = datetime(2025, 1, 1)
+
+# Spread of the lognormal length distribution (about 5% of notes are 5x the median)
+LOGNORMAL_SIGMA = 1.0
+
+VOCABULARY_SIZE = 50000
+
+
+def make_vocabulary(seed: int = 42, size: int = VOCABULARY_SIZE) -> list[str]:
+    """Build a pseudo-word vocabulary, most frequent word first."""
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words: dict[str, None] = {}
+    while len(words) < size:
+        words["".join(rng.choice(letters) for _ in range(rng.randint(3, 12)))] = None
+    return list(words)
+
+
+def note_lengths(rng: random.Random, count: int, distribution: str, words: int, max_words: int) -> list[int]:
+    """
+    Draw the number of words of each note.
+
+    Args:
+        distribution: "fixed" (every note has `words` words), "uniform"
+            (between 1 and 2 * `words`) or "lognormal" (median `words`)
+        words: Typical number of words per note
+        max_words: Upper bound on any note's length
+    """
+    if distribution == "fixed":
+        lengths = [words] * count
+    elif distribution == "uniform":
+        lengths = [rng.randint(1, 2 * words) for _ in range(count)]
+    elif distribution == "lognormal":
+        lengths = [round(rng.lognormvariate(math.log(words), LOGNORMAL_SIGMA)) for _ in range(count)]
+    else:
+        raise ValueError(f"Unknown distribution: {distribution} (expected one of {', '.join(DISTRIBUTIONS)})")
+    return [min(max(1, length), max_words) for length in lengths]
+
+
+class TextGenerator:
+    """Draws titles and bodies from a vocabulary with Zipf-like word frequencies."""
+
+    def __init__(self, vocabulary: list[str], rng: random.Random):
+        self.vocabulary = vocabulary
+        self.rng = rng
+        self.cum_weights = list(accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+
+    def words(self, count: int) -> list[str]:
+        return self.rng.choices(self.vocabulary, cum_weights=self.cum_weights, k=count)
+
+    def title(self) -> str:
+        return " ".join(self.words(self.rng.randint(2, 6))).capitalize()
+
+    def body(self, count: int) -> str:
+        """A body of `count` words in paragraphs, with a `## ` heading every few paragraphs."""
+        words = self.words(count)
+        parts = []
+        i = 0
+        while i < len(words):
+            if parts and self.rng.random() < 0.25:
+                parts.append("## " + " ".join(self.words(self.rng.randint(1, 4))).capitalize())
+            size = self.rng.randint(20, 120)
+            parts.append(" ".join(words[i:i + size]).capitalize() + ".")
+            i += size
+        return "\n\n".join(parts)
+
+
+def format_note(title: str, body: str) -> str:
+    """Lay out a note the way `add_note` does."""
+    overview = body.replace("\n", " ")[:255].strip()
+    return f"# {title}\n{overview}\n\n## Content\n{body}\n"
+
+
+def generate_corpus(
+    notes_dir: Path,
+    count: int,
+    distribution: str = "lognormal",
+    words: int = 300,
+    max_words: int = 20000,
+    days: int = 365,
+    seed: int = 42,
+) -> list[str]:
+    """
+    Write `count` synthetic notes into a folder.
+
+    Args:
+        notes_dir: Folder to write to (created if missing)
+        count: Number of notes
+        distribution: Note length distribution (see `note_lengths`)
+        words: Typical number of words per note
+        max_words: Upper bound on any note's length
+        days: Modification times are spread over this many days before
+            `LAST_MODIFIED`
+        seed: Random seed
+
+    Returns:
+        The file names of the notes written
+    """
+    rng = random.Random(seed)
+    text = TextGenerator(make_vocabulary(seed), rng)
+    notes_dir.mkdir(parents=True, exist_ok=True)
+    end = LAST_MODIFIED.timestamp()
+
+    file_names = []
+    for i, length in enumerate(note_lengths(rng, count, distribution, words, max_words)):
+        title = text.title()
+        file_name = f"{sanitize_filename(title)}-{i}.md"
+        path = notes_dir / file_name
+        path.write_text(format_note(title, text.body(length)), encoding="utf-8")
+        mtime = end - rng.random() * days * 86400
+        os.utime(path, (mtime, mtime))
+        file_names.append(file_name)
+    return file_names
+
+
+def date_range(rng: random.Random, days: int, window: int) -> tuple[str, str]:
+    """Pick a `window`-day (start_date, end_date) range inside a corpus's date span."""
+    window = min(window, days)
+    start = LAST_MODIFIED - timedelta(days=rng.randint(window, days))
+    return start.date().isoformat(), (start + timedelta(days=window)).date().isoformat()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", type=Path)
+    parser.add_argument("--notes", type=int, default=1000, help="number of notes (default: 1000)")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="lognormal",
+                        help="note length distribution (default: lognormal)")
+    parser.add_argument("--words", type=int, default=300,
+                        help="median words per note, or the mean for uniform (default: 300)")
+    parser.add_argument("--max-words", type=int, default=20000, help="longest note in words (default: 20000)")
+    parser.add_argument("--days", type=int, default=365,
+                        help="spread modification times over this many days (default: 365)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    file_names = generate_corpus(args.folder, args.notes, args.distribution, args.words,
+                                 args.max_words, args.days, args.seed)
+    size = sum((args.folder / name).stat().st_size for name in file_names)
+    print(f"Wrote {len(file_names)} notes ({size / 1e6:.1f} MB) to {args.folder}")
+
+
+if __name__ == "__main__":
+    main()
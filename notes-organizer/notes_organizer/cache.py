@@ -0,0 +1,117 @@
+"""
+Note metadata cache.
+
+Keeps the metadata `get_notes` returns for each note (title, overview,
+modification time and size) keyed on the note's file name, mtime and size.
+Entries live in a bounded LRU in memory and are persisted to a sidecar JSON
+file so a restarted server starts warm.
+"""
+
+import json
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 2
+DEFAULT_MAX_ENTRIES = 50_000
+
+
+class MetadataCache:
+    """Bounded LRU of note metadata keyed on (file name, mtime, size)."""
+
+    def __init__(self, path: Path, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.loaded = False
+        self.dirty = False
+        # file name -> (mtime_ns, size, metadata)
+        self._entries: OrderedDict[str, tuple[int, int, dict]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, file_name: str, stat: os.stat_result) -> Optional[dict]:
+        """
+        Look up the cached metadata for a note.
+
+        Args:
+            file_name: The note's file name
+            stat: The note's current stat result
+
+        Returns:
+            The cached metadata, or None if missing or stale
+        """
+        if not self.loaded:
+            self.load()
+
+        entry = self._entries.get(file_name)
+        if entry is None:
+            return None
+        mtime_ns, size, metadata = entry
+        if mtime_ns != stat.st_mtime_ns or size != stat.st_size:
+            return None
+        self._entries.move_to_end(file_name)
+        return metadata
+
+    def put(self, file_name: str, stat: os.stat_result, metadata: dict) -> None:
+        """Store metadata for a note, evicting the least recently used entries."""
+        if not self.loaded:
+            self.load()
+
+        self._entries[file_name] = (stat.st_mtime_ns, stat.st_size, metadata)
+        self._entries.move_to_end(file_name)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self.dirty = True
+
+    def discard(self, file_name: str) -> None:
+        """Forget a note, e.g. after it was deleted."""
+        if self._entries.pop(file_name, None) is not None:
+            self.dirty = True
+
+    def retain(self, file_names: set[str]) -> None:
+        """Drop every entry whose note is no longer present."""
+        for file_name in [name for name in self._entries if name not in file_names]:
+            self.discard(file_name)
+
+    def load(self) -> None:
+        """Load the sidecar file, if there is one."""
+        self.loaded = True
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != CACHE_VERSION:
+                return
+            for file_name, mtime_ns, size, metadata in data["entries"][-self.max_entries:]:
+                self._entries[file_name] = (mtime_ns, size, metadata)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable metadata cache {self.path}: {e}")
+            self._entries.clear()
+
+    def flush(self) -> None:
+        """Write the cache to its sidecar file if it changed."""
+        if not self.dirty:
+            return
+        data = {
+            "version": CACHE_VERSION,
+            "entries": [
+                [file_name, mtime_ns, size, metadata]
+                for file_name, (mtime_ns, size, metadata) in self._entries.items()
+            ],
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            payload = json.dumps(data, separators=(',', ':'))
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except OSError as e:
+            logger.warning(f"Failed to persist metadata cache: {e}")
@@ -0,0 +1,261 @@
+"""
+Optional compressed storage for notes.
+
+Notes can be stored gzip- or zstd-compressed instead of as plain text. A
+compressed note keeps its `.md` file name and is recognized by the magic
+number at the start of the file (neither can begin valid UTF-8 text), so
+file names, listing, the index and the watcher are unchanged and plain and
+compressed notes can live side by side. Every reader in the package opens
+notes through `open_note`, which decompresses as a stream.
+
+zstd needs the optional `zstandard` package and can use a dictionary trained
+on the notes themselves, which is what makes small, similar notes compress
+well. Dictionaries are kept in `notes/.dictionaries/<id>.zdict` and must not
+be deleted: every zstd note records the id of the dictionary it was written
+with.
+"""
+
+import gzip
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency: pip install "notes-organizer[zstd]"
+    zstandard = None
+
+CODECS = ("gzip", "zstd")
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 9
+
+# Folder (inside the notes folder) holding the zstd dictionaries
+DICTIONARY_DIR = ".dictionaries"
+# File in DICTIONARY_DIR naming the dictionary new notes are written with
+CURRENT_DICTIONARY = "current"
+# Same default as the zstd command line tool
+DEFAULT_DICTIONARY_SIZE = 110 * 1024
+
+_dictionaries: dict[tuple[str, int], "zstandard.ZstdCompressionDict"] = {}
+_dictionaries_lock = threading.Lock()
+
+
+def detect(head: bytes) -> Optional[str]:
+    """Return the codec a note's first bytes were written with, or None for plain text."""
+    if head.startswith(GZIP_MAGIC):
+        return "gzip"
+    if head.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return None
+
+
+def open_note(path: Path) -> BinaryIO:
+    """
+    Open a note for reading its markdown bytes, decompressing it if needed.
+
+    Raises:
+        OSError: If the note cannot be opened, or is zstd-compressed and the
+            zstandard package is not installed
+    """
+    f = open(path, 'rb')
+    try:
+        head = f.read(len(ZSTD_MAGIC))
+        f.seek(0)
+        codec = detect(head)
+        if codec is None:
+            return f
+        if codec == "gzip":
+            f.close()
+            return gzip.open(path, 'rb')
+        frame = _zstd_frame(path, f)
+        return _decompressor(path.parent, frame.dict_id).stream_reader(f, closefd=True)
+    except BaseException:
+        f.close()
+        raise
+
+
+def read_text(path: Path, errors: str = 'replace') -> str:
+    """Read a whole note as text, decompressing it if needed."""
+    with open_note(path) as f:
+        return f.read().decode('utf-8', errors=errors)
+
+
+def is_compressed(path: Path) -> bool:
+    """Check whether a note is stored compressed."""
+    with open(path, 'rb') as f:
+        return detect(f.read(len(ZSTD_MAGIC))) is not None
+
+
+def note_size(path: Path) -> int:
+    """
+    Return the size of a note's markdown in bytes, without decompressing it
+    when the compressed file records it (gzip and zstd both do as written here).
+    """
+    with open(path, 'rb') as f:
+        head = f.read(18)
+        codec = detect(head)
+        if codec is None:
+            return os.fstat(f.fileno()).st_size
+        if codec == "gzip":
+            # ISIZE: the last four bytes hold the size modulo 2**32
+            f.seek(-4, os.SEEK_END)
+            return int.from_bytes(f.read(4), 'little')
+        size = _zstd_frame(path, head).content_size
+    if size >= 0:
+        return size
+    with open_note(path) as stream:
+        return sum(len(chunk) for chunk in iter(lambda: stream.read(1 << 16), b""))
+
+
+class Compressor:
+    """Compresses new notes with one codec (and for zstd, the current dictionary)."""
+
+    def __init__(self, notes_dir: Path, codec: str):
+        """
+        Raises:
+            ValueError: If the codec is unknown, or is zstd and the zstandard
+                package is not installed
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec: {codec} (expected one of {', '.join(CODECS)})")
+        if codec == "zstd" and zstandard is None:
+            raise ValueError("zstd compression needs the zstandard package (pip install zstandard)")
+        self.codec = codec
+        self.dictionary = current_dictionary(notes_dir) if codec == "zstd" else None
+        # ZstdCompressor objects are not thread-safe; keep one per thread
+        self._local = threading.local()
+
+    @property
+    def dict_id(self) -> int:
+        return self.dictionary.dict_id() if self.dictionary is not None else 0
+
+    def compress(self, text: str) -> bytes:
+        return self.compress_bytes(text.encode('utf-8'))
+
+    def compress_bytes(self, data: bytes) -> bytes:
+        if self.codec == "gzip":
+            return gzip.compress(data, GZIP_LEVEL, mtime=0)
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = self._local.compressor = zstandard.ZstdCompressor(
+                level=ZSTD_LEVEL, dict_data=self.dictionary
+            )
+        return compressor.compress(data)
+
+    def is_current(self, path: Path) -> bool:
+        """Check whether a note is already stored the way this compressor would write it."""
+        with open(path, 'rb') as f:
+            head = f.read(18)
+        if detect(head) != self.codec:
+            return False
+        return self.codec == "gzip" or _zstd_frame(path, head).dict_id == self.dict_id
+
+
+def current_dictionary(notes_dir: Path) -> Optional["zstandard.ZstdCompressionDict"]:
+    """Return the dictionary new zstd notes are written with, or None if none was trained."""
+    try:
+        dict_id = int((notes_dir / DICTIONARY_DIR / CURRENT_DICTIONARY).read_text().strip())
+    except (OSError, ValueError):
+        return None
+    return _dictionary(notes_dir, dict_id)
+
+
+def train_dictionary(notes_dir: Path, size: int = DEFAULT_DICTIONARY_SIZE) -> int:
+    """
+    Train a zstd dictionary on the notes and make it the one new notes use.
+
+    Returns:
+        The new dictionary's id
+
+    Raises:
+        ValueError: If the zstandard package is not installed
+        zstandard.ZstdError: If there are too few notes to train on
+    """
+    if zstandard is None:
+        raise ValueError("Training a dictionary needs the zstandard package (pip install zstandard)")
+    samples = []
+    for path in sorted(notes_dir.glob("*.md")):
+        try:
+            with open_note(path) as f:
+                samples.append(f.read())
+        except OSError:
+            continue
+    dictionary = zstandard.train_dictionary(size, samples, level=ZSTD_LEVEL)
+    dict_id = dictionary.dict_id()
+
+    folder = notes_dir / DICTIONARY_DIR
+    folder.mkdir(parents=True, exist_ok=True)
+    _atomic_write(folder / f"{dict_id}.zdict", dictionary.as_bytes())
+    _atomic_write(folder / CURRENT_DICTIONARY, f"{dict_id}\n".encode('ascii'))
+    return dict_id
+
+
+def recompress(path: Path, compressor: Optional[Compressor]) -> Optional[tuple[int, int]]:
+    """
+    Rewrite a note with a compressor (or as plain text if None), keeping its
+    modification time.
+
+    Returns:
+        The file's (old size, new size), or None if it was already stored that way
+    """
+    if compressor is None:
+        if not is_compressed(path):
+            return None
+    elif compressor.is_current(path):
+        return None
+
+    stat = path.stat()
+    with open_note(path) as f:
+        data = f.read()
+    if compressor is not None:
+        data = compressor.compress_bytes(data)
+    _atomic_write(path, data)
+    os.chmod(path, stat.st_mode & 0o777)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    return stat.st_size, len(data)
+
+
+def _zstd_frame(path: Path, source) -> "zstandard.FrameParameters":
+    if zstandard is None:
+        raise OSError(f"{path.name} is zstd-compressed; install the zstandard package to read it")
+    head = source if isinstance(source, bytes) else source.read(18)
+    if not isinstance(source, bytes):
+        source.seek(0)
+    return zstandard.get_frame_parameters(head)
+
+
+def _decompressor(notes_dir: Path, dict_id: int) -> "zstandard.ZstdDecompressor":
+    if not dict_id:
+        return zstandard.ZstdDecompressor()
+    return zstandard.ZstdDecompressor(dict_data=_dictionary(notes_dir, dict_id))
+
+
+def _dictionary(notes_dir: Path, dict_id: int) -> "zstandard.ZstdCompressionDict":
+    key = (str(notes_dir), dict_id)
+    with _dictionaries_lock:
+        dictionary = _dictionaries.get(key)
+        if dictionary is None:
+            path = notes_dir / DICTIONARY_DIR / f"{dict_id}.zdict"
+            try:
+                data = path.read_bytes()
+            except FileNotFoundError:
+                raise OSError(f"zstd dictionary {dict_id} is missing (expected {path})") from None
+            dictionary = _dictionaries[key] = zstandard.ZstdCompressionDict(data)
+        return dictionary
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name[:32]}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,538 @@
+"""
+SQLite storage backend for very large note collections.
+
+With `--database PATH` notes are kept in one SQLite database instead of
+`.md` files in the notes folder. The tools keep their API: file names,
+markdown content, modification times and byte offsets behave as they do
+for files. Every search is answered by SQL:
+
+- `notes` holds each note's content and extracted metadata, with an index
+  on (modification time, file name) for date filters and pagination
+- `notes_words` is an FTS5 table over whole words (file name, title and
+  content) used by the ranked, query and fuzzy modes; ranking uses FTS5's
+  built-in BM25
+- `notes_text` is an FTS5 trigram table used for substring (filter) searches
+- both are external-content tables kept in step with `notes` by triggers
+
+The database runs in WAL mode, so searches on other threads (or processes)
+read a consistent snapshot while a note is being written. Each thread uses
+its own connection; writes from this process are serialized.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+from .compression import read_text
+from .files import slice_utf8
+from .fuzzy import TermMatcher
+from .index import SUFFIX_RE, index_terms, list_notes, tokenize
+from .markdown import extract_metadata
+from .query import Query, content_words, parse_query
+from .snippets import best_window, snippet_from
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    file_name TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    title TEXT NOT NULL,
+    overview TEXT NOT NULL,
+    content TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS notes_by_mtime ON notes (mtime_ns, file_name);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_words USING fts5(
+    name, title, content, content='notes', content_rowid='id',
+    tokenize="unicode61 remove_diacritics 0 tokenchars '_'"
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_text USING fts5(
+    name, content, content='notes', content_rowid='id', tokenize='trigram'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_vocab USING fts5vocab(notes_words, 'col');
+
+CREATE TRIGGER IF NOT EXISTS notes_inserted AFTER INSERT ON notes BEGIN
+    INSERT INTO notes_words (rowid, name, title, content) VALUES (new.id, new.name, new.title, new.content);
+    INSERT INTO notes_text (rowid, name, content) VALUES (new.id, new.name, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_deleted AFTER DELETE ON notes BEGIN
+    INSERT INTO notes_words (notes_words, rowid, name, title, content)
+        VALUES ('delete', old.id, old.name, old.title, old.content);
+    INSERT INTO notes_text (notes_text, rowid, name, content) VALUES ('delete', old.id, old.name, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_updated AFTER UPDATE ON notes BEGIN
+    INSERT INTO notes_words (notes_words, rowid, name, title, content)
+        VALUES ('delete', old.id, old.name, old.title, old.content);
+    INSERT INTO notes_text (notes_text, rowid, name, content) VALUES ('delete', old.id, old.name, old.content);
+    INSERT INTO notes_words (rowid, name, title, content) VALUES (new.id, new.name, new.title, new.content);
+    INSERT INTO notes_text (rowid, name, content) VALUES (new.id, new.name, new.content);
+END;
+"""
+
+# FTS5 column filter for each query field; unscoped words match the content or file name
+QUERY_COLUMNS = {None: "{content name}", "title": "title", "filename": "name"}
+
+# BM25 weights of the name, title and content columns (title words count extra)
+BM25_WEIGHTS = (0.0, 2.0, 1.0)
+
+# The trigram tokenizer cannot look up substrings shorter than this
+MIN_TRIGRAM_LENGTH = 3
+
+# Notes written per transaction by import_folder
+IMPORT_BATCH_SIZE = 1000
+
+# Condition (SQL, parameters) selecting the matching rows of `notes`
+Condition = tuple[str, list]
+
+
+class NoteDatabase:
+    """Notes, metadata and full-text indexes in a SQLite database."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        # Words of all note contents for fuzzy search, loaded on first use and
+        # then kept up to date by the writes
+        self._matcher: Optional[TermMatcher] = None
+        self._matcher_lock = threading.Lock()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            # SQLite's lower() only folds ASCII letters
+            connection.create_function("unicode_lower", 1, _lower, deterministic=True)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        connection = self._connection()
+        with self._write_lock:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    # ------------------------------------------------------------------
+    # Notes
+    # ------------------------------------------------------------------
+
+    def create_note(self, base_name: str, content: str) -> str:
+        """
+        Store a new note under a fresh name.
+
+        Returns:
+            The note's file name: `base_name.md`, or `base_name-N.md` if that is taken
+
+        Raises:
+            sqlite3.Error: If the note cannot be stored
+        """
+        return self.create_notes([(base_name, content)])[0]
+
+    def create_notes(self, notes: list[tuple[str, str]]) -> list[str]:
+        """
+        Store several new notes in one transaction.
+
+        Args:
+            notes: (base name, markdown content) pairs
+
+        Returns:
+            The file name given to each note, in order
+
+        Raises:
+            sqlite3.Error: If the notes cannot be stored (none are)
+        """
+        mtime_ns = time.time_ns()
+        file_names = []
+        with self._transaction() as connection:
+            next_suffix: dict[str, int] = {}
+            for base_name, content in notes:
+                file_name = self._allocate_name(connection, base_name, next_suffix)
+                connection.execute(
+                    "INSERT INTO notes (file_name, name, title, overview, content, mtime_ns, size)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    _note_row(file_name, content, mtime_ns),
+                )
+                file_names.append(file_name)
+        self._add_vocabulary(content for _, content in notes)
+        return file_names
+
+    @staticmethod
+    def _allocate_name(connection: sqlite3.Connection, base_name: str, next_suffix: dict[str, int]) -> str:
+        suffix = next_suffix.get(base_name)
+        if suffix is None:
+            taken = connection.execute(
+                "SELECT 1 FROM notes WHERE file_name = ?", (f"{base_name}.md",)
+            ).fetchone()
+            if taken is None:
+                next_suffix[base_name] = 1
+                return f"{base_name}.md"
+            # The UNIQUE index answers the prefix GLOB without a table scan
+            suffix = 1
+            for (file_name,) in connection.execute(
+                "SELECT file_name FROM notes WHERE file_name GLOB ?", (f"{base_name}-[0-9]*.md",)
+            ):
+                match = SUFFIX_RE.fullmatch(file_name[:-len('.md')])
+                if match is not None and match.group(1) == base_name:
+                    suffix = max(suffix, int(match.group(2)) + 1)
+        next_suffix[base_name] = suffix + 1
+        return f"{base_name}-{suffix}.md"
+
+    def get(self, file_name: str) -> Optional[sqlite3.Row]:
+        """Return a note's file_name, content, mtime_ns and size, or None if there is no such note."""
+        return self._connection().execute(
+            "SELECT file_name, content, mtime_ns, size FROM notes WHERE file_name = ?", (file_name,)
+        ).fetchone()
+
+    def read(self, file_name: str, offset: Optional[int] = None, length: Optional[int] = None) -> Optional[tuple]:
+        """
+        Read a note, or a byte range of it narrowed to whole characters.
+
+        Returns:
+            (text, start, end, mtime_ns, size), or None if there is no such note
+        """
+        row = self.get(file_name)
+        if row is None:
+            return None
+        if offset is None and length is None:
+            return row["content"], 0, row["size"], row["mtime_ns"], row["size"]
+        text, start, end = slice_utf8(row["content"].encode('utf-8'), offset or 0, length)
+        return text, start, end, row["mtime_ns"], row["size"]
+
+    def import_folder(self, folder: Path, progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """
+        Copy the `.md` files of a folder into the database as they are.
+
+        Notes keep their file names and modification times; compressed
+        notes are stored decompressed. A note that already exists under the
+        same name is replaced.
+
+        Returns:
+            The number of notes imported
+        """
+        listing = sorted(list_notes(folder))
+        imported = 0
+        for offset in range(0, len(listing), IMPORT_BATCH_SIZE):
+            rows = []
+            for file_name, stat in listing[offset:offset + IMPORT_BATCH_SIZE]:
+                try:
+                    content = read_text(folder / file_name)
+                except OSError:
+                    continue
+                rows.append(_note_row(file_name, content, stat.st_mtime_ns))
+            with self._transaction() as connection:
+                connection.executemany(
+                    "INSERT INTO notes (file_name, name, title, overview, content, mtime_ns, size)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (file_name) DO UPDATE SET name = excluded.name, title = excluded.title,"
+                    " overview = excluded.overview, content = excluded.content,"
+                    " mtime_ns = excluded.mtime_ns, size = excluded.size",
+                    rows,
+                )
+            # Replaced notes may have taken words with them
+            self._reset_vocabulary()
+            imported += len(rows)
+            if progress is not None:
+                progress(offset + len(rows), len(listing))
+        return imported
+
+    def export_folder(self, folder: Path) -> int:
+        """
+        Write every note to a folder as a `.md` file with its modification time.
+
+        Files with the same names are overwritten.
+
+        Returns:
+            The number of notes exported
+        """
+        folder.mkdir(parents=True, exist_ok=True)
+        exported = 0
+        for row in self._connection().execute("SELECT file_name, content, mtime_ns FROM notes"):
+            path = folder / row["file_name"]
+            path.write_bytes(row["content"].encode('utf-8'))
+            os.utime(path, ns=(row["mtime_ns"], row["mtime_ns"]))
+            exported += 1
+        return exported
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def search(
+        self,
+        search: Optional[str],
+        mode: str = "filter",
+        start_ns: Optional[int] = None,
+        end_ns: Optional[int] = None,
+        after: Optional[tuple] = None,
+        limit: Optional[int] = None,
+        max_distance: Optional[int] = None,
+        snippets: bool = True,
+    ) -> tuple[list[dict], int]:
+        """
+        Select a page of notes, like `get_notes` does for the notes folder.
+
+        Args:
+            search: Optional search term, interpreted according to `mode`
+            mode: "filter", "ranked", "query" or "fuzzy"
+            start_ns: Only include notes modified at or after this time
+            end_ns: Only include notes modified at or before this time
+            after: Sort key of the last note of the previous page
+            limit: Maximum number of notes to return
+            max_distance: Edit distance allowed per word in fuzzy mode
+            snippets: Whether to add a match snippet to each result of a search
+
+        Returns:
+            The page, one dict per note with sort_key, file_name, title,
+            overview and mtime_ns (plus score in ranked mode and snippet when
+            searching), and the total number of matching notes
+
+        Raises:
+            QuerySyntaxError: If a query-mode search cannot be parsed
+        """
+        dates: list[Condition] = []
+        if start_ns is not None:
+            dates.append(("notes.mtime_ns >= ?", [start_ns]))
+        if end_ns is not None:
+            dates.append(("notes.mtime_ns <= ?", [end_ns]))
+        highlight: Optional[Callable[[str], bool]] = None
+
+        if search and mode == "ranked":
+            page, total = self._rank(search, dates, after, limit)
+            words = set(tokenize(search))
+            highlight = words.__contains__
+        else:
+            conditions = list(dates)
+            if search:
+                match, highlight = self._match(search, mode, max_distance)
+                conditions.insert(0, match)
+            where, params = _join(conditions)
+            total = self._connection().execute(f"SELECT count(*) FROM notes WHERE {where}", params).fetchone()[0]
+            if after is not None:
+                where += " AND (notes.mtime_ns, notes.file_name) < (?, ?)"
+                params = params + list(after)
+            rows = self._connection().execute(
+                "SELECT notes.id, notes.file_name, notes.title, notes.overview, notes.mtime_ns FROM notes"
+                f" WHERE {where} ORDER BY notes.mtime_ns DESC, notes.file_name DESC LIMIT ?",
+                params + [-1 if limit is None else limit],
+            ).fetchall()
+            page = [
+                {"sort_key": (row["mtime_ns"], row["file_name"]), **_metadata(row)}
+                for row in rows
+            ]
+
+        if search and snippets:
+            for note in page:
+                note["snippet"] = self._snippet(note.pop("id"), highlight)
+        else:
+            for note in page:
+                del note["id"]
+        return page, total
+
+    def _rank(
+        self,
+        search: str,
+        dates: list[Condition],
+        after: Optional[tuple],
+        limit: Optional[int],
+    ) -> tuple[list[dict], int]:
+        words = list(dict.fromkeys(tokenize(search)))
+        if not words:
+            return [], 0
+        expression = "{title content} : (" + " OR ".join(_quote(word) for word in words) + ")"
+        where, params = _join(dates)
+        connection = self._connection()
+        total = connection.execute(
+            "SELECT count(*) FROM notes WHERE notes.id IN"
+            f" (SELECT rowid FROM notes_words WHERE notes_words MATCH ?) AND {where}",
+            [expression] + params,
+        ).fetchone()[0]
+        if after is not None:
+            where += " AND (hits.score, notes.file_name) < (?, ?)"
+            params = params + list(after)
+        rows = connection.execute(
+            "WITH hits AS (SELECT rowid AS id, -bm25(notes_words, ?, ?, ?) AS score"
+            " FROM notes_words WHERE notes_words MATCH ?)"
+            " SELECT notes.id, notes.file_name, notes.title, notes.overview, notes.mtime_ns, hits.score"
+            f" FROM hits JOIN notes ON notes.id = hits.id WHERE {where}"
+            " ORDER BY hits.score DESC, notes.file_name DESC LIMIT ?",
+            list(BM25_WEIGHTS) + [expression] + params + [-1 if limit is None else limit],
+        ).fetchall()
+        page = [
+            {"sort_key": (row["score"], row["file_name"]), "score": round(row["score"], 4), **_metadata(row)}
+            for row in rows
+        ]
+        return page, total
+
+    def _match(
+        self,
+        search: str,
+        mode: str,
+        max_distance: Optional[int],
+    ) -> tuple[Condition, Callable[[str], bool]]:
+        """Build the condition selecting the notes a search matches, and a test for the words to highlight."""
+        if mode == "query":
+            query = parse_query(search)
+            words, prefixes = content_words(query)
+            word_set, prefix_tuple = set(words), tuple(prefixes)
+            return _query_condition(query), lambda term: term in word_set or term.startswith(prefix_tuple)
+
+        if mode == "fuzzy":
+            matcher = self._vocabulary()
+            groups = [matcher.similar_terms(word, max_distance) for word in dict.fromkeys(tokenize(search))]
+            if not groups or not all(groups):
+                return ("0", []), lambda term: False
+            expression = " AND ".join(
+                "content : (" + " OR ".join(_quote(term) for term in group) + ")" for group in groups
+            )
+            similar = set().union(*groups)
+            return _fts_condition(expression), similar.__contains__
+
+        # Substring search over the file name and content
+        words = list(dict.fromkeys(tokenize(search)))
+        if words == [search.lower()]:
+            # Only a single-word search is a literal substring of the words it matches
+            highlight = lambda term: words[0] in term  # noqa: E731
+        else:
+            highlight = set(words).__contains__
+        if len(search) >= MIN_TRIGRAM_LENGTH:
+            return (
+                "notes.id IN (SELECT rowid FROM notes_text WHERE notes_text MATCH ?)",
+                [_quote(search)],
+            ), highlight
+        lowered = search.lower()
+        return (
+            "(instr(unicode_lower(notes.name), ?) OR instr(unicode_lower(notes.content), ?))",
+            [lowered, lowered],
+        ), highlight
+
+    def _vocabulary(self) -> TermMatcher:
+        """Trigram index over the words of all note contents, loaded on first use."""
+        with self._matcher_lock:
+            if self._matcher is None:
+                terms = self._connection().execute("SELECT term FROM notes_vocab WHERE col = 'content'")
+                self._matcher = TermMatcher(term for (term,) in terms)
+            return self._matcher
+
+    def _add_vocabulary(self, contents: Iterable[str]) -> None:
+        """Add the words of newly written contents to the vocabulary, if it is loaded."""
+        with self._matcher_lock:
+            if self._matcher is not None:
+                for content in contents:
+                    for term in tokenize(content):
+                        self._matcher.add(term)
+
+    def _reset_vocabulary(self) -> None:
+        """Drop the vocabulary after a write that may have removed words; it reloads on next use."""
+        with self._matcher_lock:
+            self._matcher = None
+
+    def _snippet(self, note_id: int, highlight: Callable[[str], bool]) -> Optional[dict]:
+        row = self._connection().execute("SELECT content FROM notes WHERE id = ?", (note_id,)).fetchone()
+        if row is None:
+            return None
+        content = row["content"]
+        positions = {term: positions for term, positions in index_terms(content).items() if highlight(term)}
+        window = best_window(positions)
+        if window is None:
+            return None
+        return snippet_from(BytesIO(content.encode('utf-8')), *window)
+
+
+def _note_row(file_name: str, content: str, mtime_ns: int) -> tuple:
+    metadata = extract_metadata(content)
+    return (
+        file_name,
+        file_name[:-len('.md')],
+        metadata["title"],
+        metadata["overview"],
+        content,
+        mtime_ns,
+        len(content.encode('utf-8')),
+    )
+
+
+def _lower(text: Optional[str]) -> Optional[str]:
+    """Lowercase like the file backend's substring search does (`str.lower`)."""
+    return None if text is None else text.lower()
+
+
+def _metadata(row: sqlite3.Row) -> dict:
+    return {
+        "id": row["id"],
+        "file_name": row["file_name"],
+        "title": row["title"],
+        "overview": row["overview"],
+        "mtime_ns": row["mtime_ns"],
+    }
+
+
+def _join(conditions: list[Condition]) -> Condition:
+    if not conditions:
+        return "1", []
+    return " AND ".join(sql for sql, _ in conditions), [param for _, params in conditions for param in params]
+
+
+def _quote(text: str) -> str:
+    """Quote text as an FTS5 string (matched as a phrase)."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _fts_condition(expression: str) -> Condition:
+    return "notes.id IN (SELECT rowid FROM notes_words WHERE notes_words MATCH ?)", [expression]
+
+
+def _fts_query(query: Query) -> Optional[str]:
+    """Translate a parsed query into an FTS5 expression, or None if it needs a bare NOT."""
+    kind = query[0]
+    if kind in ("term", "prefix", "phrase"):
+        _, field, value = query
+        columns = QUERY_COLUMNS[field]
+        if kind == "prefix":
+            return f"{columns} : {_quote(value)}*"
+        return f"{columns} : {_quote(' '.join(value) if kind == 'phrase' else value)}"
+    if kind == "not":
+        return None
+    if kind == "or":
+        parts = [_fts_query(node) for node in query[1]]
+        return None if None in parts else " OR ".join(f"({part})" for part in parts)
+
+    # FTS5's NOT is binary ("a NOT b"), so an AND needs at least one positive part
+    positive = [_fts_query(node) for node in query[1] if node[0] != "not"]
+    negative = [_fts_query(node[1]) for node in query[1] if node[0] == "not"]
+    if not positive or None in positive or None in negative:
+        return None
+    expression = " AND ".join(f"({part})" for part in positive)
+    for part in negative:
+        expression = f"({expression}) NOT ({part})"
+    return expression
+
+
+def _query_condition(query: Query) -> Condition:
+    """Translate a parsed query into a condition, using one FTS5 lookup per largest translatable part."""
+    expression = _fts_query(query)
+    if expression is not None:
+        return _fts_condition(expression)
+    kind = query[0]
+    if kind == "not":
+        sql, params = _query_condition(query[1])
+        return f"NOT ({sql})", params
+    parts = [_query_condition(node) for node in query[1]]
+    joiner = " AND " if kind == "and" else " OR "
+    return "(" + joiner.join(sql for sql, _ in parts) + ")", [param for _, params in parts for param in params]
@@ -0,0 +1,61 @@
+"""
+Thread pools for blocking note I/O.
+
+Tool handlers are async and hand their disk work to bounded thread pools
+so the event loop stays responsive. Point operations (reading or writing a
+single note) and scans (listing, filtering and searching the whole folder)
+use separate pools, so a long scan can never make a point lookup wait for a
+free thread. Batch imports are coordinated from the scan pool and write their
+files through a third pool.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Concurrent single-note reads and writes
+POINT_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+# Concurrent folder scans; more would only contend for the store lock
+SCAN_WORKERS = 2
+
+# Concurrent file writes within one batch import
+BATCH_WORKERS = 8
+
+point_pool = ThreadPoolExecutor(max_workers=POINT_WORKERS, thread_name_prefix="notes-point")
+scan_pool = ThreadPoolExecutor(max_workers=SCAN_WORKERS, thread_name_prefix="notes-scan")
+batch_pool = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="notes-batch")
+
+
+async def run_point(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run a single-note operation in the point pool."""
+    return await asyncio.get_running_loop().run_in_executor(point_pool, partial(func, *args, **kwargs))
+
+
+async def run_scan(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run a folder scan in the scan pool."""
+    return await asyncio.get_running_loop().run_in_executor(scan_pool, partial(func, *args, **kwargs))
+
+
+def progress_reporter(ctx) -> Optional[Callable[[int, int, str], None]]:
+    """
+    Build a callback that sends MCP progress notifications from a pool thread.
+
+    Args:
+        ctx: The request's FastMCP context, or None outside a client request
+
+    Returns:
+        A (progress, total, message) callback, or None if there is no context
+    """
+    if ctx is None:
+        return None
+    loop = asyncio.get_running_loop()
+
+    def report(progress: int, total: int, message: str) -> None:
+        asyncio.run_coroutine_threadsafe(ctx.report_progress(progress, total, message), loop)
+
+    return report
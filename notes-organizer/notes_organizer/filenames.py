@@ -0,0 +1,46 @@
+"""
+Turning note titles into file names.
+
+`sanitize_filename` keeps letters, digits, underscores, whitespace and
+hyphens, turns every run of whitespace and hyphens into a single hyphen and
+trims hyphens from both ends. ASCII titles (the common case) take a
+`bytes.translate` fast path; other titles go through two precompiled regular
+expressions. Results are memoized, since imports tend to repeat titles.
+"""
+
+import re
+from functools import lru_cache
+
+# Titles remembered by sanitize_filename
+CACHE_SIZE = 4096
+
+UNSAFE_RE = re.compile(r'[^\w\s-]+')
+SEPARATOR_RE = re.compile(r'[\s-]+')
+
+# ASCII characters that are neither word characters, whitespace nor hyphens
+_ASCII_UNSAFE = bytes(
+    c for c in range(128)
+    if not (chr(c).isalnum() or chr(c) in '_-' or chr(c).isspace())
+)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def sanitize_filename(title: str) -> str:
+    """
+    Convert a title into a safe filename.
+
+    Args:
+        title: The title to convert
+
+    Returns:
+        A sanitized filename (without .md extension)
+    """
+    if title.isascii():
+        # Splitting on whitespace collapses and trims separator runs
+        kept = title.encode('ascii').translate(None, _ASCII_UNSAFE).decode('ascii')
+        sanitized = '-'.join(kept.replace('-', ' ').split())
+    else:
+        sanitized = SEPARATOR_RE.sub('-', UNSAFE_RE.sub('', title)).strip('-')
+
+    # If empty after sanitization, use a default name
+    return sanitized or "untitled"
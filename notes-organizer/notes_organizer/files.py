@@ -0,0 +1,127 @@
+"""
+Reading note files without loading them whole.
+
+Large notes are searched through a memory map one window at a time, and
+slices of a note can be read by byte offset, so neither operation needs a
+full in-memory copy of the file. Compressed notes (see `compression`) are
+decompressed as a stream instead, stopping as soon as the answer is known.
+"""
+
+import mmap
+import os
+from pathlib import Path
+from typing import Optional
+
+from .compression import is_compressed, open_note
+
+# Notes at least this large are searched through a memory map
+MMAP_MIN_SIZE = 64 * 1024
+
+# Bytes lowercased and searched at a time when scanning a memory map
+SEARCH_WINDOW = 256 * 1024
+
+
+def file_contains(file_path: Path, search_term: str) -> bool:
+    """
+    Case-insensitively check whether a note contains a search term.
+
+    Small notes are read and lowercased as text. Large notes are memory-mapped
+    and searched in overlapping windows, so only one window is ever copied;
+    this is exact for ASCII search terms, which cover almost every query.
+
+    Raises:
+        OSError: If the note cannot be read
+    """
+    needle_text = search_term.lower()
+    if is_compressed(file_path):
+        return _stream_contains(file_path, needle_text)
+    size = os.path.getsize(file_path)
+    if size < MMAP_MIN_SIZE or not needle_text.isascii():
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            return needle_text in f.read().lower()
+
+    needle = needle_text.encode('ascii')
+    overlap = len(needle) - 1
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while start < size:
+            end = min(size, start + SEARCH_WINDOW + overlap)
+            # bytes.lower() folds only ASCII letters, leaving UTF-8 sequences intact
+            if mm[start:end].lower().find(needle) != -1:
+                return True
+            start += SEARCH_WINDOW
+    return False
+
+
+def _stream_contains(file_path: Path, needle_text: str) -> bool:
+    with open_note(file_path) as f:
+        if not needle_text.isascii():
+            return needle_text in f.read().decode('utf-8', errors='replace').lower()
+        needle = needle_text.encode('ascii')
+        tail = b""
+        while True:
+            window = f.read(SEARCH_WINDOW)
+            if not window:
+                return False
+            data = tail + window.lower()
+            if data.find(needle) != -1:
+                return True
+            tail = data[len(data) - len(needle) + 1:] if len(needle) > 1 else b""
+
+
+def read_slice(file_path: Path, offset: int, length: Optional[int] = None) -> tuple[str, int, int]:
+    """
+    Read part of a note by byte offset.
+
+    The range is narrowed to whole UTF-8 characters: a start inside a
+    multi-byte character moves forward to the next character and an end
+    inside one moves back to its first byte.
+
+    Args:
+        file_path: The note to read
+        offset: First byte to read
+        length: Maximum number of bytes to read; the rest of the file if None
+
+    Returns:
+        (text, start, end): the decoded text and the byte range it came from
+
+    Raises:
+        OSError: If the note cannot be read
+    """
+    if is_compressed(file_path):
+        # Decompress only up to the end of the range (plus one byte, to see
+        # whether the range ends inside a character)
+        with open_note(file_path) as f:
+            data = f.read() if length is None else f.read(offset + length + 1)
+        return slice_utf8(data, offset, length)
+
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return "", 0, 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return slice_utf8(mm, offset, length)
+
+
+def slice_utf8(data, offset: int, length: Optional[int] = None) -> tuple[str, int, int]:
+    """
+    Decode a byte range of UTF-8 data (bytes or a memory map), narrowed to
+    whole characters like `read_slice`.
+
+    Returns:
+        (text, start, end): the decoded text and the byte range it came from
+    """
+    size = len(data)
+    start = min(offset, size)
+    end = size if length is None else min(size, start + length)
+    if start >= end:
+        return "", start, start
+
+    while start < end and _is_continuation(data[start]):
+        start += 1
+    while start < end < size and _is_continuation(data[end]):
+        end -= 1
+    return data[start:end].decode('utf-8', errors='replace'), start, end
+
+
+def _is_continuation(byte: int) -> bool:
+    return byte & 0xC0 == 0x80
@@ -0,0 +1,196 @@
+"""
+Typo-tolerant search for `get_notes(mode="fuzzy")`.
+
+`FuzzyMatcher` keeps a trigram index over the vocabulary of the notes index
+(every distinct word, not every note). A misspelled query word is resolved to
+the indexed words within a small edit distance: words that share too few
+trigrams with it are pruned without being compared, the rest are verified
+with a Levenshtein distance that gives up as soon as the bound is exceeded,
+and the notes containing any of the surviving words match. The work depends
+on the size of the vocabulary, which grows far slower than the corpus, and
+no note is opened.
+"""
+
+from typing import Iterable, Optional
+
+from .index import IndexedNote, NoteIndex, tokenize
+
+# Largest edit distance a caller may ask for
+MAX_DISTANCE = 3
+
+
+def default_distance(word: str) -> int:
+    """Edit distance allowed for a query word when the caller does not choose one."""
+    if len(word) <= 3:
+        return 0
+    if len(word) <= 7:
+        return 1
+    return 2
+
+
+def trigrams(word: str) -> set[str]:
+    """Trigrams of a word padded with '$' (a word of n letters has at most n + 1)."""
+    padded = f"$${word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bounded_distance(a: str, b: str, limit: int) -> Optional[int]:
+    """
+    Levenshtein distance between two words, if it is at most `limit`.
+
+    Only a diagonal band of width 2 * limit + 1 is computed, and the
+    computation stops as soon as every cell in a row exceeds the limit.
+
+    Returns:
+        The distance, or None if it is larger than `limit`
+    """
+    if abs(len(a) - len(b)) > limit:
+        return None
+    if len(a) > len(b):
+        a, b = b, a
+    too_far = limit + 1
+    previous = [j if j <= limit else too_far for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        lo = max(1, i - limit)
+        hi = min(len(b), i + limit)
+        current = [too_far] * (len(b) + 1)
+        current[0] = i if i <= limit else too_far
+        best = current[0]
+        char = a[i - 1]
+        for j in range(lo, hi + 1):
+            cost = previous[j - 1] + (char != b[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost if cost <= limit else too_far
+            if cost < best:
+                best = cost
+        if best > limit:
+            return None
+        previous = current
+    return previous[len(b)] if previous[len(b)] <= limit else None
+
+
+class TermMatcher:
+    """Trigram index over a set of words, answering "which words are close to this one"."""
+
+    def __init__(self, words: Iterable[str] = ()):
+        # trigram -> words containing it
+        self.grams: dict[str, set[str]] = {}
+        # word length -> words of that length (for words too short to prune by trigrams)
+        self.by_length: dict[int, set[str]] = {}
+        self.vocabulary: set[str] = set()
+        for word in words:
+            self.add(word)
+
+    def add(self, term: str) -> None:
+        if term not in self.vocabulary:
+            self.vocabulary.add(term)
+            self.by_length.setdefault(len(term), set()).add(term)
+            for gram in trigrams(term):
+                self.grams.setdefault(gram, set()).add(term)
+
+    def discard(self, term: str) -> None:
+        if term in self.vocabulary:
+            self.vocabulary.discard(term)
+            self.by_length[len(term)].discard(term)
+            for gram in trigrams(term):
+                words = self.grams.get(gram)
+                if words is not None:
+                    words.discard(term)
+                    if not words:
+                        del self.grams[gram]
+
+    def similar_terms(self, word: str, max_distance: Optional[int] = None) -> dict[str, int]:
+        """
+        Find the known words within an edit distance of a word.
+
+        Args:
+            word: A lowercased query word
+            max_distance: Largest edit distance to accept; chosen from the
+                word's length if None
+
+        Returns:
+            The matching words mapped to their distance from `word`
+        """
+        limit = default_distance(word) if max_distance is None else max_distance
+        if limit == 0:
+            return {word: 0} if word in self.vocabulary else {}
+
+        query_grams = trigrams(word)
+        # One edit changes at most three trigrams
+        needed = len(query_grams) - 3 * limit
+        if needed > 0:
+            counts: dict[str, int] = {}
+            for gram in query_grams:
+                for term in self.grams.get(gram, ()):
+                    counts[term] = counts.get(term, 0) + 1
+            candidates = [term for term, shared in counts.items() if shared >= needed]
+        else:
+            # Too short for the trigram filter: compare words of a similar length
+            candidates = [
+                term
+                for length in range(max(1, len(word) - limit), len(word) + limit + 1)
+                for term in self.by_length.get(length, ())
+            ]
+
+        matches = {}
+        for term in candidates:
+            distance = bounded_distance(word, term, limit)
+            if distance is not None:
+                matches[term] = distance
+        return matches
+
+
+class FuzzyMatcher(TermMatcher):
+    """`TermMatcher` over the vocabulary of a `NoteIndex`, kept in step with it."""
+
+    def __init__(self, index: NoteIndex):
+        super().__init__()
+        self.index = index
+        index.add_listener(self)
+
+    # ------------------------------------------------------------------
+    # Index listener
+    # ------------------------------------------------------------------
+
+    def note_added(self, doc_id: int, note: IndexedNote) -> None:
+        for term in note.terms:
+            self.add(term)
+
+    def note_removed(self, doc_id: int, note: IndexedNote) -> None:
+        for term in note.terms:
+            # The index has already dropped the note, so a term without
+            # postings is gone from the vocabulary
+            if term not in self.index.postings:
+                self.discard(term)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def search(self, text: str, max_distance: Optional[int] = None) -> set[str]:
+        """
+        Find the notes containing every word of a query, allowing typos.
+
+        Args:
+            text: The query; each word may match any indexed word within the
+                edit distance
+            max_distance: Largest edit distance per word; chosen from each
+                word's length if None
+
+        Returns:
+            The file names of the matching notes
+        """
+        result: Optional[set[int]] = None
+        for word in dict.fromkeys(tokenize(text)):
+            docs: set[int] = set()
+            for term in self.similar_terms(word, max_distance):
+                docs.update(self.index.postings.get(term, ()))
+            result = docs if result is None else result & docs
+            if not result:
+                return set()
+        if result is None:
+            return set()
+        return {self.index.docs[doc_id].file_name for doc_id in result}
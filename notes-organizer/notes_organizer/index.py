@@ -0,0 +1,526 @@
+"""
+Persistent inverted index for the notes folder.
+
+The index maps every lowercased word token to the notes it appears in,
+together with the token positions inside each note. It is stored next to
+the notes as a JSON snapshot plus an append-only journal, and is kept in
+sync with the folder by comparing each file's modification time and size.
+"""
+
+import heapq
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional, Protocol
+
+from .compression import read_text
+from .files import file_contains
+from .markdown import extract_metadata
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+SNAPSHOT_FILE = "index.json"
+JOURNAL_FILE = "journal.jsonl"
+
+# Compact the journal into a fresh snapshot once it holds this many records
+# (or a quarter of the indexed notes, whichever is larger).
+MIN_JOURNAL_RECORDS = 1000
+
+TOKEN_RE = re.compile(r"\w+")
+
+# "<base>-<n>", the form of names given to notes whose title was already taken
+SUFFIX_RE = re.compile(r"(.+)-(\d+)")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercased word tokens."""
+    return TOKEN_RE.findall(text.lower())
+
+
+def index_terms(text: str) -> dict[str, list[int]]:
+    """
+    Build the positional term map for a note.
+
+    Args:
+        text: The full note content
+
+    Returns:
+        A dict mapping each token to the list of positions where it occurs
+    """
+    terms: dict[str, list[int]] = {}
+    for position, token in enumerate(tokenize(text)):
+        terms.setdefault(token, []).append(position)
+    return terms
+
+
+@dataclass(slots=True)
+class IndexedNote:
+    """A note as recorded in the index."""
+    file_name: str
+    mtime_ns: int
+    size: int
+    terms: dict[str, list[int]]
+    title: str = ""
+
+
+class IndexListener(Protocol):
+    """Receives every change applied to a `NoteIndex` (e.g. derived search structures)."""
+
+    def note_added(self, doc_id: int, note: IndexedNote) -> None: ...
+
+    def note_removed(self, doc_id: int, note: IndexedNote) -> None: ...
+
+
+class NoteIndex:
+    """Token -> postings index over the markdown files of a notes directory."""
+
+    def __init__(self, notes_dir: Path, index_dir: Path):
+        self.notes_dir = notes_dir
+        self.index_dir = index_dir
+        self.docs: dict[int, IndexedNote] = {}
+        self.ids: dict[str, int] = {}
+        self.postings: dict[str, dict[int, list[int]]] = {}
+        self.next_id = 0
+        # Ids of removed notes, handed out again before next_id (may hold stale entries)
+        self._free_ids: list[int] = []
+        self.loaded = False
+        # file name stem -> next numeric suffix to hand out for it
+        self.suffixes: dict[str, int] = {}
+        self._journal: list[dict] = []
+        self._journal_size = 0
+        self._vocab_blob: Optional[str] = None
+        self._needs_compaction = False
+        self._listeners: list[IndexListener] = []
+
+    def add_listener(self, listener: IndexListener) -> None:
+        """Register a listener and replay the notes that are already indexed."""
+        self._listeners.append(listener)
+        for doc_id, note in self.docs.items():
+            listener.note_added(doc_id, note)
+
+    # ------------------------------------------------------------------
+    # Document maintenance
+    # ------------------------------------------------------------------
+
+    def put(self, file_name: str, mtime_ns: int, size: int, text: str, title: Optional[str] = None) -> None:
+        """
+        Add or replace a note in the index.
+
+        Args:
+            file_name: The note's file name
+            mtime_ns: The note's modification time in nanoseconds
+            size: The note's size in bytes
+            text: The full note content
+            title: The note's H1 title, if the caller already extracted it
+        """
+        if title is None:
+            title = extract_metadata(text)["title"]
+        self.add(IndexedNote(file_name, mtime_ns, size, index_terms(text), title))
+
+    def add(self, note: IndexedNote) -> None:
+        """Add or replace a note whose terms were already extracted (e.g. by a worker process)."""
+        # Document ids come from the persisted index; never hand one out before it is loaded
+        if not self.loaded:
+            self.load()
+        self._put(note)
+
+    def _put(self, note: IndexedNote, doc_id: Optional[int] = None, log: bool = True) -> None:
+        old_id = self.ids.get(note.file_name)
+        self.remove(note.file_name, log=False)
+        if doc_id is None:
+            # A replaced note keeps its id and new notes fill the gaps removed
+            # ones left, so ids (and the arrays sized by them) follow the number
+            # of notes rather than the number of edits
+            doc_id = old_id if old_id is not None else self._allocate_id()
+        self.next_id = max(self.next_id, doc_id + 1)
+
+        self.docs[doc_id] = note
+        self.ids[note.file_name] = doc_id
+        self._reserve_suffix(note.file_name)
+        for term, positions in note.terms.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                self._vocab_blob = None
+            postings[doc_id] = positions
+
+        for listener in self._listeners:
+            listener.note_added(doc_id, note)
+
+        if log:
+            self._journal.append({"op": "put", "id": doc_id, "doc": _encode_note(note)})
+
+    def remove(self, file_name: str, log: bool = True) -> bool:
+        """
+        Drop a note from the index.
+
+        Returns:
+            True if the note was indexed, False otherwise
+        """
+        doc_id = self.ids.pop(file_name, None)
+        if doc_id is None:
+            return False
+
+        note = self.docs.pop(doc_id)
+        heapq.heappush(self._free_ids, doc_id)
+        for term in note.terms:
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self.postings[term]
+                self._vocab_blob = None
+
+        for listener in self._listeners:
+            listener.note_removed(doc_id, note)
+
+        if log:
+            self._journal.append({"op": "del", "id": doc_id})
+        return True
+
+    def _allocate_id(self) -> int:
+        while self._free_ids:
+            doc_id = heapq.heappop(self._free_ids)
+            if doc_id not in self.docs:
+                return doc_id
+        return self.next_id
+
+    def allocate_name(self, base_name: str) -> str:
+        """
+        Pick a file name for a new note without probing the folder.
+
+        Returns `base_name.md` if no indexed note has that name, otherwise
+        `base_name-N.md` with N one past the highest suffix handed out or
+        indexed so far. Each call reserves the name it returns, so concurrent
+        callers get different names; callers must still create the file
+        exclusively, since notes the index has not seen yet are not known.
+        """
+        if not self.loaded:
+            self.load()
+        suffix = self.suffixes.get(base_name)
+        if suffix is None:
+            self.suffixes[base_name] = 1
+            return f"{base_name}.md"
+        self.suffixes[base_name] = suffix + 1
+        return f"{base_name}-{suffix}.md"
+
+    def _reserve_suffix(self, file_name: str) -> None:
+        stem = file_name[:-len('.md')]
+        self.suffixes.setdefault(stem, 1)
+        match = SUFFIX_RE.fullmatch(stem)
+        if match is not None:
+            base_name, suffix = match.group(1), int(match.group(2))
+            if self.suffixes.get(base_name, 1) <= suffix:
+                self.suffixes[base_name] = suffix + 1
+
+    def is_current(self, file_name: str, mtime_ns: int, size: int) -> bool:
+        """Check whether the indexed copy of a note matches the given stat values."""
+        doc_id = self.ids.get(file_name)
+        if doc_id is None:
+            return False
+        note = self.docs[doc_id]
+        return note.mtime_ns == mtime_ns and note.size == size
+
+    def sync(
+        self,
+        listing: Optional[list[tuple[str, os.stat_result]]] = None,
+        on_read: Optional[Callable[[str, os.stat_result, str], None]] = None,
+    ) -> int:
+        """
+        Bring the index up to date with the notes directory.
+
+        Loads the persisted index on first use, re-indexes every note whose
+        modification time or size changed, drops deleted notes and persists
+        the result.
+
+        Args:
+            listing: (file name, stat) pairs for every note, if the caller
+                already scanned the directory
+            on_read: Called with (file name, stat, text) for every note that
+                had to be read, so callers can reuse the text
+
+        Returns:
+            The number of notes that were added, updated or removed
+        """
+        if not self.loaded:
+            self.load()
+        if listing is None:
+            listing = list_notes(self.notes_dir)
+
+        changed = 0
+        seen = set()
+        for file_name, stat in listing:
+            seen.add(file_name)
+            if self.is_current(file_name, stat.st_mtime_ns, stat.st_size):
+                continue
+            text = read_note_text(self.notes_dir / file_name)
+            if text is None:
+                continue
+            self.put(file_name, stat.st_mtime_ns, stat.st_size, text)
+            if on_read is not None:
+                on_read(file_name, stat, text)
+            changed += 1
+
+        for file_name in set(self.ids) - seen:
+            self.remove(file_name)
+            changed += 1
+
+        if changed:
+            self.flush()
+        return changed
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def matching_terms(self, fragment: str) -> list[str]:
+        """
+        Find every indexed term that contains the given fragment.
+
+        The vocabulary is kept as one newline-separated string so the
+        containment test runs as a handful of ``str.find`` calls instead of
+        a Python loop over all terms.
+        """
+        if self._vocab_blob is None:
+            self._vocab_blob = "\n" + "\n".join(self.postings) + "\n"
+        blob = self._vocab_blob
+
+        terms = []
+        start = blob.find(fragment)
+        while start != -1:
+            term_start = blob.rfind("\n", 0, start) + 1
+            term_end = blob.find("\n", start)
+            terms.append(blob[term_start:term_end])
+            start = blob.find(fragment, term_end)
+        return terms
+
+    def terms_with_prefix(self, prefix: str) -> list[str]:
+        """Find every indexed term that starts with the given prefix."""
+        return [
+            term for term in self.matching_terms(prefix)
+            if term.startswith(prefix)
+        ]
+
+    def candidates(self, search_term: str) -> Optional[set[int]]:
+        """
+        Narrow a substring search down to the notes that can contain it.
+
+        Every word inside the search term must appear inside some token of a
+        matching note, so intersecting the postings of those tokens gives a
+        superset of the matching notes without opening any file.
+
+        Returns:
+            A set of document ids, or None if the term has no word characters
+            and cannot be answered from the index
+        """
+        fragments = list(dict.fromkeys(tokenize(search_term)))
+        if not fragments:
+            return None
+
+        # Start with the most selective fragment (longest tends to be rarest)
+        fragments.sort(key=len, reverse=True)
+        result: Optional[set[int]] = None
+        for fragment in fragments:
+            docs: set[int] = set()
+            for term in self.matching_terms(fragment):
+                docs.update(self.postings[term])
+            result = docs if result is None else result & docs
+            if not result:
+                break
+        return result or set()
+
+    def lookup(self, search_term: str) -> Optional[tuple[set[str], set[str]]]:
+        """
+        Answer as much of a substring search as the index can without
+        opening a file.
+
+        Returns:
+            (matches, unverified): the notes known to match, and the notes
+            that may match and have to be checked with `file_contains` (only
+            for terms longer than a single word); or None if the index cannot
+            answer the query and the caller has to fall back to a full scan
+        """
+        search_lower = search_term.lower()
+        candidate_ids = self.candidates(search_lower)
+        if candidate_ids is None:
+            return None
+
+        matches = {
+            file_name for file_name in self.ids
+            if search_lower in file_name[:-len('.md')].lower()
+        }
+        exact = TOKEN_RE.fullmatch(search_lower) is not None
+        unverified = set()
+        for doc_id in candidate_ids:
+            file_name = self.docs[doc_id].file_name
+            if file_name in matches:
+                continue
+            if exact:
+                matches.add(file_name)
+            else:
+                unverified.add(file_name)
+        return matches, unverified
+
+    def search(self, search_term: str) -> Optional[set[str]]:
+        """
+        Find the notes whose file name or content contains the search term.
+
+        Matches the semantics of a case-insensitive substring search. A term
+        that is a single word is answered from the index alone; longer terms
+        are verified by reading only the candidate notes.
+
+        Returns:
+            A set of matching file names, or None if the index cannot answer
+            the query and the caller has to fall back to a full scan
+        """
+        found = self.lookup(search_term)
+        if found is None:
+            return None
+        matches, unverified = found
+        search_lower = search_term.lower()
+        for file_name in unverified:
+            try:
+                if file_contains(self.notes_dir / file_name, search_lower):
+                    matches.add(file_name)
+            except OSError:
+                continue
+        return matches
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def load(self) -> None:
+        """Load the snapshot and replay the journal from the index directory."""
+        self.loaded = True
+        snapshot_path = self.index_dir / SNAPSHOT_FILE
+        journal_path = self.index_dir / JOURNAL_FILE
+
+        try:
+            with open(snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            if snapshot.get("version") == INDEX_VERSION:
+                for doc_id, doc in snapshot["docs"].items():
+                    self._put(_decode_note(doc), int(doc_id), log=False)
+                self.next_id = max(self.next_id, snapshot.get("next_id", 0))
+            else:
+                self._needs_compaction = True
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable index snapshot {snapshot_path}: {e}")
+            self._reset()
+            self._needs_compaction = True
+
+        try:
+            with open(journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    record = json.loads(line)
+                    if record["op"] == "put":
+                        self._put(_decode_note(record["doc"]), record["id"], log=False)
+                    elif record["op"] == "del":
+                        note = self.docs.get(record["id"])
+                        if note is not None:
+                            self.remove(note.file_name, log=False)
+                    self._journal_size += 1
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # A torn final line is expected after a crash; keep what replayed
+            # and rewrite the snapshot on the next flush
+            logger.warning(f"Stopped replaying index journal {journal_path}: {e}")
+            self._needs_compaction = True
+
+        self._free_ids = [doc_id for doc_id in range(self.next_id) if doc_id not in self.docs]
+
+    def flush(self) -> None:
+        """Persist pending changes, compacting the journal when it grows large."""
+        if not self._journal and not self._needs_compaction:
+            return
+        try:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            threshold = max(MIN_JOURNAL_RECORDS, len(self.docs) // 4)
+            if self._needs_compaction or self._journal_size + len(self._journal) > threshold:
+                self.compact()
+                return
+            with open(self.index_dir / JOURNAL_FILE, 'a', encoding='utf-8') as f:
+                for record in self._journal:
+                    f.write(json.dumps(record, separators=(',', ':')) + "\n")
+            self._journal_size += len(self._journal)
+            self._journal.clear()
+        except OSError as e:
+            logger.warning(f"Failed to persist notes index: {e}")
+
+    def compact(self) -> None:
+        """Write a full snapshot and truncate the journal."""
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        snapshot = {
+            "version": INDEX_VERSION,
+            "next_id": self.next_id,
+            "docs": {str(doc_id): _encode_note(note) for doc_id, note in self.docs.items()},
+        }
+        _atomic_write_json(self.index_dir / SNAPSHOT_FILE, snapshot)
+        (self.index_dir / JOURNAL_FILE).unlink(missing_ok=True)
+        self._journal.clear()
+        self._journal_size = 0
+        self._needs_compaction = False
+
+    def _reset(self) -> None:
+        for file_name in list(self.ids):
+            self.remove(file_name, log=False)
+        self.next_id = 0
+        self._free_ids = []
+
+
+def list_notes(notes_dir: Path) -> list[tuple[str, os.stat_result]]:
+    """
+    Stat every markdown file in the notes directory in a single scandir pass.
+
+    Returns:
+        A list of (file name, stat result) pairs
+    """
+    listing = []
+    try:
+        with os.scandir(notes_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.md'):
+                    continue
+                try:
+                    if entry.is_file():
+                        listing.append((entry.name, entry.stat()))
+                except OSError:
+                    continue  # Deleted while scanning
+    except FileNotFoundError:
+        pass
+    return listing
+
+
+def read_note_text(file_path: Path) -> Optional[str]:
+    """Read a note for indexing (decompressing it if needed), returning None if it cannot be read."""
+    try:
+        return read_text(file_path)
+    except OSError:
+        return None
+
+
+def _encode_note(note: IndexedNote) -> list:
+    return [note.file_name, note.mtime_ns, note.size, note.terms, note.title]
+
+
+def _decode_note(doc: list) -> IndexedNote:
+    file_name, mtime_ns, size, terms, title = doc
+    return IndexedNote(file_name, mtime_ns, size, terms, title)
+
+
+def _atomic_write_json(path: Path, data) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    # json.dumps uses the C encoder; json.dump streams through the slow Python one
+    payload = json.dumps(data, separators=(',', ':'))
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
@@ -0,0 +1,146 @@
+"""
+Parallel (re)indexing of the notes folder.
+
+Reading and tokenizing notes is spread over a process pool; the parent only
+merges the finished term maps and metadata into the persistent index and the
+metadata cache. Used for the initial scan when the server starts and by the
+`notes-organizer index` command.
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Optional
+
+from .compression import read_text
+from .index import IndexedNote, index_terms, list_notes
+from .markdown import extract_metadata
+
+if TYPE_CHECKING:
+    from .store import NoteStore
+
+logger = logging.getLogger(__name__)
+
+# Below this many stale notes the process pool costs more than it saves
+PARALLEL_THRESHOLD = 500
+
+# Notes handed to a worker at a time
+MAX_BATCH_SIZE = 256
+
+
+def index_files(notes_dir: str, file_names: list[str]) -> list[tuple]:
+    """
+    Read and tokenize a batch of notes (runs in a worker process).
+
+    Returns:
+        A list of (file name, stat, term map, metadata) records for
+        the notes that could be read
+    """
+    records = []
+    for file_name in file_names:
+        path = os.path.join(notes_dir, file_name)
+        try:
+            stat = os.stat(path)
+            content = read_text(Path(path))
+        except OSError:
+            continue
+        records.append((file_name, stat, index_terms(content), extract_metadata(content)))
+    return records
+
+
+def build_index(
+    store: "NoteStore",
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> dict:
+    """
+    Bring the store up to date, indexing stale notes in parallel.
+
+    Args:
+        store: The note store to update
+        workers: Number of worker processes (defaults to the CPU count);
+            1 indexes in this process
+        progress: Called with (notes indexed so far, notes to index)
+
+    Returns:
+        Statistics: notes scanned, indexed and removed, elapsed seconds,
+        files per second and the number of workers used
+    """
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    listing = list_notes(store.notes_dir)
+    present = {file_name for file_name, _ in listing}
+
+    with store.lock:
+        if not store.index.loaded:
+            store.index.load()
+        removed = [file_name for file_name in store.index.ids if file_name not in present]
+        # Metadata evicted from the cache is read back lazily (see
+        # `NoteStore.get_metadata`); it never makes a current note stale
+        stale = [
+            (file_name, stat) for file_name, stat in listing
+            if not store.index.is_current(file_name, stat.st_mtime_ns, stat.st_size)
+        ]
+
+    if workers == 1 or len(stale) < PARALLEL_THRESHOLD:
+        workers = 1
+    else:
+        try:
+            _index_in_pool(store, [file_name for file_name, _ in stale], workers, progress)
+        except (BrokenProcessPool, OSError) as e:
+            # Whatever the workers finished is already merged; the refresh
+            # below reads the rest in this process
+            logger.warning(f"Parallel indexing failed ({e}); continuing in this process")
+            workers = 1
+
+    # Reads whatever is still stale, drops deleted notes and updates the
+    # in-memory listing
+    store.refresh(listing)
+    store.flush()
+
+    # Notes that could not be read stay stale and are not counted
+    with store.lock:
+        indexed = sum(
+            1 for file_name, stat in stale
+            if store.index.is_current(file_name, stat.st_mtime_ns, stat.st_size)
+        )
+
+    elapsed = time.perf_counter() - started
+    return {
+        "scanned": len(listing),
+        "indexed": indexed,
+        "removed": len(removed),
+        "seconds": round(elapsed, 3),
+        "files_per_second": round(indexed / elapsed, 1) if elapsed > 0 else 0.0,
+        "workers": workers
+    }
+
+
+def _index_in_pool(
+    store: "NoteStore",
+    file_names: list[str],
+    workers: int,
+    progress: Optional[Callable[[int, int], None]],
+) -> int:
+    batch_size = max(16, min(MAX_BATCH_SIZE, len(file_names) // (workers * 8) or 1))
+    batches = [file_names[i:i + batch_size] for i in range(0, len(file_names), batch_size)]
+
+    # "spawn" keeps workers independent of the server's threads (the watcher)
+    context = multiprocessing.get_context("spawn")
+    indexed = 0
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = [executor.submit(index_files, str(store.notes_dir), batch) for batch in batches]
+        for future in as_completed(futures):
+            records = future.result()
+            with store.lock:
+                for file_name, stat, terms, metadata in records:
+                    store.index.add(IndexedNote(file_name, stat.st_mtime_ns, stat.st_size, terms, metadata["title"]))
+                    store.remember_metadata(file_name, stat, metadata)
+            indexed += len(records)
+            if progress is not None:
+                progress(indexed, len(file_names))
+    return indexed
@@ -1,9 +1,36 @@
+import argparse
+import base64
+import heapq
+import json
 import os
 import re
+import sqlite3
+import sys
+import time
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
-from mcp.server.fastmcp import FastMCP
+from itertools import islice
+from typing import Callable, Optional
+from mcp.server.fastmcp import Context, FastMCP
+
+# Allow running this file directly (e.g. `mcp dev notes_organizer/main.py`)
+# while still importing the sibling modules through the package
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from notes_organizer.compression import (
+    CODECS, DEFAULT_DICTIONARY_SIZE, Compressor, note_size, read_text, recompress, train_dictionary
+)
+from notes_organizer.database import NoteDatabase
+from notes_organizer.executors import batch_pool, progress_reporter, run_point, run_scan
+from notes_organizer.files import file_contains, read_slice
+from notes_organizer.filenames import sanitize_filename
+from notes_organizer.fuzzy import MAX_DISTANCE
+from notes_organizer.index import list_notes, tokenize
+from notes_organizer.indexer import build_index
+from notes_organizer.query import QuerySyntaxError, parse_query
+from notes_organizer.snippets import best_window, read_snippet
+from notes_organizer.store import NoteStore
 
 # Initialize FastMCP server
 mcp = FastMCP("notes-organizer")
@@ -11,59 +38,60 @@ mcp = FastMCP("notes-organizer")
 # Define the notes directory (in project root, not package directory)
 NOTES_DIR = Path(__file__).parent.parent / "notes"
 
+# Persistent search index and metadata cache, stored alongside the notes
+INDEX_DIR = NOTES_DIR / ".index"
+store = NoteStore(NOTES_DIR, INDEX_DIR)
 
-def get_note_metadata(file_path: Path) -> dict:
-    """Extract metadata from a markdown file."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Extract title (first H1 heading)
-    title = "Untitled"
-    for line in content.split('\n'):
-        if line.startswith('# '):
-            title = line[2:].strip()
-            break
-    
-    # Create overview (first 150 characters of non-heading content)
-    overview = ""
-    for line in content.split('\n'):
-        if line.strip() and not line.startswith('#'):
-            overview = line.strip()[:150]
-            if len(line.strip()) > 150:
-                overview += "..."
-            break
-    
-    return {
-        "file_name": file_path.name,
-        "title": title,
-        "overview": overview
-    }
+# Set by `--database`: notes are then kept in this SQLite database instead of NOTES_DIR
+database: Optional[NoteDatabase] = None
 
+# Send a progress notification every this many notes while filtering
+PROGRESS_INTERVAL = 1000
 
-def filter_by_date(file_path: Path, start_date: Optional[str], end_date: Optional[str]) -> bool:
-    """Check if file modification date is within the specified range."""
-    if not start_date and not end_date:
-        return True
-    
-    mod_time = datetime.fromtimestamp(file_path.stat().st_mtime)
-    
-    if start_date:
-        try:
-            start = datetime.fromisoformat(start_date)
-            if mod_time < start:
-                return False
-        except ValueError:
-            pass  # Invalid date format, skip filter
-    
-    if end_date:
-        try:
-            end = datetime.fromisoformat(end_date)
-            if mod_time > end:
-                return False
-        except ValueError:
-            pass  # Invalid date format, skip filter
+# Most notes accepted by one add_notes call
+MAX_BATCH_NOTES = 1000
+
+# Ways get_notes can interpret its search term
+SEARCH_MODES = ("filter", "ranked", "query", "fuzzy")
+
+
+def parse_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO date filter, returning None if it is missing or invalid."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None  # Invalid date format, skip filter
+
+
+def to_timestamp_ns(value: Optional[datetime]) -> Optional[int]:
+    """Convert a date filter to a nanosecond timestamp comparable with st_mtime_ns."""
+    if value is None:
+        return None
+    return round(value.timestamp() * 1_000_000) * 1000
+
+
+def encode_cursor(sort_key: tuple) -> str:
+    """Encode a (mtime_ns or score, file name) sort key as an opaque pagination cursor."""
+    payload = json.dumps(list(sort_key), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Decode a pagination cursor back into its (mtime_ns or score, file name) sort key.
     
-    return True
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        position, file_name = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(position, (int, float)) or not isinstance(file_name, str):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return position, file_name
 
 
 def search_in_content(file_path: Path, search_term: str) -> bool:
@@ -77,76 +105,118 @@ def search_in_content(file_path: Path, search_term: str) -> bool:
     if search_lower in file_path.stem.lower():
         return True
     
-    # Check content
+    # Check content (large notes are scanned through a memory map)
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read().lower()
-            if search_lower in content:
-                return True
+        return file_contains(file_path, search_term)
     except Exception:
-        pass
-    
-    return False
+        return False
 
 
-def sanitize_filename(title: str) -> str:
+def validate_note(title: str, content: str, overview: Optional[str] = None) -> Optional[str]:
     """
-    Convert a title into a safe filename.
-    
-    Args:
-        title: The title to convert
+    Check a note's fields against the limits enforced by `add_note`.
     
     Returns:
-        A sanitized filename (without .md extension)
+        A description of the first problem found, or None if the note is valid
     """
-    # Remove special characters (keep only alphanumeric, spaces, hyphens, underscores)
-    sanitized = re.sub(r'[^\w\s-]', '', title)
+    # Validate title
+    if not title or not title.strip():
+        return "Title is required and cannot be empty"
     
-    # Replace spaces with hyphens
-    sanitized = re.sub(r'\s+', '-', sanitized.strip())
+    if len(title) > 100:
+        return f"Title exceeds maximum length of 100 characters (current: {len(title)})"
     
-    # Remove consecutive hyphens
-    sanitized = re.sub(r'-+', '-', sanitized)
+    # Validate content
+    if not content or not content.strip():
+        return "Content is required and cannot be empty"
     
-    # Remove leading/trailing hyphens
-    sanitized = sanitized.strip('-')
+    content_size = len(content.encode('utf-8'))
+    max_size = 1024 * 1024  # 1MB
+    if content_size > max_size:
+        return f"Content exceeds maximum size of 1MB (current: {content_size} bytes)"
     
-    # If empty after sanitization, use a default name
-    if not sanitized:
-        sanitized = "untitled"
+    # Validate overview if provided
+    if overview is not None and len(overview) > 255:
+        return f"Overview exceeds maximum length of 255 characters (current: {len(overview)})"
     
-    return sanitized
+    return None
+
+
+def format_note(title: str, content: str, overview: Optional[str] = None) -> str:
+    """Build a note's markdown, taking the overview from the content if none is given."""
+    # Auto-generate overview if not provided
+    if overview is None:
+        overview = content.strip()[:255]
+    return f"# {title}\n{overview}\n\n## Content\n{content}\n"
 
 
-def get_unique_filename(base_name: str, directory: Path) -> str:
+def write_note(title: str, content: str, overview: Optional[str] = None) -> dict:
     """
-    Generate a unique filename by appending a numeric suffix if needed.
+    Write a validated note to a new file and build the `add_note` response (blocking).
     
     Args:
-        base_name: The base filename (without .md extension)
-        directory: The directory where the file will be created
+        title: The note's title
+        content: The note's main content
+        overview: The note's overview, if given
     
     Returns:
-        A unique filename with .md extension
+        The `add_note` response
     """
-    filename = f"{base_name}.md"
-    file_path = directory / filename
+    # Sanitize filename
+    sanitized_name = sanitize_filename(title)
     
-    if not file_path.exists():
-        return filename
+    # Create the markdown content
+    markdown_content = format_note(title, content, overview)
     
-    # File exists, append numeric suffix
-    counter = 1
-    while True:
-        filename = f"{base_name}-{counter}.md"
-        file_path = directory / filename
-        if not file_path.exists():
-            return filename
-        counter += 1
+    if database is not None:
+        try:
+            filename = database.create_note(sanitized_name, markdown_content)
+        except sqlite3.Error as e:
+            return {
+                "success": False,
+                "error": "Database Error",
+                "message": f"Failed to write note: {str(e)}"
+            }
+        return {
+            "success": True,
+            "message": "Note created successfully",
+            "file_path": str(database.path),
+            "file_name": filename,
+            "title": title
+        }
+    
+    # Ensure notes directory exists
+    try:
+        NOTES_DIR.mkdir(parents=True, exist_ok=True)
+    except Exception as e:
+        return {
+            "success": False,
+            "error": "File System Error",
+            "message": f"Failed to create notes directory: {str(e)}"
+        }
+    
+    # Write the file under a fresh name; an existing note is never overwritten
+    try:
+        filename = store.create_note(sanitized_name, markdown_content)
+        file_path = NOTES_DIR / filename
+        
+        return {
+            "success": True,
+            "message": "Note created successfully",
+            "file_path": str(file_path),
+            "file_name": filename,
+            "title": title
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": "File System Error",
+            "message": f"Failed to write note: {str(e)}"
+        }
 
 
 @mcp.tool()
-def add_note(
+async def add_note(
     title: str,
     content: str,
     overview: Optional[str] = None
@@ -162,167 +232,622 @@ def add_note(
     Returns:
         JSON object containing success status and file path or error message
     """
-    # Validate title
-    if not title or not title.strip():
+    error = validate_note(title, content, overview)
+    if error is not None:
         return {
             "success": False,
             "error": "Validation Error",
-            "message": "Title is required and cannot be empty"
+            "message": error
         }
     
-    if len(title) > 100:
-        return {
-            "success": False,
-            "error": "Validation Error",
-            "message": f"Title exceeds maximum length of 100 characters (current: {len(title)})"
-        }
+    return await run_point(write_note, title, content, overview)
+
+
+def write_notes(notes: list) -> dict:
+    """
+    Validate and write a batch of notes and build the `add_notes` response (blocking).
     
-    # Validate content
-    if not content or not content.strip():
-        return {
-            "success": False,
-            "error": "Validation Error",
-            "message": "Content is required and cannot be empty"
-        }
+    Invalid notes are reported and skipped; the valid ones get their file names
+    in one pass, are written in parallel and are indexed together.
     
-    content_size = len(content.encode('utf-8'))
-    max_size = 1024 * 1024  # 1MB
-    if content_size > max_size:
+    Args:
+        notes: Objects with "title", "content" and optional "overview" fields
+    
+    Returns:
+        The `add_notes` response
+    """
+    results: list[Optional[dict]] = [None] * len(notes)
+    pending = []
+    
+    for i, note in enumerate(notes):
+        if not isinstance(note, dict):
+            error = "Each note must be an object with title and content"
+        else:
+            title, content, overview = note.get("title"), note.get("content"), note.get("overview")
+            if not all(value is None or isinstance(value, str) for value in (title, content, overview)):
+                error = "Title, content and overview must be strings"
+            else:
+                error = validate_note(title, content, overview)
+        
+        if error is not None:
+            results[i] = {
+                "index": i,
+                "success": False,
+                "error": "Validation Error",
+                "message": error
+            }
+            continue
+        pending.append((i, title, sanitize_filename(title), format_note(title, content, overview)))
+    
+    if pending and database is not None:
+        try:
+            written = database.create_notes([(base_name, markdown) for _, _, base_name, markdown in pending])
+        except sqlite3.Error as e:
+            written = [e] * len(pending)
+        for (i, title, _, _), result in zip(pending, written):
+            if isinstance(result, str):
+                results[i] = {
+                    "index": i,
+                    "success": True,
+                    "file_path": str(database.path),
+                    "file_name": result,
+                    "title": title
+                }
+            else:
+                results[i] = {
+                    "index": i,
+                    "success": False,
+                    "error": "Database Error",
+                    "message": f"Failed to write note: {str(result)}"
+                }
+    elif pending:
+        # Ensure notes directory exists
+        try:
+            NOTES_DIR.mkdir(parents=True, exist_ok=True)
+        except Exception as e:
+            return {
+                "success": False,
+                "error": "File System Error",
+                "message": f"Failed to create notes directory: {str(e)}"
+            }
+        
+        written = store.create_notes([(base_name, markdown) for _, _, base_name, markdown in pending], batch_pool)
+        for (i, title, _, _), result in zip(pending, written):
+            if isinstance(result, str):
+                results[i] = {
+                    "index": i,
+                    "success": True,
+                    "file_path": str(NOTES_DIR / result),
+                    "file_name": result,
+                    "title": title
+                }
+            else:
+                results[i] = {
+                    "index": i,
+                    "success": False,
+                    "error": "File System Error",
+                    "message": f"Failed to write note: {str(result)}"
+                }
+    
+    created = sum(1 for result in results if result["success"])
+    return {
+        "success": True,
+        "created": created,
+        "failed": len(results) - created,
+        "results": results
+    }
+
+
+@mcp.tool()
+async def add_notes(notes: list[dict]) -> dict:
+    """
+    Create many markdown notes in one call.
+    
+    Every note is validated like in `add_note`; invalid notes are reported and
+    skipped while the rest are still created.
+    
+    Args:
+        notes: Up to 1000 objects, each with "title" (max 100 characters),
+            "content" (max 1MB) and optional "overview" (max 255 characters)
+    
+    Returns:
+        JSON object with the number of notes created and failed, and one result
+        per input note (in order) with its file name or error message
+    """
+    if not notes:
         return {
             "success": False,
             "error": "Validation Error",
-            "message": f"Content exceeds maximum size of 1MB (current: {content_size} bytes)"
+            "message": "At least one note is required"
         }
     
-    # Validate overview if provided
-    if overview is not None and len(overview) > 255:
+    if len(notes) > MAX_BATCH_NOTES:
         return {
             "success": False,
             "error": "Validation Error",
-            "message": f"Overview exceeds maximum length of 255 characters (current: {len(overview)})"
+            "message": f"Batch exceeds maximum of {MAX_BATCH_NOTES} notes (current: {len(notes)})"
         }
     
-    # Auto-generate overview if not provided
-    if overview is None:
-        overview = content.strip()[:255]
+    return await run_scan(write_notes, notes)
+
+
+def filter_notes(
+    search: Optional[str],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    after: Optional[tuple],
+    limit: Optional[int],
+    progress: Optional[Callable[[int, int, str], None]] = None,
+    mode: str = "filter",
+    max_distance: Optional[int] = None
+) -> tuple[list[tuple[tuple, dict]], int]:
+    """
+    Select notes matching a substring search (or, in "query" mode, a boolean
+    query, and in "fuzzy" mode, words within `max_distance` edits of the
+    search words), newest first.
     
-    # Ensure notes directory exists
-    try:
-        NOTES_DIR.mkdir(parents=True, exist_ok=True)
-    except Exception as e:
-        return {
-            "success": False,
-            "error": "File System Error",
-            "message": f"Failed to create notes directory: {str(e)}"
-        }
+    The date range is resolved first with a binary search over the notes'
+    modification times; the search then only considers notes in that range.
+    No note is opened unless the search could not be answered by the index,
+    and notes are only opened after the store lock has been released.
     
-    # Sanitize filename
-    sanitized_name = sanitize_filename(title)
-    filename = get_unique_filename(sanitized_name, NOTES_DIR)
-    file_path = NOTES_DIR / filename
+    Returns:
+        The selected ((mtime_ns, file name), extra fields) pairs and the total
+        number of matching notes
+    """
+    start_ns = to_timestamp_ns(start)
+    end_ns = to_timestamp_ns(end)
     
-    # Create the markdown content
-    markdown_content = f"# {title}\n{overview}\n\n## Content\n{content}\n"
+    with store.lock:
+        timeline = store.timeline
+        lo, hi = timeline.bounds(start_ns, end_ns)
+        
+        if not search:
+            page = list(islice(timeline.newest(start_ns, end_ns, after), limit))
+            return [(sort_key, {}) for sort_key in page], hi - lo
+        
+        # Resolve the search through the index so only matching notes are read
+        unverified = set()
+        if mode == "query":
+            matches = store.queries.search(search)
+        elif mode == "fuzzy":
+            matches = store.fuzzy.search(search, max_distance)
+        else:
+            found = store.index.lookup(search)
+            if found is None:
+                matches = None
+            else:
+                matches, unverified = found
+                matches = matches | unverified
+        if matches is None:
+            in_range = timeline.keys[lo:hi]
+        elif len(matches) < hi - lo:
+            # Fewer matches than notes in range: check each match's date
+            in_range = []
+            for file_name in matches:
+                mtime_ns = timeline.mtimes.get(file_name)
+                if (mtime_ns is not None
+                        and (start_ns is None or mtime_ns >= start_ns)
+                        and (end_ns is None or mtime_ns <= end_ns)):
+                    in_range.append((mtime_ns, file_name))
+        else:
+            in_range = [key for key in timeline.keys[lo:hi] if key[1] in matches]
+    
+    if matches is None:
+        # Fall back to reading the notes in range
+        candidates = []
+        for scanned, sort_key in enumerate(in_range, 1):
+            if progress is not None and scanned % PROGRESS_INTERVAL == 0:
+                progress(scanned, len(in_range), "Searching notes")
+            if search_in_content(NOTES_DIR / sort_key[1], search):
+                candidates.append(sort_key)
+    elif unverified:
+        # Candidates the index could not confirm are read outside the lock
+        candidates = [
+            sort_key for sort_key in in_range
+            if sort_key[1] not in unverified or search_in_content(NOTES_DIR / sort_key[1], search)
+        ]
+    else:
+        candidates = in_range
     
-    # Write the file
+    total = len(candidates)
+    if after is not None:
+        candidates = [sort_key for sort_key in candidates if sort_key < after]
+    
+    # Sort by modification date (newest first); with a limit, only the
+    # requested page is selected
+    if limit is None:
+        page = sorted(candidates, reverse=True)
+    else:
+        page = heapq.nlargest(limit, candidates)
+    return [(sort_key, {}) for sort_key in page], total
+
+
+def rank_notes(
+    search: str,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    after: Optional[tuple],
+    limit: Optional[int]
+) -> tuple[list[tuple[tuple, dict]], int]:
+    """
+    Select notes matching a search by BM25 relevance, best first.
+    
+    Returns:
+        The selected ((score, file name), extra fields) pairs and the total
+        number of matching notes
+    """
+    with store.lock:
+        ranked, total = store.ranker.rank(
+            search,
+            start_ns=to_timestamp_ns(start),
+            end_ns=to_timestamp_ns(end),
+            after=after,
+            limit=limit
+        )
+    return [(sort_key, {"score": round(sort_key[0], 4)}) for sort_key in ranked], total
+
+
+def highlight_terms(search: str, mode: str, max_distance: Optional[int] = None) -> list[str]:
+    """
+    List the indexed words a search matches, to highlight in result snippets.
+
+    In "filter" mode these are the words containing the whole search when it
+    is a single word, and otherwise the search's own words (so searching
+    "c++" highlights "c" but not "rocks"); in "ranked" mode the search words
+    themselves, in "query" mode the words the query looks for outside NOT,
+    and in "fuzzy" mode the words within the edit distance of a search word.
+    """
+    words = list(dict.fromkeys(tokenize(search)))
+    with store.lock:
+        if mode == "query":
+            return store.queries.content_terms(parse_query(search))
+        if mode == "fuzzy":
+            similar = (store.fuzzy.similar_terms(word, max_distance) for word in words)
+            return list(dict.fromkeys(term for terms in similar for term in terms))
+        if mode == "filter" and words == [search.lower()]:
+            # Only a single-word search is a literal substring of the words it matches
+            return store.index.matching_terms(words[0])
+        return [word for word in words if word in store.index.postings]
+
+
+def note_snippet(file_name: str, terms: list[str]) -> Optional[dict]:
+    """
+    Build the snippet of a search hit: the passage with the most matched
+    words, chosen from the positional index, with the byte offsets of the
+    passage and of each matched word.
+
+    Returns:
+        The snippet, or None if no matched word occurs in the note's content
+        (e.g. it matched by file name) or the note cannot be read
+    """
+    window = best_window(store.match_positions(file_name, terms))
+    if window is None:
+        return None
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(markdown_content)
+        return read_snippet(NOTES_DIR / file_name, *window)
+    except OSError:
+        return None
+
+
+def collect_notes(
+    search: Optional[str],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    limit: Optional[int],
+    after: Optional[tuple],
+    mode: str,
+    progress: Optional[Callable[[int, int, str], None]] = None,
+    max_distance: Optional[int] = None,
+    snippets: bool = True
+) -> dict:
+    """
+    Select a page of notes and build the `get_notes` response (blocking).
+    
+    Args:
+        search: Optional search term
+        start: Optional start of the modification date range
+        end: Optional end of the modification date range
+        limit: Optional page size
+        after: Sort key of the last note of the previous page
+        mode: "filter", "ranked", "query" or "fuzzy"
+        progress: Optional (progress, total, message) callback for long scans
+        max_distance: Edit distance allowed per word in fuzzy mode
+        snippets: Whether to add a match snippet to each result of a search
+    
+    Returns:
+        The `get_notes` response
+    """
+    if database is not None:
+        return collect_database_notes(search, start, end, limit, after, mode, max_distance, snippets)
+    
+    # Served from memory while the watcher runs; otherwise a single scandir
+    # pass, reading only notes that changed since they were last indexed
+    listing = store.listing()
+    
+    # Select one extra note to find out whether there is a next page
+    page_size = limit + 1 if limit is not None else None
+    if mode == "ranked":
+        page, total = rank_notes(search, start, end, after, page_size)
+    else:
+        page, total = filter_notes(search, start, end, after, page_size, progress, mode, max_distance)
+    
+    next_cursor = None
+    if limit is not None and len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor(page[-1][0])
+    
+    stats = dict(listing)
+    results = []
+    terms = highlight_terms(search, mode, max_distance) if search and snippets else None
+    
+    for (_, file_name), extra in page:
+        # Get metadata, reading the note only if it is not cached
+        try:
+            # The watcher may have added the note after the listing was taken
+            stat = stats.get(file_name) or (NOTES_DIR / file_name).stat()
+            metadata = store.get_metadata(file_name, stat)
+        except Exception as e:
+            results.append({
+                "file_name": file_name,
+                "title": "Error reading file",
+                "overview": f"Error: {str(e)}",
+                "modified_date": None,
+                **extra
+            })
+            continue
         
-        return {
-            "success": True,
-            "message": "Note created successfully",
-            "file_path": str(file_path),
-            "file_name": filename,
-            "title": title
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "error": "File System Error",
-            "message": f"Failed to write note: {str(e)}"
+        result = {
+            "file_name": file_name,
+            "title": metadata["title"],
+            "overview": metadata["overview"],
+            "modified_date": datetime.fromtimestamp(metadata["mtime"]).isoformat(),
+            **extra
         }
+        if terms is not None:
+            result["snippet"] = note_snippet(file_name, terms)
+        results.append(result)
+    
+    store.flush()
+    
+    return {
+        "success": True,
+        "count": len(results),
+        "total": total,
+        "notes": results,
+        "next_cursor": next_cursor
+    }
+
+
+def collect_database_notes(
+    search: Optional[str],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    limit: Optional[int],
+    after: Optional[tuple],
+    mode: str,
+    max_distance: Optional[int] = None,
+    snippets: bool = True
+) -> dict:
+    """Select a page of notes from the SQLite database and build the `get_notes` response (blocking)."""
+    # Select one extra note to find out whether there is a next page
+    page, total = database.search(
+        search, mode,
+        start_ns=to_timestamp_ns(start),
+        end_ns=to_timestamp_ns(end),
+        after=after,
+        limit=limit + 1 if limit is not None else None,
+        max_distance=max_distance,
+        snippets=snippets
+    )
+    
+    next_cursor = None
+    if limit is not None and len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor(page[-1]["sort_key"])
+    
+    results = []
+    for note in page:
+        del note["sort_key"]
+        mtime_ns = note.pop("mtime_ns")
+        results.append({
+            **note,
+            "modified_date": datetime.fromtimestamp(mtime_ns / 1e9).isoformat()
+        })
+    
+    return {
+        "success": True,
+        "count": len(results),
+        "total": total,
+        "notes": results,
+        "next_cursor": next_cursor
+    }
 
 
 @mcp.tool()
-def get_notes(
+async def get_notes(
     search: Optional[str] = None,
     start_date: Optional[str] = None,
-    end_date: Optional[str] = None
+    end_date: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    mode: str = "filter",
+    max_distance: Optional[int] = None,
+    snippets: bool = True,
+    ctx: Optional[Context] = None
 ) -> dict:
     """
     Read all markdown files inside the notes folder with optional filtering.
     
+    In "filter" mode (the default) notes containing the search term are
+    returned newest first. In "ranked" mode notes are scored against the
+    search terms with BM25 (title matches count extra) and returned best first.
+    In "query" mode the search is a boolean query, returned newest first:
+    words, "quoted phrases", prefix* wildcards, AND/OR/NOT (or -word),
+    parentheses, and title:/filename: to search only those fields.
+    In "fuzzy" mode every search word also matches words in note titles and
+    content that are up to `max_distance` typos (edits) away, newest first.
+    Pass `limit` to receive one page at a time and pass the returned
+    `next_cursor` back as `cursor` to fetch the next page.
+    When searching, each note comes with a snippet: the passage with the
+    most matching words, its byte offset and length in the note, and the
+    [offset, length] of every matching word in it, ready for `get_note`.
+    
     Args:
         search: Optional search term to filter by file name or content
         start_date: Optional start date filter (ISO format: YYYY-MM-DD)
         end_date: Optional end date filter (ISO format: YYYY-MM-DD)
+        limit: Optional maximum number of notes to return
+        cursor: Optional cursor from a previous response to continue after
+        mode: "filter" for substring matching, "ranked" for relevance ranking,
+            "query" for boolean queries or "fuzzy" for typo-tolerant matching
+        max_distance: Optional number of edits allowed per word in fuzzy mode
+            (0-3; by default 0 for words of up to 3 letters, 1 up to 7 letters
+            and 2 for longer words)
+        snippets: Whether to include match snippets when searching (default
+            True)
     
     Returns:
         JSON object containing matching notes with file name, title, and overview
+        (plus score in ranked mode and snippet when searching), the total
+        number of matches and the cursor for the next page (if any)
     """
-    if not NOTES_DIR.exists():
+    if mode not in SEARCH_MODES:
         return {
             "success": False,
-            "error": "Notes directory not found",
-            "notes": []
+            "error": "Validation Error",
+            "message": f"Mode must be one of {', '.join(repr(m) for m in SEARCH_MODES)} (current: {mode})"
         }
     
-    results = []
+    if mode != "filter" and not search:
+        return {
+            "success": False,
+            "error": "Validation Error",
+            "message": f"Search term is required in {mode} mode"
+        }
     
-    # Find all markdown files
-    md_files = list(NOTES_DIR.glob("*.md"))
+    if mode == "query":
+        try:
+            parse_query(search)
+        except QuerySyntaxError as e:
+            return {
+                "success": False,
+                "error": "Validation Error",
+                "message": f"Invalid query: {e}"
+            }
     
-    for file_path in md_files:
-        # Apply filters
-        if not filter_by_date(file_path, start_date, end_date):
-            continue
-        
-        if not search_in_content(file_path, search):
-            continue
-        
-        # Get metadata
+    if max_distance is not None and not 0 <= max_distance <= MAX_DISTANCE:
+        return {
+            "success": False,
+            "error": "Validation Error",
+            "message": f"Max distance must be between 0 and {MAX_DISTANCE} (current: {max_distance})"
+        }
+    
+    if limit is not None and limit < 1:
+        return {
+            "success": False,
+            "error": "Validation Error",
+            "message": f"Limit must be a positive integer (current: {limit})"
+        }
+    
+    after = None
+    if cursor:
         try:
-            metadata = get_note_metadata(file_path)
-            
-            # Add modification date
-            mod_time = datetime.fromtimestamp(file_path.stat().st_mtime)
-            metadata["modified_date"] = mod_time.isoformat()
-            
-            results.append(metadata)
-        except Exception as e:
-            results.append({
-                "file_name": file_path.name,
-                "title": "Error reading file",
-                "overview": f"Error: {str(e)}",
-                "modified_date": None
-            })
+            after = decode_cursor(cursor)
+        except ValueError:
+            return {
+                "success": False,
+                "error": "Validation Error",
+                "message": "Cursor is invalid or expired"
+            }
     
-    # Sort by modification date (newest first)
-    results.sort(key=lambda x: x.get("modified_date", ""), reverse=True)
+    if database is None and not NOTES_DIR.exists():
+        return {
+            "success": False,
+            "error": "Notes directory not found",
+            "notes": []
+        }
+    
+    start = parse_date(start_date)
+    end = parse_date(end_date)
+    
+    # The scan runs in its own pool so it never delays get_note/add_note
+    return await run_scan(
+        collect_notes, search, start, end, limit, after, mode, progress_reporter(ctx),
+        max_distance, snippets
+    )
+
+
+def find_similar_notes(query: str, limit: int) -> dict:
+    """Run a semantic search and build the `semantic_search_notes` response (blocking)."""
+    # Make sure the index reflects the folder when no watcher is running
+    store.listing()
+    results = store.semantic_search(query, limit)
     
     return {
         "success": True,
         "count": len(results),
-        "notes": results
+        "results": results
     }
 
 
 @mcp.tool()
-def get_note(file_name: str) -> dict:
+async def semantic_search_notes(query: str, limit: int = 10) -> dict:
     """
-    Read a specific markdown file from the notes folder.
+    Find notes similar in meaning to a query, even without exact word matches.
+    
+    Each note is split into its `## ` sections and embedded locally (no network
+    or model download). Notes are ranked by their best matching section.
     
     Args:
-        file_name: The name of the markdown file (e.g., "MCP.md")
+        query: Natural-language description of what to look for
+        limit: Maximum number of notes to return (default: 10)
     
     Returns:
-        JSON object containing the full content of the file or 404 error
+        JSON object containing the matching notes with file name, title, best
+        matching section and similarity score, best first
     """
+    if not query or not query.strip():
+        return {
+            "success": False,
+            "error": "Validation Error",
+            "message": "Query is required and cannot be empty"
+        }
+    
+    if limit < 1:
+        return {
+            "success": False,
+            "error": "Validation Error",
+            "message": f"Limit must be a positive integer (current: {limit})"
+        }
+    
+    if database is not None:
+        return {
+            "success": False,
+            "error": "Not Supported",
+            "message": "Semantic search is not available with the SQLite backend",
+            "results": []
+        }
+    
+    if not NOTES_DIR.exists():
+        return {
+            "success": False,
+            "error": "Notes directory not found",
+            "results": []
+        }
+    
+    return await run_scan(find_similar_notes, query, limit)
+
+
+def read_note(file_name: str, offset: Optional[int] = None, length: Optional[int] = None) -> dict:
+    """Read a note, or a byte range of it, and build the `get_note` response (blocking)."""
     # Ensure the file has .md extension
     if not file_name.endswith('.md'):
         file_name += '.md'
     
+    if database is not None:
+        return read_database_note(file_name, offset, length)
+    
     file_path = NOTES_DIR / file_name
     
     # Check if file exists
@@ -343,20 +868,42 @@ def get_note(file_name: str) -> dict:
             "message": "Access denied: Path traversal detected"
         }
     
-    # Read the file content
+    # Read the file content (only the requested slice of it, if any)
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        stat = file_path.stat()
+        mod_time = datetime.fromtimestamp(stat.st_mtime)
         
-        # Get modification date
-        mod_time = datetime.fromtimestamp(file_path.stat().st_mtime)
+        if offset is None and length is None:
+            # Compressed notes are decompressed transparently
+            content = read_text(file_path, errors='strict')
+            size = note_size(file_path)
+            
+            return {
+                "success": True,
+                "file_name": file_name,
+                "content": content,
+                "modified_date": mod_time.isoformat(),
+                "size_bytes": size
+            }
+        
+        size = note_size(file_path)
+        if offset is not None and offset > size:
+            return {
+                "success": False,
+                "error": "Validation Error",
+                "message": f"Offset is past the end of the file (size: {size} bytes)"
+            }
         
+        content, start, end = read_slice(file_path, offset or 0, length)
         return {
             "success": True,
             "file_name": file_name,
             "content": content,
             "modified_date": mod_time.isoformat(),
-            "size_bytes": file_path.stat().st_size
+            "size_bytes": size,
+            "offset": start,
+            "length": end - start,
+            "next_offset": end if end < size else None
         }
     except Exception as e:
         return {
@@ -366,9 +913,337 @@ def get_note(file_name: str) -> dict:
         }
 
 
+def read_database_note(file_name: str, offset: Optional[int], length: Optional[int]) -> dict:
+    """Read a note, or a byte range of it, from the SQLite database and build the `get_note` response (blocking)."""
+    try:
+        note = database.read(file_name, offset, length)
+    except sqlite3.Error as e:
+        return {
+            "success": False,
+            "error": "500 Internal Server Error",
+            "message": f"Error reading note: {str(e)}"
+        }
+    
+    if note is None:
+        return {
+            "success": False,
+            "error": "404 Not Found",
+            "message": f"Note '{file_name}' does not exist in the database"
+        }
+    
+    content, start, end, mtime_ns, size = note
+    response = {
+        "success": True,
+        "file_name": file_name,
+        "content": content,
+        "modified_date": datetime.fromtimestamp(mtime_ns / 1e9).isoformat(),
+        "size_bytes": size
+    }
+    if offset is None and length is None:
+        return response
+    
+    if offset is not None and offset > size:
+        return {
+            "success": False,
+            "error": "Validation Error",
+            "message": f"Offset is past the end of the file (size: {size} bytes)"
+        }
+    
+    return {
+        **response,
+        "offset": start,
+        "length": end - start,
+        "next_offset": end if end < size else None
+    }
+
+
+@mcp.tool()
+async def get_note(file_name: str, offset: Optional[int] = None, length: Optional[int] = None) -> dict:
+    """
+    Read a specific markdown file from the notes folder.
+    
+    Large notes can be fetched in slices: pass `offset` and/or `length` (in
+    bytes) to receive just that part, then pass the returned `next_offset` as
+    `offset` to continue. Slice boundaries never split a character.
+    
+    Args:
+        file_name: The name of the markdown file (e.g., "MCP.md")
+        offset: Optional byte offset to start reading at
+        length: Optional maximum number of bytes to read
+    
+    Returns:
+        JSON object containing the content of the file (plus offset, length and
+        next_offset when reading a slice) or 404 error
+    """
+    if offset is not None and offset < 0:
+        return {
+            "success": False,
+            "error": "Validation Error",
+            "message": f"Offset must not be negative (current: {offset})"
+        }
+    
+    if length is not None and length < 1:
+        return {
+            "success": False,
+            "error": "Validation Error",
+            "message": f"Length must be a positive integer (current: {length})"
+        }
+    
+    return await run_point(read_note, file_name, offset, length)
+
+
+def index_command(workers: Optional[int]) -> None:
+    """Index the notes folder without starting the server and print throughput."""
+    def show_progress(done: int, total: int) -> None:
+        print(f"\rIndexed {done}/{total} notes", end="", file=sys.stderr, flush=True)
+
+    result = build_index(store, workers=workers, progress=show_progress)
+    if result["workers"] > 1:
+        print(file=sys.stderr)
+    print(
+        f"Indexed {result['indexed']} of {result['scanned']} notes "
+        f"({result['removed']} removed) in {result['seconds']:.2f}s: "
+        f"{result['files_per_second']:.0f} files/sec with {result['workers']} worker(s)"
+    )
+
+
+IMPORT_SUFFIXES = ('.md', '.markdown', '.txt')
+
+
+def load_import_file(path: Path) -> dict:
+    """
+    Turn a markdown or text file into an `add_notes` item.
+    
+    The first `# ` heading becomes the title (and is removed from the content);
+    files without one are titled after their file name.
+    """
+    text = path.read_text(encoding='utf-8', errors='replace')
+    title = None
+    lines = text.split('\n')
+    for i, line in enumerate(lines):
+        if line.startswith('# '):
+            title = line[2:].strip()
+            text = '\n'.join(lines[:i] + lines[i + 1:]).strip('\n')
+            break
+    if not title:
+        title = re.sub(r'[-_]+', ' ', path.stem).strip() or path.stem
+    return {"title": title[:100], "content": text}
+
+
+def import_command(paths: list[str]) -> int:
+    """
+    Import markdown/text files (or folders of them) as notes and print throughput.
+    
+    Returns:
+        The process exit status: 0 if every file was imported, 1 otherwise
+    """
+    files = []
+    for name in paths:
+        path = Path(name)
+        if path.is_dir():
+            files.extend(sorted(p for p in path.rglob('*') if p.is_file() and p.suffix.lower() in IMPORT_SUFFIXES))
+        else:
+            files.append(path)
+    
+    started = time.perf_counter()
+    created = failed = 0
+    for offset in range(0, len(files), MAX_BATCH_NOTES):
+        batch = files[offset:offset + MAX_BATCH_NOTES]
+        notes = []
+        for path, note in zip(batch, batch_pool.map(_try_load_import_file, batch)):
+            if isinstance(note, Exception):
+                print(f"{path}: {note}", file=sys.stderr)
+                failed += 1
+            else:
+                notes.append((path, note))
+        
+        response = write_notes([note for _, note in notes])
+        if not response["success"]:
+            print(response["message"], file=sys.stderr)
+            return 1
+        for (path, _), result in zip(notes, response["results"]):
+            if not result["success"]:
+                print(f"{path}: {result['message']}", file=sys.stderr)
+        created += response["created"]
+        failed += response["failed"]
+        print(f"\rImported {created + failed}/{len(files)} files", end="", file=sys.stderr, flush=True)
+    
+    elapsed = time.perf_counter() - started
+    if files:
+        print(file=sys.stderr)
+    rate = created / elapsed * 60 if elapsed > 0 else 0.0
+    print(f"Imported {created} notes ({failed} failed) in {elapsed:.2f}s: {rate:.0f} notes/min")
+    return 1 if failed else 0
+
+
+def _try_load_import_file(path: Path):
+    try:
+        return load_import_file(path)
+    except OSError as e:
+        return e
+
+
+def train_dictionary_command(size: int) -> int:
+    """
+    Train the zstd dictionary on the notes folder and print its id.
+    
+    Returns:
+        The process exit status
+    """
+    try:
+        dict_id = train_dictionary(NOTES_DIR, size)
+    except Exception as e:
+        print(f"Failed to train a dictionary: {e}", file=sys.stderr)
+        return 1
+    print(f"Trained dictionary {dict_id}; new zstd notes will use it")
+    return 0
+
+
+def recompress_command(codec: str) -> int:
+    """
+    Rewrite every note with a codec ("none" to store them uncompressed) and
+    print the space saved. Modification times are kept.
+    
+    Returns:
+        The process exit status: 0 if every note was rewritten, 1 otherwise
+    """
+    try:
+        compressor = None if codec == "none" else Compressor(NOTES_DIR, codec)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    
+    listing = list_notes(NOTES_DIR)
+    
+    def rewrite(file_name: str):
+        try:
+            return recompress(NOTES_DIR / file_name, compressor)
+        except Exception as e:
+            return e
+    
+    before = after = rewritten = failed = 0
+    for (file_name, stat), result in zip(listing, batch_pool.map(rewrite, [name for name, _ in listing])):
+        if isinstance(result, Exception):
+            print(f"{file_name}: {result}", file=sys.stderr)
+            failed += 1
+        elif result is None:
+            before += stat.st_size
+            after += stat.st_size
+        else:
+            before += result[0]
+            after += result[1]
+            rewritten += 1
+    
+    print(f"Rewrote {rewritten} of {len(listing)} notes ({failed} failed): "
+          f"{before} -> {after} bytes on disk")
+    return 1 if failed else 0
+
+
+def use_notes_dir(notes_dir: Path) -> None:
+    """
+    Serve the notes in another folder instead of the project's `notes/`.
+    
+    Args:
+        notes_dir: The folder to use; its index is kept in `notes_dir/.index`
+    """
+    global NOTES_DIR, INDEX_DIR, store
+    NOTES_DIR = notes_dir
+    INDEX_DIR = NOTES_DIR / ".index"
+    store = NoteStore(NOTES_DIR, INDEX_DIR)
+
+
 def main():
-    """Entry point for the notes-organizer MCP server."""
-    mcp.run()
+    """Entry point for the notes-organizer MCP server and its commands."""
+    global database
+    options = argparse.ArgumentParser(add_help=False)
+    options.add_argument("--workers", type=int, default=argparse.SUPPRESS,
+                         help="worker processes for indexing (default: number of CPUs)")
+    options.add_argument("--database", type=Path, default=argparse.SUPPRESS,
+                         help="keep notes in this SQLite database instead of the notes folder")
+    options.add_argument("--compress", choices=CODECS, default=argparse.SUPPRESS,
+                         help="store new notes compressed (zstd needs the zstandard package)")
+    options.add_argument("--notes-dir", type=Path, default=argparse.SUPPRESS,
+                         help=f"serve the notes in this folder (default: {NOTES_DIR})")
+    parser = argparse.ArgumentParser(prog="notes-organizer", description="Notes organizer MCP server",
+                                     parents=[options])
+    subcommands = parser.add_subparsers(dest="command")
+    subcommands.add_parser("index", parents=[options],
+                           help="build or refresh the search index, then exit")
+    importer = subcommands.add_parser("import", parents=[options],
+                                      help="import markdown or text files as notes, then exit")
+    importer.add_argument("paths", nargs="+", help="files or folders to import")
+    for name, action in (("db-import", "copy the notes folder's .md files into"),
+                         ("db-export", "write every note as a .md file from")):
+        command = subcommands.add_parser(name, parents=[options], help=f"{action} the --database, then exit")
+        command.add_argument("folder", nargs="?", type=Path, default=None,
+                             help=f"notes folder (default: the --notes-dir, {NOTES_DIR})")
+    trainer = subcommands.add_parser("train-dictionary", parents=[options],
+                                     help="train the zstd dictionary new notes are compressed with, then exit")
+    trainer.add_argument("--size", type=int, default=DEFAULT_DICTIONARY_SIZE,
+                         help=f"dictionary size in bytes (default: {DEFAULT_DICTIONARY_SIZE})")
+    recompressor = subcommands.add_parser("recompress", parents=[options],
+                                          help="rewrite every note with a codec (or uncompressed), then exit")
+    recompressor.add_argument("codec", choices=("none",) + CODECS)
+    args = parser.parse_args()
+
+    workers = getattr(args, "workers", None)
+    if workers is not None and workers < 1:
+        parser.error("--workers must be at least 1")
+    notes_dir = getattr(args, "notes_dir", None)
+    if notes_dir is not None:
+        if not notes_dir.is_dir():
+            parser.error(f"--notes-dir {notes_dir} is not a folder")
+        use_notes_dir(notes_dir)
+    database_path = getattr(args, "database", None)
+    if database_path is not None:
+        database = NoteDatabase(database_path)
+    elif args.command in ("db-import", "db-export"):
+        parser.error(f"{args.command} requires --database")
+    
+    codec = getattr(args, "compress", None)
+    if database is not None and (codec is not None or args.command in ("train-dictionary", "recompress")):
+        parser.error("compression applies to the notes folder; SQLite stores the database uncompressed")
+    if codec is not None:
+        try:
+            store.compressor = Compressor(NOTES_DIR, codec)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.command == "train-dictionary":
+        sys.exit(train_dictionary_command(args.size))
+    if args.command == "recompress":
+        sys.exit(recompress_command(args.codec))
+    
+    if args.command in ("db-import", "db-export") and args.folder is None:
+        args.folder = NOTES_DIR
+    if args.command == "db-import":
+        imported = database.import_folder(args.folder)
+        print(f"Imported {imported} notes from {args.folder} into {database_path}")
+        return
+    if args.command == "db-export":
+        exported = database.export_folder(args.folder)
+        print(f"Exported {exported} notes from {database_path} to {args.folder}")
+        return
+    if args.command == "index":
+        if database is not None:
+            parser.error("index builds the notes folder's index; the database is always indexed")
+        index_command(workers)
+        return
+    if args.command == "import":
+        if database is None:
+            store.refresh()
+        sys.exit(import_command(args.paths))
+
+    if database is not None:
+        mcp.run()
+        return
+
+    # Build (or refresh) the search index and metadata cache, then keep them
+    # current with a filesystem watcher while serving requests
+    store.start_watching(workers=workers)
+    try:
+        mcp.run()
+    finally:
+        store.stop_watching()
 
 
 if __name__ == "__main__":
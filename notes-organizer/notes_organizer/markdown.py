@@ -0,0 +1,79 @@
+"""Helpers for reading the markdown structure of a note."""
+
+import io
+from pathlib import Path
+
+from .compression import open_note
+
+# Characters read at a time by read_metadata
+HEAD_CHUNK_SIZE = 4096
+
+
+class _HeaderScanner:
+    """Finds the title (first H1) and overview (first non-heading line) line by line."""
+
+    def __init__(self):
+        self.title = None
+        self.overview = None
+
+    @property
+    def done(self) -> bool:
+        return self.title is not None and self.overview is not None
+
+    def feed(self, line: str) -> bool:
+        """Look at the next line; returns True once both fields are found."""
+        if self.title is None and line.startswith('# '):
+            self.title = line[2:].strip()
+        if self.overview is None and line.strip() and not line.startswith('#'):
+            stripped = line.strip()
+            self.overview = stripped[:150]
+            if len(stripped) > 150:
+                self.overview += "..."
+        return self.done
+
+    def result(self) -> dict:
+        return {
+            "title": self.title if self.title is not None else "Untitled",
+            "overview": self.overview if self.overview is not None else ""
+        }
+
+
+def extract_metadata(content: str) -> dict:
+    """Extract the title and overview from markdown content."""
+    scanner = _HeaderScanner()
+    for line in content.split('\n'):
+        if scanner.feed(line):
+            break
+    return scanner.result()
+
+
+def read_metadata(file_path: Path, chunk_size: int = HEAD_CHUNK_SIZE) -> dict:
+    """
+    Extract the title and overview from a note, reading only as much as needed.
+
+    The note is read in small chunks and reading stops as soon as both the
+    first H1 heading and the first non-heading line have been seen, which for
+    typical notes is within the first few KB (compressed notes are
+    decompressed only that far). Gives the same result as `extract_metadata`
+    on the whole file.
+
+    Raises:
+        OSError, UnicodeDecodeError: If the note cannot be read
+    """
+    scanner = _HeaderScanner()
+    pending: list[str] = []
+    with io.TextIOWrapper(open_note(file_path), encoding='utf-8') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                scanner.feed(''.join(pending))
+                break
+            pending.append(chunk)
+            if '\n' not in chunk:
+                # Still inside one long line
+                continue
+            lines = ''.join(pending).split('\n')
+            pending = [lines.pop()]
+            if any(scanner.feed(line) for line in lines):
+                break
+    return scanner.result()
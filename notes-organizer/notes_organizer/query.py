@@ -0,0 +1,384 @@
+"""
+Boolean query language for `get_notes(mode="query")`.
+
+Syntax:
+    word            notes containing the word (in the content or file name)
+    word*           notes containing a word that starts with "word"
+    "two words"     notes containing the words next to each other, in order
+    title:word      only look in the note's H1 title (also title:"a phrase",
+                    title:pre* and title:(a OR b))
+    filename:word   only look in the file name
+    a b, a AND b    notes matching both
+    a OR b          notes matching either
+    NOT a, -a       notes not matching
+    ( ... )         grouping
+
+NOT binds tighter than AND, which binds tighter than OR. Operators must be
+written in upper case; "and", "or" and "not" are ordinary words. Words are
+matched whole and case-insensitively; a word containing punctuation (such as
+"data-pipeline") is matched as a phrase.
+
+`QueryEngine` evaluates parsed queries against the positional index. Every
+posting list is kept as a sorted list of document ids, AND is computed with
+galloping intersection starting from the shortest list, and phrases are
+verified against term positions, so no note is opened.
+"""
+
+import bisect
+import re
+from typing import Optional, Union
+
+from .index import IndexedNote, NoteIndex, tokenize
+
+# Fields a term can be scoped to; None means content or file name
+FIELDS = ("title", "filename")
+
+LEX_RE = re.compile(
+    r'\s*(?:(?P<lparen>\()|(?P<rparen>\))|(?P<field>(?:title|filename):)'
+    r'|"(?P<phrase>[^"]*)"?|(?P<word>[^\s()"]+))'
+)
+
+# Parsed queries are nested tuples:
+#   ("term", field, word), ("prefix", field, prefix), ("phrase", field, [words]),
+#   ("and", [nodes]), ("or", [nodes]), ("not", node)
+Query = tuple
+
+
+class QuerySyntaxError(ValueError):
+    """Raised when a search query cannot be parsed."""
+
+
+def parse_query(text: str) -> Query:
+    """
+    Parse a search query.
+
+    Raises:
+        QuerySyntaxError: If the query is empty or malformed
+    """
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = LEX_RE.match(text, position)
+        if match is None or match.end() == position:
+            raise QuerySyntaxError(f"Unexpected character at position {position}: {text[position]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+
+    if not tokens:
+        raise QuerySyntaxError("Query is empty")
+    parser = _Parser(tokens)
+    query = parser.parse_or(None)
+    if parser.position < len(tokens):
+        raise QuerySyntaxError(f"Unexpected {tokens[parser.position][1]!r}")
+    return query
+
+
+class _Parser:
+    def __init__(self, tokens: list[tuple[str, str]]):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self) -> Optional[tuple[str, str]]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self) -> tuple[str, str]:
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def parse_or(self, field: Optional[str]) -> Query:
+        nodes = [self.parse_and(field)]
+        while self.peek() == ("word", "OR"):
+            self.take()
+            nodes.append(self.parse_and(field))
+        return nodes[0] if len(nodes) == 1 else ("or", nodes)
+
+    def parse_and(self, field: Optional[str]) -> Query:
+        nodes = [self.parse_not(field)]
+        while True:
+            token = self.peek()
+            if token is None or token[0] == "rparen" or token == ("word", "OR"):
+                break
+            if token == ("word", "AND"):
+                self.take()
+            nodes.append(self.parse_not(field))
+        return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+    def parse_not(self, field: Optional[str]) -> Query:
+        token = self.peek()
+        if token == ("word", "NOT"):
+            self.take()
+            return ("not", self.parse_not(field))
+        if token is not None and token[0] == "word" and token[1].startswith("-") and len(token[1]) > 1:
+            self.take()
+            return ("not", self._word(token[1][1:], field))
+        return self.parse_atom(field)
+
+    def parse_atom(self, field: Optional[str]) -> Query:
+        token = self.peek()
+        if token is None:
+            raise QuerySyntaxError("Query ends where a search term was expected")
+        kind, value = self.take()
+
+        if kind == "field":
+            if self.peek() is None:
+                raise QuerySyntaxError(f"Missing search term after {value!r}")
+            return self.parse_atom(value[:-1])
+        if kind == "lparen":
+            node = self.parse_or(field)
+            if self.peek() != ("rparen", ")"):
+                raise QuerySyntaxError("Missing closing parenthesis")
+            self.take()
+            return node
+        if kind == "rparen":
+            raise QuerySyntaxError("Unexpected ')'")
+        if kind == "phrase":
+            words = tokenize(value)
+            if not words:
+                raise QuerySyntaxError(f'Phrase "{value}" has no words to search for')
+            return ("phrase", field, words) if len(words) > 1 else ("term", field, words[0])
+        if value in ("AND", "OR"):
+            raise QuerySyntaxError(f"{value} needs a search term on both sides")
+        return self._word(value, field)
+
+    def _word(self, value: str, field: Optional[str]) -> Query:
+        if value.endswith("*"):
+            words = tokenize(value[:-1])
+            if len(words) != 1 or not value[:-1].strip("*"):
+                raise QuerySyntaxError(f"Wildcard {value!r} must be a single word followed by *")
+            return ("prefix", field, words[0])
+        words = tokenize(value)
+        if not words:
+            raise QuerySyntaxError(f"{value!r} has no words to search for")
+        return ("phrase", field, words) if len(words) > 1 else ("term", field, words[0])
+
+
+class QueryEngine:
+    """Evaluates parsed queries against a `NoteIndex`, kept in step with it."""
+
+    def __init__(self, index: NoteIndex):
+        self.index = index
+        # field -> term -> {doc id: positions}; content postings live in the index
+        self.field_postings: dict[str, dict[str, dict[int, list[int]]]] = {field: {} for field in FIELDS}
+        # (field, term) -> sorted doc ids, built on first use
+        self._sorted: dict[tuple[Optional[str], str], list[int]] = {}
+        self._all_ids: Optional[list[int]] = None
+        index.add_listener(self)
+
+    # ------------------------------------------------------------------
+    # Index listener
+    # ------------------------------------------------------------------
+
+    def note_added(self, doc_id: int, note: IndexedNote) -> None:
+        for term in note.terms:
+            self._sorted.pop((None, term), None)
+        for field, tokens in self._field_tokens(note):
+            postings = self.field_postings[field]
+            for position, term in enumerate(tokens):
+                postings.setdefault(term, {}).setdefault(doc_id, []).append(position)
+                self._sorted.pop((field, term), None)
+        self._all_ids = None
+
+    def note_removed(self, doc_id: int, note: IndexedNote) -> None:
+        for term in note.terms:
+            self._sorted.pop((None, term), None)
+        for field, tokens in self._field_tokens(note):
+            postings = self.field_postings[field]
+            for term in set(tokens):
+                term_postings = postings.get(term)
+                if term_postings is not None:
+                    term_postings.pop(doc_id, None)
+                    if not term_postings:
+                        del postings[term]
+                self._sorted.pop((field, term), None)
+        self._all_ids = None
+
+    @staticmethod
+    def _field_tokens(note: IndexedNote) -> list[tuple[str, list[str]]]:
+        return [("title", tokenize(note.title)), ("filename", tokenize(note.file_name[:-len('.md')]))]
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+
+    def search(self, query: Union[str, Query]) -> set[str]:
+        """
+        Find the notes matching a query.
+
+        Args:
+            query: Query text or a query returned by `parse_query`
+
+        Returns:
+            The file names of the matching notes
+
+        Raises:
+            QuerySyntaxError: If the query text cannot be parsed
+        """
+        if isinstance(query, str):
+            query = parse_query(query)
+        docs = self.index.docs
+        return {docs[doc_id].file_name for doc_id in self.evaluate(query)}
+
+    def evaluate(self, query: Query) -> list[int]:
+        """Return the sorted ids of the notes matching a parsed query."""
+        kind = query[0]
+        if kind == "term":
+            _, field, word = query
+            return self._union([self._ids(f, word) for f in self._fields(field)])
+        if kind == "prefix":
+            _, field, prefix = query
+            return self._union([
+                self._ids(f, term)
+                for f in self._fields(field)
+                for term in self._terms_with_prefix(f, prefix)
+            ])
+        if kind == "phrase":
+            _, field, words = query
+            return self._union([self._phrase(f, words) for f in self._fields(field)])
+        if kind == "or":
+            return self._union([self.evaluate(node) for node in query[1]])
+        if kind == "not":
+            return _difference(self._all(), self.evaluate(query[1]))
+
+        # AND: intersect the positive parts (shortest first), then drop the negated ones
+        positive = [self.evaluate(node) for node in query[1] if node[0] != "not"]
+        negative = [self.evaluate(node[1]) for node in query[1] if node[0] == "not"]
+        if positive:
+            positive.sort(key=len)
+            result = positive[0]
+            for ids in positive[1:]:
+                if not result:
+                    break
+                result = _intersect(result, ids)
+        else:
+            result = self._all()
+        for ids in negative:
+            if not result:
+                break
+            result = _difference(result, ids)
+        return result
+
+    def content_terms(self, query: Query) -> list[str]:
+        """List the indexed content words a parsed query looks for, to highlight in its results."""
+        words, prefixes = content_words(query)
+        terms = [word for word in words if word in self.index.postings]
+        for prefix in prefixes:
+            terms.extend(self.index.terms_with_prefix(prefix))
+        return list(dict.fromkeys(terms))
+
+    def _fields(self, field: Optional[str]) -> tuple:
+        # Unscoped terms match the content or the file name
+        return (None, "filename") if field is None else (field,)
+
+    def _postings(self, field: Optional[str]) -> dict[str, dict[int, list[int]]]:
+        return self.index.postings if field is None else self.field_postings[field]
+
+    def _ids(self, field: Optional[str], term: str) -> list[int]:
+        key = (field, term)
+        ids = self._sorted.get(key)
+        if ids is None:
+            ids = self._sorted[key] = sorted(self._postings(field).get(term, ()))
+        return ids
+
+    def _terms_with_prefix(self, field: Optional[str], prefix: str) -> list[str]:
+        if field is None:
+            return self.index.terms_with_prefix(prefix)
+        return [term for term in self.field_postings[field] if term.startswith(prefix)]
+
+    def _phrase(self, field: Optional[str], words: list[str]) -> list[int]:
+        lists = sorted((self._ids(field, word) for word in set(words)), key=len)
+        candidates = lists[0]
+        for ids in lists[1:]:
+            if not candidates:
+                return []
+            candidates = _intersect(candidates, ids)
+        if not candidates:
+            return []
+
+        postings = self._postings(field)
+        word_postings = [postings[word] for word in words]
+        matches = []
+        for doc_id in candidates:
+            following = [set(term_postings[doc_id]) for term_postings in word_postings[1:]]
+            if any(
+                all(start + offset in positions for offset, positions in enumerate(following, 1))
+                for start in word_postings[0][doc_id]
+            ):
+                matches.append(doc_id)
+        return matches
+
+    def _all(self) -> list[int]:
+        if self._all_ids is None:
+            self._all_ids = sorted(self.index.docs)
+        return self._all_ids
+
+    @staticmethod
+    def _union(lists: list[list[int]]) -> list[int]:
+        lists = [ids for ids in lists if ids]
+        if len(lists) <= 1:
+            return lists[0] if lists else []
+        return sorted(set().union(*lists))
+
+
+def content_words(query: Query) -> tuple[list[str], list[str]]:
+    """
+    Collect the words and prefixes a parsed query looks for in note content.
+
+    Words under NOT and words scoped to the file name are left out.
+
+    Returns:
+        (words, prefixes)
+    """
+    words: list[str] = []
+    prefixes: list[str] = []
+    stack = [query]
+    while stack:
+        node = stack.pop()
+        kind = node[0]
+        if kind in ("and", "or"):
+            stack.extend(reversed(node[1]))
+        elif kind != "not" and node[1] != "filename":
+            if kind == "prefix":
+                prefixes.append(node[2])
+            else:
+                words.extend(node[2] if kind == "phrase" else [node[2]])
+    return list(dict.fromkeys(words)), list(dict.fromkeys(prefixes))
+
+
+def _gallop(ids: list[int], target: int, lo: int) -> int:
+    """Index of the first element >= target in ids[lo:], by exponential then binary search."""
+    bound = 1
+    n = len(ids)
+    while lo + bound < n and ids[lo + bound] < target:
+        bound <<= 1
+    return bisect.bisect_left(ids, target, lo, min(lo + bound + 1, n))
+
+
+def _intersect(a: list[int], b: list[int]) -> list[int]:
+    """Intersect two sorted id lists, galloping through the longer one."""
+    if len(a) > len(b):
+        a, b = b, a
+    result = []
+    lo = 0
+    for doc_id in a:
+        lo = _gallop(b, doc_id, lo)
+        if lo == len(b):
+            break
+        if b[lo] == doc_id:
+            result.append(doc_id)
+    return result
+
+
+def _difference(a: list[int], b: list[int]) -> list[int]:
+    """Ids of sorted list a that are not in sorted list b."""
+    if not b:
+        return a
+    result = []
+    lo = 0
+    for doc_id in a:
+        lo = _gallop(b, doc_id, lo)
+        if lo == len(b) or b[lo] != doc_id:
+            result.append(doc_id)
+    return result
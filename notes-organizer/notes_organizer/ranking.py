@@ -0,0 +1,191 @@
+"""
+BM25 ranking over the notes index.
+
+`BM25Ranker` mirrors the postings of a `NoteIndex` into compact NumPy arrays
+(document ids and term frequencies per term, document lengths and
+modification times per document) and scores queries with vectorized BM25,
+boosting terms that appear in a note's H1 title.
+"""
+
+import math
+from collections import Counter
+from typing import Optional
+
+import numpy as np
+
+from .index import IndexedNote, NoteIndex, tokenize
+
+# Standard BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Weight of a title match relative to a body match
+TITLE_BOOST = 2.0
+
+INITIAL_CAPACITY = 1024
+
+
+class BM25Ranker:
+    """Vectorized BM25 scorer kept in step with a `NoteIndex`."""
+
+    def __init__(self, index: NoteIndex):
+        self.index = index
+        self.doc_len = np.zeros(INITIAL_CAPACITY, dtype=np.float32)
+        self.mtime_ns = np.zeros(INITIAL_CAPACITY, dtype=np.int64)
+        self.doc_count = 0
+        self.total_len = 0.0
+        self.title_postings: dict[str, dict[int, int]] = {}
+        # term -> (doc ids, term frequencies), built on first use per term
+        self._body_arrays: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._title_arrays: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        index.add_listener(self)
+
+    # ------------------------------------------------------------------
+    # Index listener
+    # ------------------------------------------------------------------
+
+    def note_added(self, doc_id: int, note: IndexedNote) -> None:
+        self._ensure_capacity(doc_id + 1)
+        length = sum(len(positions) for positions in note.terms.values())
+        self.doc_len[doc_id] = length
+        self.mtime_ns[doc_id] = note.mtime_ns
+        self.doc_count += 1
+        self.total_len += length
+
+        for term in note.terms:
+            self._body_arrays.pop(term, None)
+        for term, tf in Counter(tokenize(note.title)).items():
+            self.title_postings.setdefault(term, {})[doc_id] = tf
+            self._title_arrays.pop(term, None)
+
+    def note_removed(self, doc_id: int, note: IndexedNote) -> None:
+        self.doc_count -= 1
+        self.total_len -= float(self.doc_len[doc_id])
+        self.doc_len[doc_id] = 0
+        self.mtime_ns[doc_id] = 0
+
+        for term in note.terms:
+            self._body_arrays.pop(term, None)
+        for term in set(tokenize(note.title)):
+            postings = self.title_postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.title_postings[term]
+            self._title_arrays.pop(term, None)
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+
+    def score(self, query: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Score every note that contains at least one query term.
+
+        Returns:
+            (doc ids, scores) arrays for the matching notes, in doc id order
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or self.doc_count <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        scores = np.zeros(len(self.doc_len), dtype=np.float32)
+        avg_len = max(self.total_len / self.doc_count, 1.0)
+
+        for term in terms:
+            body = self._arrays(term, self.index.postings, self._body_arrays, len)
+            if body is not None:
+                ids, tf = body
+                norm = K1 * (1 - B + B * self.doc_len[ids] / avg_len)
+                scores[ids] += self._idf(len(ids)) * tf * (K1 + 1) / (tf + norm)
+
+            title = self._arrays(term, self.title_postings, self._title_arrays, int)
+            if title is not None:
+                ids, tf = title
+                scores[ids] += TITLE_BOOST * self._idf(len(ids)) * tf * (K1 + 1) / (tf + K1)
+
+        matched = np.flatnonzero(scores)
+        return matched, scores[matched]
+
+    def rank(
+        self,
+        query: str,
+        start_ns: Optional[int] = None,
+        end_ns: Optional[int] = None,
+        after: Optional[tuple[float, str]] = None,
+        limit: Optional[int] = None,
+    ) -> tuple[list[tuple[float, str]], int]:
+        """
+        Rank the notes matching a query, best first.
+
+        Args:
+            query: Free-text query
+            start_ns: Only include notes modified at or after this time
+            end_ns: Only include notes modified at or before this time
+            after: (score, file name) of the last result of the previous page
+            limit: Number of results to select; all matches if None
+
+        Returns:
+            A list of (score, file name) pairs ordered by score and then file
+            name (both descending), and the total number of matches ignoring
+            `after` and `limit`
+        """
+        ids, scores = self.score(query)
+
+        if start_ns is not None or end_ns is not None:
+            mtimes = self.mtime_ns[ids]
+            keep = np.ones(len(ids), dtype=bool)
+            if start_ns is not None:
+                keep &= mtimes >= start_ns
+            if end_ns is not None:
+                keep &= mtimes <= end_ns
+            ids, scores = ids[keep], scores[keep]
+        total = len(ids)
+
+        docs = self.index.docs
+        if after is not None:
+            after_score, after_name = after
+            keep = scores < after_score
+            # Ties with the cursor's score fall back to the file name
+            for i in np.flatnonzero(scores == after_score):
+                keep[i] = docs[int(ids[i])].file_name < after_name
+            ids, scores = ids[keep], scores[keep]
+
+        # Top-k: partition out everything at or above the k-th best score,
+        # then order just that slice (keeping ties so the order is total)
+        k = len(ids) if limit is None else min(limit, len(ids))
+        if 0 < k < len(ids):
+            threshold = np.partition(scores, len(ids) - k)[len(ids) - k]
+            keep = scores >= threshold
+            ids, scores = ids[keep], scores[keep]
+
+        ranked = sorted(
+            ((float(score), docs[int(doc_id)].file_name) for doc_id, score in zip(ids, scores)),
+            reverse=True,
+        )
+        return ranked[:k], total
+
+    def _idf(self, df: int) -> float:
+        return math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+
+    def _arrays(self, term, postings, cache, tf_of) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        arrays = cache.get(term)
+        if arrays is None:
+            term_postings = postings.get(term)
+            if not term_postings:
+                return None
+            count = len(term_postings)
+            ids = np.fromiter(term_postings.keys(), dtype=np.int64, count=count)
+            tf = np.fromiter((tf_of(v) for v in term_postings.values()), dtype=np.float32, count=count)
+            arrays = cache[term] = (ids, tf)
+        return arrays
+
+    def _ensure_capacity(self, size: int) -> None:
+        if size <= len(self.doc_len):
+            return
+        capacity = max(size, 2 * len(self.doc_len))
+        doc_len = np.zeros(capacity, dtype=np.float32)
+        doc_len[:len(self.doc_len)] = self.doc_len
+        mtime_ns = np.zeros(capacity, dtype=np.int64)
+        mtime_ns[:len(self.mtime_ns)] = self.mtime_ns
+        self.doc_len, self.mtime_ns = doc_len, mtime_ns
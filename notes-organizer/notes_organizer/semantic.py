@@ -0,0 +1,368 @@
+"""
+Local semantic search over notes.
+
+Notes are split into chunks at the `## ` section headings that `add_note`
+writes, and every chunk is embedded with a hashed feature projection (word
+unigrams, word bigrams and character trigrams hashed into a fixed number of
+signed buckets). No model download or network access is needed.
+
+Chunk vectors live in a memory-mapped float32 matrix next to the search
+index; queries are IDF-weighted on the fly and scored with blocked NumPy dot
+products. Only notes whose mtime or size changed since they were embedded
+are re-embedded.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+from .index import IndexedNote, TOKEN_RE
+
+logger = logging.getLogger(__name__)
+
+VECTORS_VERSION = 1
+MATRIX_FILE = "vectors.f32"
+META_FILE = "vectors.json"
+
+# Embedding width; 256 float32 buckets keep 100k notes x a few sections in a
+# few hundred MB of (memory-mapped) disk
+DIMENSIONS = 256
+
+# Sections longer than this are split further so one huge section does not
+# drown out its own best passage
+MAX_CHUNK_CHARS = 4000
+
+# Rows scored per matrix-vector product
+SCORE_BLOCK_ROWS = 65536
+
+SECTION_RE = re.compile(r"^## ", re.MULTILINE)
+
+
+def split_sections(content: str) -> list[tuple[str, str]]:
+    """
+    Split a note into (heading, text) chunks at its `## ` headings.
+
+    The text before the first `## ` heading (title and overview) becomes a
+    chunk headed by the note's H1 title, or "" if it has none.
+    """
+    chunks = []
+    starts = [match.start() for match in SECTION_RE.finditer(content)]
+    bounds = zip([0] + starts, starts + [len(content)])
+    for start, end in bounds:
+        section = content[start:end]
+        if not section.strip():
+            continue
+        first_line = section.split('\n', 1)[0]
+        heading = first_line.lstrip('#').strip() if first_line.startswith('#') else ""
+        for offset in range(0, len(section), MAX_CHUNK_CHARS):
+            chunks.append((heading, section[offset:offset + MAX_CHUNK_CHARS]))
+    return chunks
+
+
+def hashed_features(text: str) -> Counter:
+    """Count the word, word-bigram and character-trigram features of some text."""
+    words = TOKEN_RE.findall(text.lower())
+    features = Counter(words)
+    features.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    for word in set(words):
+        padded = f"<{word}>"
+        features.update(f"#{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return features
+
+
+def embed(text: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Embed text into a unit-length hashed feature vector.
+
+    Returns:
+        (vector, buckets) where buckets are the distinct bucket indices the
+        text touched (used for document frequency bookkeeping)
+    """
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    features = hashed_features(text)
+    if not features:
+        return vector, np.empty(0, dtype=np.int64)
+
+    hashes = np.fromiter(
+        (zlib.crc32(feature.encode('utf-8')) for feature in features),
+        dtype=np.uint32,
+        count=len(features),
+    )
+    weights = np.log1p(np.fromiter(features.values(), dtype=np.float32, count=len(features)))
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+    buckets = (hashes % DIMENSIONS).astype(np.int64)
+    np.add.at(vector, buckets, signs * weights)
+
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector, np.unique(buckets)
+
+
+def embed_note(content: str) -> list[tuple[str, np.ndarray, np.ndarray]]:
+    """Split a note into chunks and embed each one, as (heading, vector, buckets) triples."""
+    return [(heading, *embed(text)) for heading, text in split_sections(content)]
+
+
+class SemanticIndex:
+    """Memory-mapped matrix of note chunk embeddings plus its row bookkeeping."""
+
+    def __init__(self, vectors_dir: Path):
+        self.vectors_dir = vectors_dir
+        self.matrix: Optional[np.memmap] = None
+        self.capacity = 0
+        self.rows_used = 0
+        self.free_rows: list[int] = []
+        # file name -> (mtime_ns, size, title, [(row, heading), ...])
+        self.notes: dict[str, tuple[int, int, str, list[tuple[int, str]]]] = {}
+        self.row_owner: dict[int, tuple[str, str]] = {}
+        self.bucket_df = np.zeros(DIMENSIONS, dtype=np.float32)
+        self.chunk_count = 0
+        self.loaded = False
+        self.dirty = False
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def changes(self, indexed: Iterable[IndexedNote]) -> tuple[list[IndexedNote], list[str]]:
+        """
+        Compare the embedded notes with the search index.
+
+        Args:
+            indexed: The notes currently in the search index
+
+        Returns:
+            (stale, removed): the indexed notes that have to be (re-)embedded
+            and the file names of embedded notes that are no longer indexed
+        """
+        if not self.loaded:
+            self.load()
+        stale = []
+        seen = set()
+        for note in indexed:
+            seen.add(note.file_name)
+            if not self.is_current(note.file_name, note.mtime_ns, note.size):
+                stale.append(note)
+        return stale, [name for name in self.notes if name not in seen]
+
+    def is_current(self, file_name: str, mtime_ns: int, size: int) -> bool:
+        """Check whether a note's vectors were embedded from the given version of it."""
+        current = self.notes.get(file_name)
+        return current is not None and current[0] == mtime_ns and current[1] == size
+
+    def put(
+        self,
+        file_name: str,
+        mtime_ns: int,
+        size: int,
+        title: str,
+        chunks: list[tuple[str, np.ndarray, np.ndarray]],
+    ) -> None:
+        """Store a note's chunk embeddings (see `embed_note`), replacing any previous vectors."""
+        if not self.loaded:
+            self.load()
+        self.remove(file_name)
+        rows = []
+        for heading, vector, buckets in chunks:
+            row = self._allocate_row()
+            self.matrix[row] = vector
+            self.bucket_df[buckets] += 1
+            self.chunk_count += 1
+            rows.append((row, heading))
+            self.row_owner[row] = (file_name, heading)
+        self.notes[file_name] = (mtime_ns, size, title, rows)
+        self.dirty = True
+
+    def remove(self, file_name: str) -> None:
+        """Drop a note's vectors and release their rows."""
+        entry = self.notes.pop(file_name, None)
+        if entry is None:
+            return
+        for row, _ in entry[3]:
+            # The stored vector's non-zero buckets stand in for the buckets
+            # the chunk touched (exact unless signed features cancelled out)
+            buckets = np.flatnonzero(self.matrix[row])
+            self.bucket_df[buckets] = np.maximum(self.bucket_df[buckets] - 1, 0)
+            self.chunk_count -= 1
+            self.matrix[row] = 0
+            self.row_owner.pop(row, None)
+            self.free_rows.append(row)
+        self.dirty = True
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """
+        Find the notes most similar to a query.
+
+        Returns:
+            Up to `limit` results (best first), one per note, each with the
+            note's file name and title, the best matching section and the
+            cosine similarity of that section
+        """
+        if not self.loaded:
+            self.load()
+        if self.rows_used == 0:
+            return []
+
+        features = hashed_features(query)
+        if not features:
+            return []
+        query_vector = self._weighted_query(features)
+        if not query_vector.any():
+            return []
+
+        scores = np.empty(self.rows_used, dtype=np.float32)
+        for start in range(0, self.rows_used, SCORE_BLOCK_ROWS):
+            end = min(start + SCORE_BLOCK_ROWS, self.rows_used)
+            scores[start:end] = self.matrix[start:end] @ query_vector
+
+        # Look at the best rows first, widening until enough distinct notes
+        # are found (several sections of one note may rank highly)
+        candidates = min(len(scores), max(limit * 8, 64))
+        while True:
+            if candidates < len(scores):
+                top = np.argpartition(-scores, candidates - 1)[:candidates]
+                top = top[np.argsort(-scores[top])]
+            else:
+                top = np.argsort(-scores)
+
+            results = []
+            seen = set()
+            for row in top:
+                score = float(scores[row])
+                if score <= 0:
+                    break
+                owner = self.row_owner.get(int(row))
+                if owner is None or owner[0] in seen:
+                    continue
+                file_name, heading = owner
+                seen.add(file_name)
+                results.append({
+                    "file_name": file_name,
+                    "title": self.notes[file_name][2],
+                    "section": heading,
+                    "score": round(score, 4)
+                })
+                if len(results) == limit:
+                    return results
+
+            if candidates >= len(scores) or float(scores[top[-1]]) <= 0:
+                return results
+            candidates = min(len(scores), candidates * 4)
+
+    def _weighted_query(self, features: Counter) -> np.ndarray:
+        # Apply IDF on the query side so stored vectors never need
+        # re-weighting as the corpus changes
+        vector = np.zeros(DIMENSIONS, dtype=np.float32)
+        for feature, count in features.items():
+            h = zlib.crc32(feature.encode('utf-8'))
+            sign = -1.0 if h & 0x80000000 else 1.0
+            vector[h % DIMENSIONS] += sign * math.log1p(count)
+        idf = np.log((self.chunk_count + 1) / (self.bucket_df + 1)) + 1
+        vector *= idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def load(self) -> None:
+        """Open the vector matrix and its metadata, if they exist."""
+        self.loaded = True
+        try:
+            with open(self.vectors_dir / META_FILE, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get("version") != VECTORS_VERSION or meta.get("dimensions") != DIMENSIONS:
+                return
+            matrix_size = (self.vectors_dir / MATRIX_FILE).stat().st_size
+            if matrix_size < meta["capacity"] * DIMENSIONS * 4:
+                raise ValueError("vector matrix is smaller than its metadata says")
+            self._open_matrix(meta["capacity"])
+            self.rows_used = meta["rows_used"]
+            self.free_rows = meta["free_rows"]
+            self.chunk_count = meta["chunk_count"]
+            self.bucket_df = np.asarray(meta["bucket_df"], dtype=np.float32)
+            for file_name, (mtime_ns, size, title, rows) in meta["notes"].items():
+                rows = [(row, heading) for row, heading in rows]
+                self.notes[file_name] = (mtime_ns, size, title, rows)
+                for row, heading in rows:
+                    self.row_owner[row] = (file_name, heading)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable semantic index in {self.vectors_dir}: {e}")
+            self._reset()
+
+    def flush(self) -> None:
+        """Flush the matrix and write its metadata."""
+        if not self.dirty or self.matrix is None:
+            return
+        meta = {
+            "version": VECTORS_VERSION,
+            "dimensions": DIMENSIONS,
+            "capacity": self.capacity,
+            "rows_used": self.rows_used,
+            "free_rows": self.free_rows,
+            "chunk_count": self.chunk_count,
+            "bucket_df": self.bucket_df.tolist(),
+            "notes": {
+                file_name: [mtime_ns, size, title, rows]
+                for file_name, (mtime_ns, size, title, rows) in self.notes.items()
+            },
+        }
+        try:
+            self.matrix.flush()
+            tmp_path = self.vectors_dir / (META_FILE + ".tmp")
+            payload = json.dumps(meta, separators=(',', ':'))
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, self.vectors_dir / META_FILE)
+            self.dirty = False
+        except OSError as e:
+            logger.warning(f"Failed to persist semantic index: {e}")
+
+    def _allocate_row(self) -> int:
+        if self.free_rows:
+            return self.free_rows.pop()
+        if self.rows_used >= self.capacity:
+            self._open_matrix(max(1024, self.capacity * 2))
+        row = self.rows_used
+        self.rows_used += 1
+        return row
+
+    def _open_matrix(self, capacity: int) -> None:
+        """Map the matrix file with room for `capacity` rows, growing it if needed."""
+        self.vectors_dir.mkdir(parents=True, exist_ok=True)
+        path = self.vectors_dir / MATRIX_FILE
+        if self.matrix is not None:
+            self.matrix.flush()
+            self.matrix = None
+        with open(path, 'ab') as f:
+            size = capacity * DIMENSIONS * 4
+            if f.tell() < size:
+                f.truncate(size)
+        self.matrix = np.memmap(path, dtype=np.float32, mode='r+', shape=(capacity, DIMENSIONS))
+        self.capacity = capacity
+
+    def _reset(self) -> None:
+        self.notes.clear()
+        self.row_owner.clear()
+        self.free_rows = []
+        self.rows_used = 0
+        self.chunk_count = 0
+        self.bucket_df = np.zeros(DIMENSIONS, dtype=np.float32)
+        if self.matrix is not None:
+            self.matrix[:] = 0
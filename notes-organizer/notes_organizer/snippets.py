@@ -0,0 +1,146 @@
+"""
+Match-context snippets for search results.
+
+The part of a note to show is chosen from the positional index alone: the
+window of `SNIPPET_TOKENS` consecutive words holding the most distinct
+matched words (then the most matches). The note is then read only up to the
+end of that window to turn word positions into text and byte offsets, so a
+match near the top of a large note costs a few KB of reading.
+"""
+
+import codecs
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from .compression import open_note
+from .index import TOKEN_RE
+
+# Words shown in a snippet
+SNIPPET_TOKENS = 30
+
+# Bytes read at a time while looking for the snippet's words
+READ_CHUNK_SIZE = 16 * 1024
+
+
+def best_window(positions: dict[str, list[int]], size: int = SNIPPET_TOKENS) -> Optional[tuple[int, int, list[int]]]:
+    """
+    Pick the word range of a note to show for a search hit.
+
+    Args:
+        positions: Matched word -> its positions in the note
+        size: Number of words in the range
+
+    Returns:
+        (first, last, hits): the first and last word position of the range
+        and the sorted positions of the matched words inside it, or None if
+        no word matched
+    """
+    events = sorted((position, term) for term, term_positions in positions.items() for position in term_positions)
+    if not events:
+        return None
+
+    best_start, best_end, best_score = 0, 1, (0, 0)
+    counts: dict[str, int] = {}
+    lo = 0
+    for hi, (position, term) in enumerate(events):
+        counts[term] = counts.get(term, 0) + 1
+        while events[lo][0] <= position - size:
+            old = events[lo][1]
+            counts[old] -= 1
+            if not counts[old]:
+                del counts[old]
+            lo += 1
+        score = (len(counts), hi - lo + 1)
+        if score > best_score:
+            best_start, best_end, best_score = lo, hi + 1, score
+
+    # Center the matches in the window
+    first_hit, last_hit = events[best_start][0], events[best_end - 1][0]
+    first = max(0, first_hit - (size - (last_hit - first_hit + 1)) // 2)
+    last = first + size - 1
+    hits = [position for position, _ in events if first <= position <= last]
+    return first, last, hits
+
+
+def read_snippet(file_path: Path, first: int, last: int, hits: list[int]) -> Optional[dict]:
+    """
+    Read the text of a word range of a note.
+
+    The note is decoded incrementally and reading stops at word `last`.
+    Offsets are UTF-8 byte offsets into the note, as taken by `get_note`.
+
+    Args:
+        file_path: The note to read
+        first: Position of the first word to include
+        last: Position of the last word to include
+        hits: Positions of the words to highlight
+
+    Returns:
+        {"text", "offset", "length", "highlights"}, where highlights holds an
+        [offset, length] pair per matched word, or None if the note has fewer
+        than `first` + 1 words (e.g. it changed since it was indexed)
+
+    Raises:
+        OSError: If the note cannot be read
+    """
+    with open_note(file_path) as f:
+        return snippet_from(f, first, last, hits)
+
+
+def snippet_from(f: BinaryIO, first: int, last: int, hits: list[int]) -> Optional[dict]:
+    """Like `read_snippet`, reading from a binary stream positioned at its start."""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='surrogateescape')
+    spans: dict[int, tuple[int, int]] = {}
+    position = 0
+    # Text not yet tokenized, and the byte offset where it starts
+    buffer = ""
+    buffer_offset = 0
+    # Bytes read so far, from byte raw_offset on (the stream may not be seekable)
+    raw = bytearray()
+    raw_offset = 0
+
+    while position <= last:
+        chunk = f.read(READ_CHUNK_SIZE)
+        at_end = not chunk
+        raw += chunk
+        buffer += decoder.decode(chunk, final=at_end)
+        # Byte offset of buffer[cursor]
+        cursor, cursor_offset = 0, buffer_offset
+        consumed = len(buffer)
+        for match in TOKEN_RE.finditer(buffer):
+            if match.end() == len(buffer) and not at_end:
+                # The word may continue in the next chunk
+                consumed = match.start()
+                break
+            if position >= first:
+                start = cursor_offset + _byte_length(buffer[cursor:match.start()])
+                length = _byte_length(match.group())
+                spans[position] = (start, length)
+                cursor, cursor_offset = match.end(), start + length
+            position += 1
+            if position > last:
+                break
+        buffer_offset = cursor_offset + _byte_length(buffer[cursor:consumed])
+        buffer = buffer[consumed:]
+        keep_from = spans[first][0] if first in spans else buffer_offset
+        del raw[:keep_from - raw_offset]
+        raw_offset = keep_from
+        if at_end:
+            break
+
+    if first not in spans:
+        return None
+    start = spans[first][0]
+    end = sum(spans[max(spans)])
+    text = raw[start - raw_offset:end - raw_offset].decode('utf-8', errors='replace')
+
+    return {
+        "text": text,
+        "offset": start,
+        "length": end - start,
+        "highlights": [list(spans[p]) for p in hits if p in spans],
+    }
+
+
+def _byte_length(text: str) -> int:
+    return len(text.encode('utf-8', errors='surrogateescape'))
@@ -0,0 +1,405 @@
+"""
+In-process view of the notes folder.
+
+`NoteStore` ties together the search index, the metadata cache and the
+current listing of notes, and keeps them consistent whether a change comes
+from a full rescan, the filesystem watcher or a note written by this process.
+"""
+
+import os
+import tempfile
+import threading
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Optional, Union
+
+from .cache import MetadataCache
+from .compression import Compressor
+from .fuzzy import FuzzyMatcher
+from .index import IndexedNote, NoteIndex, index_terms, list_notes, read_note_text
+from .indexer import build_index
+from .markdown import extract_metadata, read_metadata
+from .query import QueryEngine
+from .ranking import BM25Ranker
+from .semantic import SemanticIndex, embed_note
+from .timeline import Timeline
+from .watcher import NotesWatcher
+
+
+class NoteStore:
+    """Search index, ranker, query engine, fuzzy matcher, metadata cache, modification-time order and (file name -> stat) listing of the notes folder."""
+
+    def __init__(self, notes_dir: Path, index_dir: Path):
+        self.notes_dir = notes_dir
+        self.index = NoteIndex(notes_dir, index_dir)
+        self.ranker = BM25Ranker(self.index)
+        self.queries = QueryEngine(self.index)
+        self.fuzzy = FuzzyMatcher(self.index)
+        self.semantic = SemanticIndex(index_dir / "vectors")
+        self.metadata = MetadataCache(index_dir / "metadata.json")
+        self.stats: dict[str, os.stat_result] = {}
+        self.timeline = Timeline()
+        self.lock = threading.RLock()
+        self.watcher: Optional[NotesWatcher] = None
+        # Set to store new notes compressed
+        self.compressor: Optional[Compressor] = None
+
+    @property
+    def watching(self) -> bool:
+        """True while a watcher keeps the in-memory state current."""
+        return self.watcher is not None and self.watcher.running
+
+    def refresh(self, listing: Optional[list[tuple[str, os.stat_result]]] = None) -> None:
+        """
+        Rescan the notes folder and bring the index and metadata cache up to date.
+
+        The changed notes are found under the store lock but read and
+        tokenized without it, so point operations are not kept waiting.
+
+        Args:
+            listing: (file name, stat) pairs for every note, if the caller
+                already scanned the folder
+        """
+        if listing is None:
+            listing = list_notes(self.notes_dir)
+        with self.lock:
+            if not self.index.loaded:
+                self.index.load()
+            stale = [
+                (file_name, stat) for file_name, stat in listing
+                if not self.index.is_current(file_name, stat.st_mtime_ns, stat.st_size)
+            ]
+            listed = {file_name for file_name, _ in listing}
+            removed = [file_name for file_name in self.index.ids if file_name not in listed]
+            versions = {file_name: self._indexed_version(file_name) for file_name in removed}
+            versions.update((file_name, self._indexed_version(file_name)) for file_name, _ in stale)
+
+        read = []
+        for file_name, stat in stale:
+            text = read_note_text(self.notes_dir / file_name)
+            if text is None:
+                continue
+            extracted = extract_metadata(text)
+            terms = index_terms(text)
+            read.append((IndexedNote(file_name, stat.st_mtime_ns, stat.st_size, terms, extracted["title"]), stat, extracted))
+
+        with self.lock:
+            changed = False
+            # Leave notes alone that another writer re-indexed while they were read
+            for note, stat, extracted in read:
+                if self._indexed_version(note.file_name) == versions[note.file_name]:
+                    self.index.add(note)
+                    self.remember_metadata(note.file_name, stat, extracted)
+                    changed = True
+            for file_name in removed:
+                if self._indexed_version(file_name) == versions[file_name]:
+                    changed = self.index.remove(file_name) or changed
+            if changed:
+                self.index.flush()
+            self.stats = dict(listing)
+            self.timeline.rebuild(listing)
+            self.metadata.retain(self.stats.keys())
+
+    def listing(self) -> list[tuple[str, os.stat_result]]:
+        """
+        Return the (file name, stat) pairs of every note.
+
+        While the watcher is running this is served from memory; otherwise
+        the folder is rescanned first.
+        """
+        if not self.watching:
+            self.refresh()
+        with self.lock:
+            return list(self.stats.items())
+
+    def get_metadata(self, file_name: str, stat: os.stat_result) -> dict:
+        """
+        Return a note's metadata, reading the head of the note only on a cache miss.
+
+        Raises:
+            OSError, UnicodeDecodeError: If the note has to be read and cannot be
+        """
+        with self.lock:
+            metadata = self.metadata.get(file_name, stat)
+        if metadata is not None:
+            return metadata
+
+        extracted = read_metadata(self.notes_dir / file_name)
+        with self.lock:
+            return self.remember_metadata(file_name, stat, extracted)
+
+    def match_positions(self, file_name: str, terms: list[str]) -> dict[str, list[int]]:
+        """Return the positions of each of the given words in an indexed note."""
+        with self.lock:
+            doc_id = self.index.ids.get(file_name)
+            if doc_id is None:
+                return {}
+            positions = {}
+            for term in terms:
+                term_positions = self.index.postings.get(term, {}).get(doc_id)
+                if term_positions:
+                    positions[term] = term_positions
+            return positions
+
+    def note_changed(self, file_name: str, content: Optional[str] = None) -> None:
+        """
+        Record that a note was created or modified.
+
+        Args:
+            file_name: The note's file name
+            content: The note's content, if the caller already has it; saves
+                re-reading a note this process just wrote
+        """
+        file_path = self.notes_dir / file_name
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            self.note_deleted(file_name)
+            return
+
+        with self.lock:
+            self.stats[file_name] = stat
+            self.timeline.update(file_name, stat.st_mtime_ns)
+            # Missing metadata is read lazily by get_metadata
+            if self.index.is_current(file_name, stat.st_mtime_ns, stat.st_size):
+                return
+
+        if content is None:
+            content = read_note_text(file_path)
+            if content is None:
+                return
+
+        with self.lock:
+            metadata = self._cache_metadata(file_name, stat, content)
+            self.index.put(file_name, stat.st_mtime_ns, stat.st_size, content, title=metadata["title"])
+
+    def create_note(self, base_name: str, content: str) -> str:
+        """
+        Write a new note under a name no other note has, and index it.
+
+        The name comes from the index's suffix counters, so no directory
+        probing is needed. The name is claimed with an exclusive create, which
+        never replaces an existing file; if the index did not know about that
+        file, the next name is tried. The content is written to a temporary
+        file first and renamed over the claimed name, so the note never appears
+        half-written.
+
+        Args:
+            base_name: Sanitized file name without the .md extension
+            content: The full note content
+
+        Returns:
+            The new note's file name
+
+        Raises:
+            OSError: If the note cannot be written
+        """
+        with self.lock:
+            file_name = self.index.allocate_name(base_name)
+        file_name = self._write_new_note(base_name, file_name, content)
+        # Make the note searchable right away instead of waiting for the watcher
+        self._notes_written([(file_name, content)])
+        return file_name
+
+    def create_notes(
+        self,
+        notes: list[tuple[str, str]],
+        executor: Optional[Executor] = None,
+    ) -> list[Union[str, OSError]]:
+        """
+        Write a batch of new notes, then index them together.
+
+        Names for the whole batch are allocated in one pass, the files are
+        written (in parallel when an executor is given) the same way as
+        `create_note`, and the index, metadata cache and listing are updated
+        and persisted once for the batch.
+
+        Args:
+            notes: (sanitized base name, full content) pairs
+            executor: Optional executor to write the files with
+
+        Returns:
+            For each note, in order, its new file name or the error that
+            prevented writing it
+        """
+        with self.lock:
+            names = [self.index.allocate_name(base_name) for base_name, _ in notes]
+
+        def write(i: int) -> Union[str, OSError]:
+            base_name, content = notes[i]
+            try:
+                return self._write_new_note(base_name, names[i], content)
+            except OSError as e:
+                return e
+
+        if executor is None:
+            results = [write(i) for i in range(len(notes))]
+        else:
+            results = list(executor.map(write, range(len(notes))))
+
+        self._notes_written([
+            (result, content)
+            for result, (_, content) in zip(results, notes)
+            if isinstance(result, str)
+        ])
+        self.flush()
+        return results
+
+    def note_deleted(self, file_name: str) -> None:
+        """Record that a note was deleted."""
+        with self.lock:
+            self.stats.pop(file_name, None)
+            self.timeline.discard(file_name)
+            self.index.remove(file_name)
+            self.metadata.discard(file_name)
+
+    def semantic_search(self, query: str, limit: int) -> list[dict]:
+        """
+        Find the notes most similar in meaning to a query.
+
+        Notes that changed since they were last embedded are re-embedded
+        first; they are read and embedded without holding the store lock.
+        """
+        with self.lock:
+            stale, removed = self.semantic.changes(self.index.docs.values())
+
+        embedded = []
+        for note in stale:
+            content = read_note_text(self.notes_dir / note.file_name)
+            if content is not None:
+                embedded.append((note, embed_note(content)))
+
+        with self.lock:
+            changed = False
+            # Skip notes that changed again, or that a concurrent search
+            # already embedded, while they were being read
+            for note, chunks in embedded:
+                if (self.index.is_current(note.file_name, note.mtime_ns, note.size)
+                        and not self.semantic.is_current(note.file_name, note.mtime_ns, note.size)):
+                    self.semantic.put(note.file_name, note.mtime_ns, note.size, note.title, chunks)
+                    changed = True
+            for file_name in removed:
+                if file_name not in self.index.ids:
+                    self.semantic.remove(file_name)
+                    changed = True
+            if changed:
+                self.semantic.flush()
+            return self.semantic.search(query, limit)
+
+    def flush(self) -> None:
+        """Persist pending index, metadata cache and embedding changes."""
+        with self.lock:
+            self.index.flush()
+            self.metadata.flush()
+            self.semantic.flush()
+
+    def start_watching(self, poll_interval: float = 2.0, workers: Optional[int] = None) -> str:
+        """
+        Start the filesystem watcher and do the initial scan.
+
+        Args:
+            poll_interval: Seconds between checks when polling
+            workers: Worker processes for the initial scan (see `build_index`)
+
+        Returns:
+            The watcher backend in use, "inotify" or "polling"
+        """
+        self.watcher = NotesWatcher(
+            self.notes_dir,
+            on_change=self.note_changed,
+            on_delete=self.note_deleted,
+            on_rescan=self.refresh,
+            on_idle=self.flush,
+            poll_interval=poll_interval,
+        )
+        backend = self.watcher.start()
+        # Scan after the watcher is up so no change slips in between the two
+        build_index(self, workers=workers)
+        return backend
+
+    def stop_watching(self) -> None:
+        """Stop the filesystem watcher and persist any pending changes."""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        self.flush()
+
+    def remember_metadata(
+        self,
+        file_name: str,
+        stat: os.stat_result,
+        extracted: dict,
+    ) -> dict:
+        """
+        Cache metadata that was already extracted from a note.
+
+        Args:
+            file_name: The note's file name
+            stat: The note's stat result when it was read
+            extracted: The note's title and overview (see `extract_metadata`)
+
+        Returns:
+            The cached metadata
+        """
+        metadata = {
+            **extracted,
+            "mtime": stat.st_mtime,
+            "size": stat.st_size
+        }
+        self.metadata.put(file_name, stat, metadata)
+        return metadata
+
+    def _indexed_version(self, file_name: str) -> Optional[tuple[int, int]]:
+        doc_id = self.index.ids.get(file_name)
+        if doc_id is None:
+            return None
+        note = self.index.docs[doc_id]
+        return note.mtime_ns, note.size
+
+    def _cache_metadata(self, file_name: str, stat: os.stat_result, content: str) -> dict:
+        return self.remember_metadata(file_name, stat, extract_metadata(content))
+
+    def _write_new_note(self, base_name: str, file_name: str, content: str) -> str:
+        # Claim the name; if a file the index did not know about has it, move on
+        while True:
+            file_path = self.notes_dir / file_name
+            try:
+                os.close(os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666))
+                break
+            except FileExistsError:
+                with self.lock:
+                    file_name = self.index.allocate_name(base_name)
+
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.notes_dir, prefix=f".{base_name[:32]}.", suffix=".tmp")
+            data = self.compressor.compress(content) if self.compressor is not None else content.encode('utf-8')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            # mkstemp creates the file private; give it the claimed file's mode
+            os.chmod(tmp_path, file_path.stat().st_mode & 0o777)
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            for path in (tmp_path, file_path):
+                if path is not None:
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+            raise
+        return file_name
+
+    def _notes_written(self, notes: list[tuple[str, str]]) -> None:
+        stats = []
+        for file_name, content in notes:
+            try:
+                stats.append((file_name, (self.notes_dir / file_name).stat(), content))
+            except FileNotFoundError:
+                continue
+
+        with self.lock:
+            for file_name, stat, content in stats:
+                self.stats[file_name] = stat
+                self.timeline.update(file_name, stat.st_mtime_ns)
+                metadata = self._cache_metadata(file_name, stat, content)
+                self.index.put(file_name, stat.st_mtime_ns, stat.st_size, content, title=metadata["title"])
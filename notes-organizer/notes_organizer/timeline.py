@@ -0,0 +1,80 @@
+"""
+Modification-time ordering of the notes folder.
+
+`Timeline` keeps every note's (mtime_ns, file name) key in one sorted list so
+date ranges and "newest first" pages are found with a binary search instead
+of checking each note's stat.
+"""
+
+import bisect
+import os
+from typing import Iterator, Optional
+
+
+class Timeline:
+    """Sorted (mtime_ns, file name) keys of every note."""
+
+    def __init__(self):
+        self.keys: list[tuple[int, str]] = []
+        self.mtimes: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def rebuild(self, listing: list[tuple[str, os.stat_result]]) -> None:
+        """Replace the contents with a fresh (file name, stat) listing."""
+        self.mtimes = {file_name: stat.st_mtime_ns for file_name, stat in listing}
+        self.keys = sorted((mtime_ns, file_name) for file_name, mtime_ns in self.mtimes.items())
+
+    def update(self, file_name: str, mtime_ns: int) -> None:
+        """Insert a note or move it to its new modification time."""
+        if self.mtimes.get(file_name) == mtime_ns:
+            return
+        self.discard(file_name)
+        self.mtimes[file_name] = mtime_ns
+        bisect.insort(self.keys, (mtime_ns, file_name))
+
+    def discard(self, file_name: str) -> None:
+        """Remove a note if present."""
+        mtime_ns = self.mtimes.pop(file_name, None)
+        if mtime_ns is None:
+            return
+        i = bisect.bisect_left(self.keys, (mtime_ns, file_name))
+        if i < len(self.keys) and self.keys[i] == (mtime_ns, file_name):
+            del self.keys[i]
+
+    def bounds(self, start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> tuple[int, int]:
+        """
+        Locate the notes modified within a time range.
+
+        Args:
+            start_ns: Inclusive lower bound, or None for no bound
+            end_ns: Inclusive upper bound, or None for no bound
+
+        Returns:
+            (lo, hi) such that `keys[lo:hi]` are exactly the notes in range
+        """
+        lo = 0 if start_ns is None else bisect.bisect_left(self.keys, (start_ns,))
+        hi = len(self.keys) if end_ns is None else bisect.bisect_left(self.keys, (end_ns + 1,))
+        return lo, max(lo, hi)
+
+    def newest(
+        self,
+        start_ns: Optional[int] = None,
+        end_ns: Optional[int] = None,
+        before: Optional[tuple] = None,
+    ) -> Iterator[tuple[int, str]]:
+        """
+        Iterate the keys of a time range, newest first.
+
+        Args:
+            start_ns: Inclusive lower bound, or None for no bound
+            end_ns: Inclusive upper bound, or None for no bound
+            before: Only yield keys strictly below this (mtime_ns, file name) key
+        """
+        lo, hi = self.bounds(start_ns, end_ns)
+        if before is not None:
+            hi = max(lo, min(hi, bisect.bisect_left(self.keys, tuple(before))))
+        keys = self.keys
+        for i in range(hi - 1, lo - 1, -1):
+            yield keys[i]
@@ -0,0 +1,251 @@
+"""
+Change detection for the notes folder.
+
+`NotesWatcher` runs a background thread that reports added, modified and
+deleted notes. On Linux it uses inotify (through ctypes, so no extra
+dependency is needed); everywhere else, or if inotify is unavailable, it
+falls back to periodically comparing directory listings.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+from .index import list_notes
+
+logger = logging.getLogger(__name__)
+
+# inotify event masks (see <sys/inotify.h>)
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+
+WATCH_MASK = (
+    IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+CHANGE_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO
+DELETE_MASK = IN_DELETE | IN_MOVED_FROM
+RESCAN_MASK = IN_Q_OVERFLOW | IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED
+
+EVENT_HEADER = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+
+
+def _load_libc() -> Optional[ctypes.CDLL]:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class NotesWatcher:
+    """
+    Background watcher that reports changes to the notes folder.
+
+    Callbacks are invoked from the watcher thread:
+        on_change(file_name): a note was created or modified
+        on_delete(file_name): a note was deleted or moved away
+        on_rescan(): events may have been lost; the folder should be rescanned
+        on_idle(): no events arrived for a while; a good time to persist state
+    """
+
+    def __init__(
+        self,
+        notes_dir: Path,
+        on_change: Callable[[str], None],
+        on_delete: Callable[[str], None],
+        on_rescan: Callable[[], None],
+        on_idle: Optional[Callable[[], None]] = None,
+        poll_interval: float = 2.0,
+    ):
+        self.notes_dir = notes_dir
+        self.on_change = on_change
+        self.on_delete = on_delete
+        self.on_rescan = on_rescan
+        self.on_idle = on_idle
+        self.poll_interval = poll_interval
+        self.backend: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify_fd: Optional[int] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> str:
+        """
+        Start watching in a daemon thread.
+
+        Returns:
+            The backend in use, "inotify" or "polling"
+        """
+        if self.running:
+            return self.backend
+
+        self._stop.clear()
+        self._inotify_fd = self._open_inotify()
+        if self._inotify_fd is not None:
+            self.backend = "inotify"
+            target, args = self._run_inotify, ()
+        else:
+            self.backend = "polling"
+            # Take the first listing before returning, so every later change is seen
+            target, args = self._run_polling, (self._snapshot(),)
+
+        self._thread = threading.Thread(target=target, args=args, name="notes-watcher", daemon=True)
+        self._thread.start()
+        return self.backend
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the watcher thread and release the inotify descriptor."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._inotify_fd is not None:
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+
+    def _dispatch(self, callback: Callable, *args) -> None:
+        try:
+            callback(*args)
+        except Exception:
+            logger.exception("Notes watcher callback failed")
+
+    # ------------------------------------------------------------------
+    # inotify backend
+    # ------------------------------------------------------------------
+
+    def _open_inotify(self) -> Optional[int]:
+        libc = _load_libc()
+        if libc is None:
+            return None
+
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            logger.warning(f"inotify_init1 failed: {os.strerror(ctypes.get_errno())}")
+            return None
+
+        wd = libc.inotify_add_watch(fd, os.fsencode(self.notes_dir), WATCH_MASK)
+        if wd < 0:
+            logger.warning(
+                f"Cannot watch {self.notes_dir} with inotify "
+                f"({os.strerror(ctypes.get_errno())}); falling back to polling"
+            )
+            os.close(fd)
+            return None
+        return fd
+
+    def _run_inotify(self) -> None:
+        fd = self._inotify_fd
+        while not self._stop.is_set():
+            readable, _, _ = select.select([fd], [], [], self.poll_interval)
+            if not readable:
+                if self.on_idle is not None:
+                    self._dispatch(self.on_idle)
+                continue
+
+            try:
+                data = os.read(fd, READ_SIZE)
+            except BlockingIOError:
+                continue
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                logger.error(f"Reading inotify events failed: {e}; switching to polling")
+                self._run_polling()
+                return
+
+            if self._handle_events(data):
+                logger.warning(f"Lost track of {self.notes_dir}; switching to polling")
+                self._dispatch(self.on_rescan)
+                self._run_polling()
+                return
+
+    def _handle_events(self, data: bytes) -> bool:
+        """
+        Dispatch a buffer of inotify events.
+
+        Returns:
+            True if the watch itself went away and polling should take over
+        """
+        # Coalesce the batch so a burst of writes to one note is handled once
+        changes: dict[str, bool] = {}
+        rescan = False
+        watch_lost = False
+
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, mask, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b"\0").decode("utf-8", "surrogateescape")
+            offset += name_len
+
+            if mask & RESCAN_MASK:
+                rescan = True
+                watch_lost = watch_lost or bool(mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED))
+                continue
+            if not name.endswith('.md'):
+                continue
+            if mask & DELETE_MASK:
+                changes[name] = False
+            elif mask & CHANGE_MASK:
+                changes[name] = True
+
+        if watch_lost:
+            return True
+        if rescan:
+            self._dispatch(self.on_rescan)
+            return False
+
+        for name, exists in changes.items():
+            self._dispatch(self.on_change if exists else self.on_delete, name)
+        return False
+
+    # ------------------------------------------------------------------
+    # Polling backend
+    # ------------------------------------------------------------------
+
+    def _snapshot(self) -> dict[str, tuple[int, int]]:
+        return {
+            file_name: (stat.st_mtime_ns, stat.st_size)
+            for file_name, stat in list_notes(self.notes_dir)
+        }
+
+    def _run_polling(self, previous: Optional[dict[str, tuple[int, int]]] = None) -> None:
+        if previous is None:
+            previous = self._snapshot()
+        while not self._stop.wait(self.poll_interval):
+            current = self._snapshot()
+            for file_name, signature in current.items():
+                if previous.get(file_name) != signature:
+                    self._dispatch(self.on_change, file_name)
+            for file_name in previous.keys() - current.keys():
+                self._dispatch(self.on_delete, file_name)
+            previous = current
+            if self.on_idle is not None:
+                self._dispatch(self.on_idle)
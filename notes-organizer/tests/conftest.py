@@ -0,0 +1,35 @@
+"""Shared fixtures: every test works on its own temporary notes folder."""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def notes_dir(tmp_path: Path) -> Path:
+    path = tmp_path / "notes"
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def index_dir(notes_dir: Path) -> Path:
+    return notes_dir / ".index"
+
+
+@pytest.fixture
+def write_note(notes_dir: Path):
+    """Write a note file, optionally with a given modification time (seconds since the epoch)."""
+
+    def write(file_name: str, text: str, mtime: float = None) -> Path:
+        path = notes_dir / file_name
+        path.write_text(text, encoding='utf-8')
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    return write
@@ -0,0 +1,157 @@
+"""add_notes and the import command: per-item validation, partial success and round trips."""
+
+import asyncio
+
+import pytest
+
+from notes_organizer import main
+
+
+@pytest.fixture
+def notes(notes_dir, monkeypatch):
+    """Serve an empty temporary notes folder."""
+    # Restored after the test, like use_notes_dir changes them
+    for name in ("database", "NOTES_DIR", "INDEX_DIR", "store"):
+        monkeypatch.setattr(main, name, getattr(main, name))
+    main.database = None
+    main.use_notes_dir(notes_dir)
+    yield notes_dir
+    main.store.flush()
+
+
+def add_notes(notes: list) -> dict:
+    return asyncio.run(main.add_notes(notes))
+
+
+def note_files(notes_dir) -> list[str]:
+    return sorted(path.name for path in notes_dir.glob("*.md"))
+
+
+def test_rejects_empty_and_oversized_batches(notes, monkeypatch):
+    response = add_notes([])
+    assert not response["success"] and response["error"] == "Validation Error"
+
+    monkeypatch.setattr(main, "MAX_BATCH_NOTES", 2)
+    response = add_notes([{"title": f"T{i}", "content": "x"} for i in range(3)])
+    assert not response["success"] and "maximum of 2" in response["message"]
+    assert note_files(notes) == []
+
+
+@pytest.mark.parametrize("note, message", [
+    ("not an object", "must be an object"),
+    ({"title": "T", "content": 42}, "must be strings"),
+    ({"content": "body"}, "Title is required"),
+    ({"title": "   ", "content": "body"}, "Title is required"),
+    ({"title": "x" * 101, "content": "body"}, "Title exceeds"),
+    ({"title": "T"}, "Content is required"),
+    ({"title": "T", "content": "\n\n"}, "Content is required"),
+    ({"title": "T", "content": "x" * (1024 * 1024 + 1)}, "Content exceeds"),
+    ({"title": "T", "content": "body", "overview": "x" * 256}, "Overview exceeds"),
+])
+def test_invalid_note_is_reported_and_skipped(notes, note, message):
+    response = add_notes([{"title": "Before", "content": "first"}, note, {"title": "After", "content": "last"}])
+
+    assert response["success"]
+    assert (response["created"], response["failed"]) == (2, 1)
+    results = response["results"]
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert results[1]["success"] is False
+    assert results[1]["error"] == "Validation Error"
+    assert message in results[1]["message"]
+    assert [results[0]["file_name"], results[2]["file_name"]] == ["Before.md", "After.md"]
+    assert note_files(notes) == ["After.md", "Before.md"]
+
+
+def test_failed_writes_are_reported_per_note(notes, monkeypatch):
+    real_create_notes = main.store.create_notes
+
+    def create_notes(items, pool):
+        written = real_create_notes(items, pool)
+        # The second valid note fails to write
+        written[1] = OSError("disk full")
+        return written
+
+    monkeypatch.setattr(main.store, "create_notes", create_notes)
+    response = add_notes([
+        {"title": "One", "content": "a"},
+        {"title": "", "content": "b"},
+        {"title": "Two", "content": "c"},
+    ])
+
+    assert (response["created"], response["failed"]) == (1, 2)
+    assert response["results"][1]["error"] == "Validation Error"
+    assert response["results"][2]["error"] == "File System Error"
+    assert "disk full" in response["results"][2]["message"]
+
+
+def test_batch_with_repeated_titles_gets_unique_names(notes):
+    response = add_notes([{"title": "Same", "content": f"copy {i}"} for i in range(3)])
+
+    assert response["created"] == 3
+    assert [result["file_name"] for result in response["results"]] == ["Same.md", "Same-1.md", "Same-2.md"]
+    for i, result in enumerate(response["results"]):
+        assert f"copy {i}" in (notes / result["file_name"]).read_text(encoding="utf-8")
+
+
+def test_created_notes_are_indexed(notes):
+    add_notes([{"title": "Alpha", "content": "walrus"}, {"title": "Beta", "content": "narwhal"}])
+
+    found = asyncio.run(main.get_notes(search="narwhal"))
+    assert [note["file_name"] for note in found["notes"]] == ["Beta.md"]
+
+
+@pytest.mark.parametrize("file_name, text, expected", [
+    ("plain.md", "# Heading\nBody\n", {"title": "Heading", "content": "Body"}),
+    ("later.md", "Intro\n# Heading\nBody", {"title": "Heading", "content": "Intro\nBody"}),
+    ("no_heading-here.txt", "Just text", {"title": "no heading here", "content": "Just text"}),
+    ("blank.md", "#  \nBody", {"title": "blank", "content": "Body"}),
+    ("long.md", "# " + "x" * 150 + "\nBody", {"title": "x" * 100, "content": "Body"}),
+])
+def test_load_import_file(tmp_path, file_name, text, expected):
+    path = tmp_path / file_name
+    path.write_text(text, encoding="utf-8")
+    assert main.load_import_file(path) == expected
+
+
+def test_load_import_file_replaces_invalid_utf8(tmp_path):
+    path = tmp_path / "bytes.md"
+    path.write_bytes(b"# Caf\xe9\nbody")
+    assert main.load_import_file(path) == {"title": "Caf�", "content": "body"}
+
+
+def test_import_round_trip(notes, tmp_path, capsys):
+    source = tmp_path / "source"
+    (source / "nested").mkdir(parents=True)
+    (source / "first.md").write_text("# First note\nAlpha body\n", encoding="utf-8")
+    (source / "nested" / "second_note.txt").write_text("Beta body", encoding="utf-8")
+    (source / "ignored.pdf").write_text("# Not a note", encoding="utf-8")
+
+    assert main.import_command([str(source)]) == 0
+    assert "Imported 2 notes (0 failed)" in capsys.readouterr().out
+    assert note_files(notes) == ["First-note.md", "second-note.md"]
+
+    # Importing a created note gives back the title and content that were imported
+    for file_name, title, content in (("First-note.md", "First note", "Alpha body"),
+                                      ("second-note.md", "second note", "Beta body")):
+        note = main.load_import_file(notes / file_name)
+        assert note["title"] == title
+        assert note["content"].endswith(f"## Content\n{content}")
+
+    found = asyncio.run(main.get_notes(search="Beta body"))
+    assert [note["file_name"] for note in found["notes"]] == ["second-note.md"]
+
+
+def test_import_reports_failures_and_keeps_going(notes, tmp_path, capsys):
+    good = tmp_path / "good.md"
+    good.write_text("# Good\nkept", encoding="utf-8")
+    empty = tmp_path / "empty.md"
+    empty.write_text("# Empty\n", encoding="utf-8")
+    missing = tmp_path / "missing.md"
+
+    assert main.import_command([str(missing), str(empty), str(good)]) == 1
+
+    captured = capsys.readouterr()
+    assert "Imported 1 notes (2 failed)" in captured.out
+    assert str(missing) in captured.err
+    assert f"{empty}: Content is required" in captured.err
+    assert note_files(notes) == ["Good.md"]
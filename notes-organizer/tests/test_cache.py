@@ -0,0 +1,44 @@
+"""The (file name, mtime, size)-keyed note metadata cache."""
+
+import os
+
+from notes_organizer.cache import MetadataCache
+from notes_organizer.store import NoteStore
+
+
+def test_entries_are_keyed_on_mtime_and_size(notes_dir, index_dir, write_note):
+    path = write_note("a.md", "# A\nfirst", mtime=1_000_000)
+    cache = MetadataCache(index_dir / "metadata.json")
+    stat = path.stat()
+    cache.put("a.md", stat, {"title": "A"})
+    assert cache.get("a.md", stat) == {"title": "A"}
+
+    write_note("a.md", "# A\nchanged", mtime=2_000_000)
+    assert cache.get("a.md", path.stat()) is None
+
+
+def test_least_recently_used_entries_are_evicted(notes_dir, index_dir, write_note):
+    cache = MetadataCache(index_dir / "metadata.json", max_entries=2)
+    stats = {name: write_note(name, name).stat() for name in ("a.md", "b.md", "c.md")}
+    cache.put("a.md", stats["a.md"], {"title": "a"})
+    cache.put("b.md", stats["b.md"], {"title": "b"})
+    cache.get("a.md", stats["a.md"])
+    cache.put("c.md", stats["c.md"], {"title": "c"})
+    assert cache.get("b.md", stats["b.md"]) is None
+    assert cache.get("a.md", stats["a.md"]) is not None
+
+
+def test_cache_persists_across_restarts(notes_dir, index_dir, write_note):
+    write_note("a.md", "# Alpha\nThe first letter.\n")
+    store = NoteStore(notes_dir, index_dir)
+    store.refresh()
+    store.flush()
+
+    restarted = NoteStore(notes_dir, index_dir)
+    stat = os.stat(notes_dir / "a.md")
+    assert restarted.metadata.get("a.md", stat) == {
+        "title": "Alpha",
+        "overview": "The first letter.",
+        "mtime": stat.st_mtime,
+        "size": stat.st_size
+    }
@@ -0,0 +1,104 @@
+"""Compressed notes: codec round trips, dictionaries, recompression and every reader."""
+
+import os
+
+import pytest
+
+from notes_organizer import compression
+from notes_organizer.compression import (
+    Compressor, detect, is_compressed, note_size, open_note, read_text, recompress, train_dictionary
+)
+from notes_organizer.database import NoteDatabase
+from notes_organizer.files import file_contains
+from notes_organizer.store import NoteStore
+
+needs_zstd = pytest.mark.skipif(compression.zstandard is None, reason="zstandard is not installed")
+CODECS = ["gzip", pytest.param("zstd", marks=needs_zstd)]
+
+TEXT = "# Trip to Zürich\nWe took the train through the Alps; the views were naïve-art perfect.\n" * 20
+
+
+def write_compressed(path, text, compressor):
+    path.write_bytes(compressor.compress(text))
+    os.utime(path, (1_700_000_000, 1_700_000_000))
+    return path
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_round_trip(notes_dir, codec):
+    path = write_compressed(notes_dir / "trip.md", TEXT, Compressor(notes_dir, codec))
+    assert detect(path.read_bytes()[:4]) == codec and is_compressed(path)
+    assert read_text(path) == TEXT
+    with open_note(path) as f:
+        assert f.read() == TEXT.encode('utf-8')
+    assert note_size(path) == len(TEXT.encode('utf-8'))
+    assert file_contains(path, "ZÜRICH") and file_contains(path, "through the alps")
+    assert not file_contains(path, "geneva")
+
+
+def test_plain_notes_are_untouched(write_note):
+    path = write_note("plain.md", TEXT)
+    assert detect(path.read_bytes()[:4]) is None and not is_compressed(path)
+    assert read_text(path) == TEXT and note_size(path) == path.stat().st_size
+
+
+def test_unknown_codec(notes_dir):
+    with pytest.raises(ValueError):
+        Compressor(notes_dir, "brotli")
+
+
+@needs_zstd
+def test_trained_dictionary(notes_dir, write_note):
+    for i in range(200):
+        write_note(f"day-{i}.md", f"# Day {i}\n## Summary\nWorked on ticket {i * 7} and reviewed {i % 13} changes.\n")
+    dict_id = train_dictionary(notes_dir, size=2048)
+    compressor = Compressor(notes_dir, "zstd")
+    assert compressor.dict_id == dict_id
+
+    path = write_compressed(notes_dir / "day-new.md", "# Day 999\n## Summary\nWorked on ticket 5.\n", compressor)
+    assert compressor.is_current(path)
+    compression._dictionaries.clear()
+    assert read_text(path).startswith("# Day 999")
+
+    # Notes written with a dictionary cannot be read without it
+    os.unlink(notes_dir / compression.DICTIONARY_DIR / f"{dict_id}.zdict")
+    compression._dictionaries.clear()
+    with pytest.raises(OSError):
+        read_text(path)
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_recompress_keeps_content_and_mtime(write_note, notes_dir, codec):
+    path = write_note("trip.md", TEXT, mtime=1_700_000_000)
+    compressor = Compressor(notes_dir, codec)
+    old_size, new_size = recompress(path, compressor)
+    assert new_size < old_size and is_compressed(path)
+    assert recompress(path, compressor) is None
+    assert recompress(path, None) is not None and not is_compressed(path)
+    assert path.read_text(encoding='utf-8') == TEXT
+    assert path.stat().st_mtime == 1_700_000_000
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_store_indexes_compressed_notes(notes_dir, index_dir, codec):
+    store = NoteStore(notes_dir, index_dir)
+    store.compressor = Compressor(notes_dir, codec)
+    file_name = store.create_note("trip", TEXT)
+    assert is_compressed(notes_dir / file_name)
+
+    restarted = NoteStore(notes_dir, index_dir)
+    restarted.refresh()
+    assert restarted.index.search("zürich") == {file_name}
+    assert restarted.index.search("through the alps") == {file_name}
+    stat = (notes_dir / file_name).stat()
+    assert restarted.get_metadata(file_name, stat)["title"] == "Trip to Zürich"
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_database_import_decompresses(notes_dir, tmp_path, codec):
+    write_compressed(notes_dir / "trip.md", TEXT, Compressor(notes_dir, codec))
+    db = NoteDatabase(tmp_path / "notes.db")
+    assert db.import_folder(notes_dir) == 1
+    row = db.get("trip.md")
+    assert row["content"] == TEXT and row["size"] == len(TEXT.encode('utf-8'))
+    assert [note["file_name"] for note in db.search("zürich")[0]] == ["trip.md"]
@@ -0,0 +1,153 @@
+"""SQLite backend: storage, every search mode, and parity with the notes folder."""
+
+import asyncio
+
+import pytest
+
+from notes_organizer import main
+from notes_organizer.database import NoteDatabase
+
+NOTES = {
+    "cafe.md": "# Café\nThe CAFÉ serves crème brûlée.\n",
+    "resume.md": "# Résumé\nMy résumé mentions python and rust.\n",
+    "plain.md": "# Plain\nNo accents here, only python.\n",
+    "ecole.md": "# École\nÉcole primaire; data pipeline notes.\n",
+}
+
+
+@pytest.fixture
+def folder(write_note, notes_dir):
+    for i, (file_name, text) in enumerate(NOTES.items()):
+        write_note(file_name, text, mtime=1_700_000_000 + i * 86400)
+    return notes_dir
+
+
+@pytest.fixture
+def db(folder, tmp_path):
+    db = NoteDatabase(tmp_path / "notes.db")
+    assert db.import_folder(folder) == len(NOTES)
+    return db
+
+
+def names(page) -> list[str]:
+    return [note["file_name"] for note in page]
+
+
+def test_import_keeps_names_times_and_bytes(db, folder):
+    row = db.get("resume.md")
+    assert row["content"] == NOTES["resume.md"]
+    assert row["mtime_ns"] == (folder / "resume.md").stat().st_mtime_ns
+    assert row["size"] == len(NOTES["resume.md"].encode('utf-8'))
+    # Byte slices never split a character
+    text, start, end, _, _ = db.read("cafe.md", offset=3, length=5)
+    assert NOTES["cafe.md"].encode('utf-8')[start:end].decode('utf-8') == text
+
+
+def test_create_notes_allocates_suffixes(db):
+    assert db.create_notes([("cafe", "# Again\n"), ("cafe", "# Third\n"), ("new", "# New\n")]) == [
+        "cafe-1.md", "cafe-2.md", "new.md"
+    ]
+    assert db.create_note("cafe", "# Fourth\n") == "cafe-3.md"
+
+
+@pytest.mark.parametrize("search, expected", [
+    ("é", ["ecole.md", "resume.md", "cafe.md"]),
+    ("É", ["ecole.md", "resume.md", "cafe.md"]),
+    ("Ü", []),
+    ("py", ["plain.md", "resume.md"]),
+    ("café", ["cafe.md"]),
+    ("ÉCOLE", ["ecole.md"]),
+    ("data pipe", ["ecole.md"]),
+])
+def test_filter_mode(db, search, expected):
+    page, total = db.search(search)
+    assert names(page) == expected and total == len(expected)
+
+
+def test_other_modes(db):
+    ranked, total = db.search("python", mode="ranked")
+    assert set(names(ranked)) == {"plain.md", "resume.md"} and total == 2
+    assert ranked[0]["score"] >= ranked[1]["score"]
+    assert names(db.search("python -rust", mode="query")[0]) == ["plain.md"]
+    assert names(db.search('title:école OR "crème brûlée"', mode="query")[0]) == ["ecole.md", "cafe.md"]
+    assert names(db.search("pyhton", mode="fuzzy", max_distance=2)[0]) == ["plain.md", "resume.md"]
+
+
+def stored_vocabulary(db) -> set[str]:
+    return {term for (term,) in db._connection().execute("SELECT term FROM notes_vocab WHERE col = 'content'")}
+
+
+def test_fuzzy_vocabulary_follows_writes(db, folder, write_note):
+    matcher = db._vocabulary()
+    db.create_notes([("new", "# New\nA xylophone and an oboe.\n")])
+    # New words are added to the loaded vocabulary instead of reloading it
+    assert db._vocabulary() is matcher
+    assert matcher.vocabulary == stored_vocabulary(db)
+    assert names(db.search("xylophon", mode="fuzzy", max_distance=1)[0]) == ["new.md"]
+
+    # Replacing a note can remove words, so the vocabulary is reloaded
+    write_note("plain.md", "# Plain\nNothing else.\n")
+    db.import_folder(folder)
+    assert db._vocabulary() is not matcher
+    assert "accents" not in db._vocabulary().vocabulary
+    assert db._vocabulary().vocabulary == stored_vocabulary(db)
+
+
+def test_dates_and_pages(db):
+    first, total = db.search(None, limit=2)
+    assert total == 4 and names(first) == ["ecole.md", "plain.md"]
+    rest, _ = db.search(None, after=first[-1]["sort_key"])
+    assert names(rest) == ["resume.md", "cafe.md"]
+    dated, total = db.search(None, start_ns=1_700_086_400 * 10**9, end_ns=1_700_172_800 * 10**9)
+    assert names(dated) == ["plain.md", "resume.md"] and total == 2
+
+
+def test_snippet_offsets(db):
+    page, _ = db.search("brûlée")
+    snippet = page[0]["snippet"]
+    data = NOTES["cafe.md"].encode('utf-8')
+    offset, length = snippet["highlights"][0]
+    assert data[offset:offset + length].decode('utf-8') == "brûlée"
+
+
+def test_export_round_trip(db, tmp_path):
+    exported = tmp_path / "exported"
+    assert db.export_folder(exported) == len(NOTES)
+    for file_name, text in NOTES.items():
+        assert (exported / file_name).read_text(encoding='utf-8') == text
+
+
+@pytest.fixture
+def backends(folder, db, monkeypatch):
+    """Run get_notes against the notes folder and then against the database."""
+    for name in ("database", "NOTES_DIR", "INDEX_DIR", "store"):
+        monkeypatch.setattr(main, name, getattr(main, name))
+    main.database = None
+    main.use_notes_dir(folder)
+
+    def both(**kwargs) -> tuple[dict, dict]:
+        main.database = None
+        from_files = asyncio.run(main.get_notes(**kwargs))
+        main.database = db
+        try:
+            return from_files, asyncio.run(main.get_notes(**kwargs))
+        finally:
+            main.database = None
+
+    yield both
+    main.store.flush()
+
+
+@pytest.mark.parametrize("search", ["é", "É", "ü", "c", "py", "café", "RÉSUMÉ"])
+def test_backends_agree_on_substring_searches(backends, search):
+    from_files, from_database = backends(search=search, snippets=False)
+    assert from_files["total"] == from_database["total"]
+    assert names(from_files["notes"]) == names(from_database["notes"])
+
+
+@pytest.mark.parametrize("search", ["ython", "only python", "crème brûlée", "re, only"])
+def test_backends_agree_on_highlights(backends, search):
+    from_files, from_database = backends(search=search)
+    assert from_files["total"] == from_database["total"] > 0
+    assert ([note["snippet"] for note in from_files["notes"]]
+            == [note["snippet"] for note in from_database["notes"]])
@@ -0,0 +1,64 @@
+"""sanitize_filename against the original three-regex implementation."""
+
+import random
+import re
+
+import pytest
+
+from notes_organizer.filenames import sanitize_filename
+
+ALPHABETS = {
+    "ascii": "abcdefghijklmnopqrstuvwxyz ABCDEFGHIJKLMNOPQRSTUVWXYZ 0123456789",
+    "punctuation": "abcdefghijklmnopqrstuvwxyz  --__ !?.,:;'\"()[]{}/\\@#$%^&*+=<>|~`",
+    "accented": "àéîõüçñ ÀÉÎÕÜ ß ø æ  abc-def",
+    "scripts": "漢字かなカナ 한국어 Ελληνικά русский  \t　-",
+    "control": "ab-_ \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f\x85\xa0\x00\x7f",
+}
+
+
+def original_sanitize_filename(title: str) -> str:
+    sanitized = re.sub(r'[^\w\s-]', '', title)
+    sanitized = re.sub(r'\s+', '-', sanitized.strip())
+    sanitized = re.sub(r'-+', '-', sanitized)
+    sanitized = sanitized.strip('-')
+    if not sanitized:
+        sanitized = "untitled"
+    return sanitized
+
+
+@pytest.mark.parametrize("title", [
+    "Meeting notes",
+    "  Leading and trailing  ",
+    "a - b -- c",
+    "---",
+    "",
+    "   ",
+    "!!!",
+    "snake_case_title",
+    "Q&A: what/why?",
+    "tab\tand\nnewline",
+    "-hyphen-edges-",
+    "- spaced -",
+    "Café au lait",
+    "漢字 かな",
+    "mixed ascii and ü",
+    "non\xa0breaking",
+    "ideographic　space",
+    "x" * 100,
+])
+def test_matches_original(title):
+    assert sanitize_filename(title) == original_sanitize_filename(title)
+
+
+@pytest.mark.parametrize("alphabet", ALPHABETS.values(), ids=ALPHABETS.keys())
+def test_matches_original_on_generated_titles(alphabet):
+    rng = random.Random(7)
+    for _ in range(500):
+        title = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 100)))
+        assert sanitize_filename(title) == original_sanitize_filename(title), repr(title)
+
+
+def test_memo_returns_the_same_name():
+    sanitize_filename.cache_clear()
+    assert sanitize_filename("Repeated title") == sanitize_filename("Repeated title") == "Repeated-title"
+    assert sanitize_filename.cache_info().hits == 1
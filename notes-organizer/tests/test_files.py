@@ -0,0 +1,64 @@
+"""Memory-mapped search and byte slices of plain (uncompressed) notes."""
+
+import pytest
+
+from notes_organizer import files
+from notes_organizer.files import file_contains, read_slice
+
+
+@pytest.fixture
+def small_windows(monkeypatch):
+    """Memory-map every non-empty note and search it 16 bytes at a time."""
+    monkeypatch.setattr(files, "MMAP_MIN_SIZE", 1)
+    monkeypatch.setattr(files, "SEARCH_WINDOW", 16)
+
+
+@pytest.mark.parametrize("windows", [False, True])
+def test_empty_file(write_note, request, windows):
+    if windows:
+        request.getfixturevalue("small_windows")
+    path = write_note("empty.md", "")
+    assert not file_contains(path, "anything")
+    assert read_slice(path, 0) == ("", 0, 0)
+    assert read_slice(path, 10, 5) == ("", 0, 0)
+
+
+def test_match_spanning_window_boundaries(write_note, small_windows):
+    for position in range(40):
+        path = write_note("long.md", "x" * position + "NeedLe" + "y" * (50 - position))
+        assert file_contains(path, "needle"), position
+        assert not file_contains(path, "needles"), position
+
+
+def test_match_at_the_very_end(write_note, small_windows):
+    path = write_note("end.md", "a" * 31 + "Z")
+    assert file_contains(path, "z") and file_contains(path, "az")
+    assert not file_contains(path, "za")
+
+
+def test_non_ascii_terms_on_large_notes(write_note, small_windows):
+    path = write_note("utf8.md", "a" * 20 + "CAFÉ")
+    assert file_contains(path, "café")
+    assert not file_contains(path, "cafés")
+
+
+TEXT = "héllo wörld"  # é and ö are two bytes each
+DATA = TEXT.encode('utf-8')
+
+
+@pytest.mark.parametrize("offset, length, expected", [
+    (0, None, (TEXT, 0, len(DATA))),
+    (0, 3, ("hé", 0, 3)),
+    # A range ending inside a character stops before it
+    (0, 2, ("h", 0, 1)),
+    # A range starting inside a character starts after it
+    (2, 4, ("llo", 3, 6)),
+    # Past the end of the file
+    (len(DATA), None, ("", len(DATA), len(DATA))),
+    (len(DATA) + 10, 4, ("", len(DATA), len(DATA))),
+    (7, 100, ("wörld", 7, len(DATA))),
+    (5, 0, ("", 5, 5)),
+])
+def test_read_slice(write_note, offset, length, expected):
+    path = write_note("slice.md", TEXT)
+    assert read_slice(path, offset, length) == expected
@@ -0,0 +1,92 @@
+"""Fuzzy mode: bounded Levenshtein distance, trigram pruning and note matching."""
+
+import random
+
+import pytest
+
+from notes_organizer.fuzzy import FuzzyMatcher, TermMatcher, bounded_distance, default_distance
+from notes_organizer.index import NoteIndex
+
+
+def levenshtein(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        previous = current
+    return previous[-1]
+
+
+def random_words(rng: random.Random, count: int) -> list[str]:
+    return ["".join(rng.choice("abcde") for _ in range(rng.randint(1, 9))) for _ in range(count)]
+
+
+@pytest.mark.parametrize("a, b, distance", [
+    ("kitten", "sitting", 3),
+    ("flaw", "lawn", 2),
+    ("python", "pyhton", 2),
+    ("", "abc", 3),
+    ("same", "same", 0),
+])
+def test_bounded_distance_known_pairs(a, b, distance):
+    assert bounded_distance(a, b, distance) == distance
+    assert bounded_distance(b, a, 3) == distance
+    if distance:
+        assert bounded_distance(a, b, distance - 1) is None
+
+
+def test_bounded_distance_matches_levenshtein():
+    rng = random.Random(7)
+    words = random_words(rng, 120)
+    for a, b in zip(words, reversed(words)):
+        exact = levenshtein(a, b)
+        for limit in range(4):
+            assert bounded_distance(a, b, limit) == (exact if exact <= limit else None)
+
+
+def test_similar_terms_prunes_nothing_it_should_find():
+    rng = random.Random(11)
+    vocabulary = set(random_words(rng, 400))
+    matcher = TermMatcher(vocabulary)
+    for word in random_words(rng, 60):
+        for limit in (1, 2, 3):
+            expected = {term: d for term in vocabulary if (d := levenshtein(word, term)) <= limit}
+            assert matcher.similar_terms(word, limit) == expected
+
+
+def test_default_distance_grows_with_word_length():
+    assert [default_distance(w) for w in ("cat", "garden", "notebooks")] == [0, 1, 2]
+    assert TermMatcher(["cat", "car"]).similar_terms("cat") == {"cat": 0}
+
+
+@pytest.fixture
+def matcher(notes_dir, index_dir):
+    index = NoteIndex(notes_dir, index_dir)
+    matcher = FuzzyMatcher(index)
+    notes = {
+        "a.md": "# Kubernetes\nDeploying containers with kubernetes.\n",
+        "b.md": "# Recipes\nA tomato and basil pasta.\n",
+        "c.md": "# Cluster\nKubernetes cluster upgrade and tomato plants.\n",
+    }
+    for i, (file_name, text) in enumerate(notes.items()):
+        index.put(file_name, i, len(text), text)
+    return matcher
+
+
+def test_search_tolerates_typos_in_every_word(matcher):
+    assert matcher.search("kubernets") == {"a.md", "c.md"}
+    assert matcher.search("kubernets tomatto") == {"c.md"}
+    assert matcher.search("tomatto", max_distance=0) == set()
+    assert matcher.search("") == set()
+
+
+def test_vocabulary_follows_the_index(matcher):
+    index = matcher.index
+    index.remove("b.md")
+    # Still used by c.md
+    assert "tomato" in matcher.vocabulary
+    assert "basil" not in matcher.vocabulary
+    assert matcher.search("basill") == set()
+    index.put("d.md", 9, 10, "# Herbs\nBasil again.\n")
+    assert matcher.search("basill") == {"d.md"}
@@ -0,0 +1,147 @@
+"""get_notes through the tool handler: pagination, cursors and date filters."""
+
+import asyncio
+import threading
+
+import pytest
+
+from notes_organizer import main
+
+
+@pytest.fixture
+def notes(notes_dir, write_note, monkeypatch):
+    """Serve a temporary folder of ten notes, note-0 oldest and note-9 newest."""
+    # Restored after the test, like use_notes_dir changes them
+    for name in ("database", "NOTES_DIR", "INDEX_DIR", "store"):
+        monkeypatch.setattr(main, name, getattr(main, name))
+    main.database = None
+    for i in range(10):
+        write_note(f"note-{i}.md", f"# Note {i}\nNumber {i} {'even' if i % 2 == 0 else 'odd'}\n",
+                   mtime=1_700_000_000 + i * 86400)
+    main.use_notes_dir(notes_dir)
+    yield notes_dir
+    main.store.flush()
+
+
+def try_lock(lock) -> bool:
+    if not lock.acquire(timeout=1):
+        return False
+    lock.release()
+    return True
+
+
+def get_notes(**kwargs) -> dict:
+    return asyncio.run(main.get_notes(**kwargs))
+
+
+def test_pages_cover_every_note_once_newest_first(notes):
+    seen = []
+    cursor = None
+    while True:
+        page = get_notes(limit=3, cursor=cursor)
+        assert page["success"] and page["total"] == 10
+        seen.extend(note["file_name"] for note in page["notes"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"note-{i}.md" for i in range(9, -1, -1)]
+
+
+def test_search_pages_and_total(notes):
+    first = get_notes(search="even", limit=2)
+    assert first["total"] == 5
+    assert [note["file_name"] for note in first["notes"]] == ["note-8.md", "note-6.md"]
+    rest = get_notes(search="even", cursor=first["next_cursor"])
+    assert [note["file_name"] for note in rest["notes"]] == ["note-4.md", "note-2.md", "note-0.md"]
+    assert rest["next_cursor"] is None
+
+
+def test_cursor_survives_new_notes(notes, write_note):
+    first = get_notes(limit=5)
+    write_note("newest.md", "# Newest\n", mtime=1_800_000_000)
+    rest = get_notes(limit=5, cursor=first["next_cursor"])
+    assert [note["file_name"] for note in rest["notes"]] == [f"note-{i}.md" for i in range(4, -1, -1)]
+
+
+def test_date_range(notes):
+    page = get_notes(start_date="2023-11-16", end_date="2023-11-18")
+    assert page["total"] == len(page["notes"])
+    assert all(note["file_name"] in {"note-1.md", "note-2.md", "note-3.md"} for note in page["notes"])
+
+
+def test_invalid_arguments(notes):
+    assert get_notes(cursor="not a cursor")["error"] == "Validation Error"
+    assert get_notes(limit=0)["error"] == "Validation Error"
+
+
+def test_note_missing_from_the_listing_snapshot(notes, write_note, monkeypatch):
+    main.store.refresh()
+    snapshot = main.store.listing()
+    # A note the watcher picks up after the listing was taken
+    write_note("late.md", "# Late\nArrived after the listing\n", mtime=1_800_000_000)
+    main.store.note_changed("late.md")
+    monkeypatch.setattr(main.store, "listing", lambda: snapshot)
+
+    page = get_notes(limit=1)
+    assert page["notes"][0]["file_name"] == "late.md"
+    assert page["notes"][0]["title"] == "Late"
+
+
+def test_phrase_search_reads_candidates_outside_the_lock(notes, monkeypatch):
+    main.store.refresh()
+    checked = []
+    file_contains = main.file_contains
+
+    def probe(file_path, search_term):
+        # Try the lock from another thread; the store lock is reentrant
+        acquired = []
+        thread = threading.Thread(target=lambda: acquired.append(try_lock(main.store.lock)))
+        thread.start()
+        thread.join()
+        checked.append(acquired[0])
+        return file_contains(file_path, search_term)
+
+    monkeypatch.setattr(main, "file_contains", probe)
+    page = get_notes(search="number 3 odd")
+    assert [note["file_name"] for note in page["notes"]] == ["note-3.md"]
+    assert checked and all(checked)
+
+
+def test_query_mode(notes):
+    page = get_notes(search="even NOT (number 4 OR number 8)", mode="query")
+    assert [note["file_name"] for note in page["notes"]] == ["note-6.md", "note-2.md", "note-0.md"]
+    assert page["total"] == 3
+    assert get_notes(search="(even", mode="query")["success"] is False
+
+
+def test_fuzzy_mode(notes):
+    page = get_notes(search="numbr od", mode="fuzzy", max_distance=1)
+    assert [note["file_name"] for note in page["notes"]] == [f"note-{i}.md" for i in (9, 7, 5, 3, 1)]
+    assert get_notes(search="nubmer", mode="fuzzy", max_distance=0)["total"] == 0
+
+
+def test_snippet_offsets_round_trip_through_get_note(notes, write_note):
+    write_note("unicode.md", "# Ünïcode\nSome crème brûlée before the target word.\n", mtime=1_800_000_000)
+    snippet = get_notes(search="target")["notes"][0]["snippet"]
+    offset, length = snippet["highlights"][0]
+    part = asyncio.run(main.get_note("unicode.md", offset=offset, length=length))
+    assert part["content"] == "target"
+    assert asyncio.run(main.get_note("unicode.md", offset=snippet["offset"], length=snippet["length"]))["content"] == snippet["text"]
+
+
+def highlighted_words(notes_dir, note) -> list[str]:
+    data = (notes_dir / note["file_name"]).read_bytes()
+    return [data[offset:offset + length].decode('utf-8').lower() for offset, length in note["snippet"]["highlights"]]
+
+
+def test_filter_highlights_only_literal_matches(notes, write_note):
+    write_note("lang.md", "# Lang\nC++ rocks, but c is fine and so is docker.\n", mtime=1_800_000_000)
+
+    # "c++" tokenizes to "c", which "rocks" and "docker" also contain
+    page = get_notes(search="c++")
+    assert [note["file_name"] for note in page["notes"]] == ["lang.md"]
+    assert set(highlighted_words(notes, page["notes"][0])) == {"c"}
+
+    # A single-word fragment highlights the words that literally contain it
+    page = get_notes(search="ock")
+    assert sorted(highlighted_words(notes, page["notes"][0])) == ["docker", "rocks"]
@@ -0,0 +1,133 @@
+"""The persistent inverted index: search, journal, replay and compaction."""
+
+import json
+
+from notes_organizer import index as index_module
+from notes_organizer import ranking as ranking_module
+from notes_organizer.index import JOURNAL_FILE, SNAPSHOT_FILE, NoteIndex, list_notes
+from notes_organizer.ranking import BM25Ranker
+
+
+def build(notes_dir, index_dir) -> NoteIndex:
+    index = NoteIndex(notes_dir, index_dir)
+    index.sync(list_notes(notes_dir))
+    return index
+
+
+def test_search_matches_substrings_of_names_and_content(notes_dir, index_dir, write_note):
+    write_note("Python.md", "# Python\nDecorators wrap functions.\n")
+    write_note("Rust.md", "# Rust\nThe borrow checker enforces ownership.\n")
+    index = build(notes_dir, index_dir)
+
+    assert index.search("decorator") == {"Python.md"}
+    assert index.search("RUST") == {"Rust.md"}
+    # Multi-word terms are verified against the note text
+    assert index.search("borrow checker") == {"Rust.md"}
+    assert index.search("checker borrow") == set()
+    # No word characters: the caller has to scan
+    assert index.search("--") is None
+
+
+def test_changes_are_journaled_and_replayed(notes_dir, index_dir, write_note):
+    write_note("a.md", "alpha")
+    write_note("b.md", "beta")
+    index = build(notes_dir, index_dir)
+    assert (index_dir / SNAPSHOT_FILE).exists() or (index_dir / JOURNAL_FILE).exists()
+
+    index.remove("a.md")
+    index.put("c.md", 1, 5, "gamma")
+    index.flush()
+    records = [json.loads(line) for line in (index_dir / JOURNAL_FILE).read_text().splitlines()]
+    assert [record["op"] for record in records][-2:] == ["del", "put"]
+
+    reloaded = NoteIndex(notes_dir, index_dir)
+    reloaded.load()
+    assert set(reloaded.ids) == {"b.md", "c.md"}
+    assert reloaded.ids == index.ids
+    assert set(reloaded.postings) == {"beta", "gamma"}
+    assert reloaded.next_id == index.next_id
+
+
+def test_torn_journal_line_is_dropped_and_compacted(notes_dir, index_dir, write_note):
+    write_note("a.md", "alpha")
+    build(notes_dir, index_dir)
+    index = NoteIndex(notes_dir, index_dir)
+    index.put("b.md", 1, 4, "beta")
+    index.flush()
+    with open(index_dir / JOURNAL_FILE, 'a', encoding='utf-8') as f:
+        f.write('{"op": "put", "id": 9, "doc": ["tor')
+
+    reloaded = NoteIndex(notes_dir, index_dir)
+    reloaded.load()
+    assert set(reloaded.ids) == {"a.md", "b.md"}
+    reloaded.flush()
+    assert not (index_dir / JOURNAL_FILE).exists()
+    assert set(json.loads((index_dir / SNAPSHOT_FILE).read_text())["docs"]) == {
+        str(doc_id) for doc_id in reloaded.docs
+    }
+
+
+def test_journal_is_compacted_once_it_grows(notes_dir, index_dir, monkeypatch):
+    monkeypatch.setattr(index_module, "MIN_JOURNAL_RECORDS", 3)
+    index = NoteIndex(notes_dir, index_dir)
+    for i in range(3):
+        index.put(f"n{i}.md", i, 1, f"word{i}")
+        index.flush()
+    assert (index_dir / JOURNAL_FILE).exists()
+    index.put("n3.md", 3, 1, "word3")
+    index.flush()
+    assert not (index_dir / JOURNAL_FILE).exists()
+
+    reloaded = NoteIndex(notes_dir, index_dir)
+    reloaded.load()
+    assert set(reloaded.ids) == {"n0.md", "n1.md", "n2.md", "n3.md"}
+
+
+def test_sync_reindexes_changed_and_drops_deleted_notes(notes_dir, index_dir, write_note):
+    write_note("a.md", "alpha", mtime=1_000_000)
+    write_note("b.md", "beta", mtime=1_000_000)
+    index = build(notes_dir, index_dir)
+
+    write_note("a.md", "alphabet soup", mtime=2_000_000)
+    (notes_dir / "b.md").unlink()
+    assert index.sync(list_notes(notes_dir)) == 2
+    assert index.search("soup") == {"a.md"}
+    assert "b.md" not in index.ids
+    # Nothing changed since: nothing is read
+    assert index.sync(list_notes(notes_dir)) == 0
+
+
+def test_allocate_name_skips_indexed_suffixes(notes_dir, index_dir, write_note):
+    write_note("Idea.md", "one")
+    write_note("Idea-4.md", "two")
+    index = build(notes_dir, index_dir)
+    assert index.allocate_name("Idea") == "Idea-5.md"
+    assert index.allocate_name("Idea") == "Idea-6.md"
+    assert index.allocate_name("Other") == "Other.md"
+
+
+def test_doc_ids_follow_the_number_of_notes_not_edits(notes_dir, index_dir):
+    index = NoteIndex(notes_dir, index_dir)
+    ranker = BM25Ranker(index)
+    for i in range(3):
+        index.put(f"note-{i}.md", 0, 1, f"note {i}")
+    for edit in range(5000):
+        index.put("note-1.md", edit, 1, f"edit {edit}")
+    assert index.ids == {"note-0.md": 0, "note-1.md": 1, "note-2.md": 2}
+    assert index.next_id == 3
+    assert len(ranker.doc_len) == ranking_module.INITIAL_CAPACITY
+    assert [file_name for _, file_name in ranker.rank("edit")[0]] == ["note-1.md"]
+
+    # A removed note's id goes to the next new note
+    index.remove("note-0.md")
+    index.put("new.md", 0, 1, "fresh")
+    assert index.ids["new.md"] == 0 and index.next_id == 3
+    index.flush()
+
+    reloaded = NoteIndex(notes_dir, index_dir)
+    reloaded.load()
+    assert reloaded.ids == index.ids
+    assert reloaded.search("edit") == {"note-1.md"} and reloaded.search("fresh") == {"new.md"}
+    reloaded.remove("note-2.md")
+    reloaded.put("another.md", 0, 1, "another")
+    assert reloaded.ids["another.md"] == 2
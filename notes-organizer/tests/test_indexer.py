@@ -0,0 +1,66 @@
+"""Cold-start indexing with build_index."""
+
+from notes_organizer import indexer
+from notes_organizer.index import JOURNAL_FILE, SNAPSHOT_FILE
+from notes_organizer.indexer import build_index
+from notes_organizer.store import NoteStore
+
+
+def index_files_on_disk(index_dir) -> int:
+    return sum(
+        (index_dir / name).stat().st_size
+        for name in (SNAPSHOT_FILE, JOURNAL_FILE)
+        if (index_dir / name).exists()
+    )
+
+
+def restart(notes_dir, index_dir, max_entries: int) -> NoteStore:
+    store = NoteStore(notes_dir, index_dir)
+    store.metadata.max_entries = max_entries
+    return store
+
+
+def test_restart_does_not_reindex_notes_evicted_from_the_metadata_cache(notes_dir, index_dir, write_note):
+    for i in range(40):
+        write_note(f"note-{i}.md", f"# Note {i}\nBody {i}\n")
+
+    first = build_index(restart(notes_dir, index_dir, max_entries=10), workers=1)
+    assert first["indexed"] == 40 and first["scanned"] == 40
+    size = index_files_on_disk(index_dir)
+
+    for _ in range(2):
+        store = restart(notes_dir, index_dir, max_entries=10)
+        again = build_index(store, workers=1)
+        assert again["indexed"] == 0
+        assert index_files_on_disk(index_dir) == size
+
+    # Evicted metadata is read back on demand
+    stat = (notes_dir / "note-0.md").stat()
+    assert store.get_metadata("note-0.md", stat)["title"] == "Note 0"
+
+
+def test_reports_notes_actually_indexed(notes_dir, index_dir, write_note):
+    for i in range(5):
+        write_note(f"note-{i}.md", f"note {i}")
+    build_index(NoteStore(notes_dir, index_dir), workers=1)
+
+    write_note("note-0.md", "changed")
+    write_note("new.md", "new")
+    (notes_dir / "note-1.md").unlink()
+    result = build_index(NoteStore(notes_dir, index_dir), workers=1)
+    assert (result["indexed"], result["removed"], result["scanned"]) == (2, 1, 5)
+
+
+def test_parallel_indexing_matches_serial(notes_dir, index_dir, write_note, monkeypatch, tmp_path):
+    for i in range(40):
+        write_note(f"note-{i}.md", f"# Note {i}\nshared words and unique{i}\n")
+    monkeypatch.setattr(indexer, "PARALLEL_THRESHOLD", 1)
+
+    parallel = NoteStore(notes_dir, index_dir)
+    result = build_index(parallel, workers=2)
+    assert result["workers"] == 2 and result["indexed"] == 40
+
+    serial = NoteStore(notes_dir, tmp_path / "serial-index")
+    build_index(serial, workers=1)
+    assert parallel.index.search("unique17") == serial.index.search("unique17") == {"note-17.md"}
+    assert set(parallel.index.postings) == set(serial.index.postings)
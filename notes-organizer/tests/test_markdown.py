@@ -0,0 +1,75 @@
+"""read_metadata: same result as extract_metadata, reading only the head of the note."""
+
+import pytest
+
+from notes_organizer import compression, markdown
+from notes_organizer.compression import Compressor
+from notes_organizer.markdown import extract_metadata, read_metadata
+
+needs_zstd = pytest.mark.skipif(compression.zstandard is None, reason="zstandard is not installed")
+
+CASES = {
+    "plain": ("# Title\nOverview line\n\n## Content\nBody\n", "Title", "Overview line"),
+    "overview first": ("Overview before\n# Title later\n", "Title later", "Overview before"),
+    "no title": ("Just a line\nand another\n", "Untitled", "Just a line"),
+    "no overview": ("# Only a title\n## Sub heading\n", "Only a title", ""),
+    "empty": ("", "Untitled", ""),
+    "no newline": ("# Title without newline", "Title without newline", ""),
+    "last line": ("# Title\n\n\nlast line without newline", "Title", "last line without newline"),
+    "h2 is not a title": ("## Not it\n# It\ntext", "It", "text"),
+    "hash without space": ("#tag\n# Title\nbody", "Title", "body"),
+    "indented": ("   \n  # not a heading\n# Title\n", "Title", "# not a heading"),
+    "long overview": ("# T\n" + "x" * 200 + "\n", "T", "x" * 150 + "..."),
+    "exactly 150": ("# T\n" + "y" * 150 + "\n", "T", "y" * 150),
+    "non-ascii": ("# Zürich 漢字\nnaïve café\n", "Zürich 漢字", "naïve café"),
+    "crlf": ("# Title\r\nOverview\r\n", "Title", "Overview"),
+}
+
+
+@pytest.mark.parametrize("text, title, overview", CASES.values(), ids=CASES.keys())
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 4096])
+def test_matches_extract_metadata(write_note, text, title, overview, chunk_size):
+    path = write_note("note.md", text)
+    expected = {"title": title, "overview": overview}
+    assert extract_metadata(text) == expected
+    assert read_metadata(path, chunk_size) == expected
+
+
+def test_long_first_line_spanning_chunks(write_note):
+    path = write_note("note.md", "# " + "t" * 10_000 + "\nbody\n")
+    assert read_metadata(path, chunk_size=64) == {"title": "t" * 10_000, "overview": "body"}
+
+
+def test_stops_reading_once_both_fields_are_found(write_note, monkeypatch):
+    path = write_note("note.md", "# Title\nOverview\n" + "filler line\n" * 100_000)
+    reads = []
+
+    class CountingWrapper(markdown.io.TextIOWrapper):
+        def read(self, size=-1):
+            chunk = super().read(size)
+            reads.append(len(chunk))
+            return chunk
+
+    monkeypatch.setattr(markdown.io, "TextIOWrapper", CountingWrapper)
+    assert read_metadata(path, chunk_size=64) == {"title": "Title", "overview": "Overview"}
+    assert sum(reads) == 64
+
+
+@pytest.mark.parametrize("codec", ["gzip", pytest.param("zstd", marks=needs_zstd)])
+def test_compressed_note(notes_dir, codec):
+    text = "# Compressed\nStill readable\n" + "more text\n" * 1000
+    path = notes_dir / "note.md"
+    path.write_bytes(Compressor(notes_dir, codec).compress(text))
+    assert read_metadata(path, chunk_size=16) == {"title": "Compressed", "overview": "Still readable"}
+
+
+def test_missing_note_raises(notes_dir):
+    with pytest.raises(OSError):
+        read_metadata(notes_dir / "missing.md")
+
+
+def test_invalid_utf8_raises(notes_dir):
+    path = notes_dir / "bad.md"
+    path.write_bytes(b"# Caf\xe9\nbody")
+    with pytest.raises(UnicodeDecodeError):
+        read_metadata(path)
@@ -0,0 +1,91 @@
+"""Boolean query mode: the parser and QueryEngine evaluation against the index."""
+
+import pytest
+
+from notes_organizer.index import NoteIndex
+from notes_organizer.query import QueryEngine, QuerySyntaxError, _difference, _intersect, parse_query
+
+NOTES = {
+    "python-tips.md": "# Python Tips\nUse a virtual environment for every project.\n",
+    "rust-notes.md": "# Rust Notes\nThe borrow checker and the data-pipeline crate.\n",
+    "garden.md": "# Garden\nPlant tomatoes in spring; python the snake ate one.\n",
+    "meeting.md": "# Weekly Meeting\nDiscussed the data pipeline and the python migration.\n",
+}
+
+
+@pytest.fixture
+def engine(notes_dir, index_dir, write_note):
+    index = NoteIndex(notes_dir, index_dir)
+    engine = QueryEngine(index)
+    for i, (file_name, text) in enumerate(NOTES.items()):
+        index.put(file_name, i, len(text), text)
+    return engine
+
+
+def test_precedence():
+    assert parse_query("a OR b c") == ("or", [("term", None, "a"), ("and", [("term", None, "b"), ("term", None, "c")])])
+    assert parse_query("NOT a b") == ("and", [("not", ("term", None, "a")), ("term", None, "b")])
+    assert parse_query("-a AND (b OR c)") == (
+        "and", [("not", ("term", None, "a")), ("or", [("term", None, "b"), ("term", None, "c")])]
+    )
+
+
+def test_fields_phrases_and_prefixes():
+    assert parse_query('title:"Weekly Meeting"') == ("phrase", "title", ["weekly", "meeting"])
+    assert parse_query("filename:pyth*") == ("prefix", "filename", "pyth")
+    assert parse_query("title:(a OR b)") == ("or", [("term", "title", "a"), ("term", "title", "b")])
+    # Punctuated words are phrases; lower-case operators are words
+    assert parse_query("data-pipeline") == ("phrase", None, ["data", "pipeline"])
+    assert parse_query("cats and dogs") == ("and", [("term", None, w) for w in ("cats", "and", "dogs")])
+
+
+@pytest.mark.parametrize("text", ["", "   ", "(a", "a)", "a OR", "AND a", "title:", "*", '""', "NOT"])
+def test_syntax_errors(text):
+    with pytest.raises(QuerySyntaxError):
+        parse_query(text)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("python", {"python-tips.md", "garden.md", "meeting.md"}),
+    ("python tomatoes", {"garden.md"}),
+    ("tomatoes OR borrow", {"garden.md", "rust-notes.md"}),
+    ("python -garden", {"python-tips.md", "meeting.md"}),
+    ("NOT python", {"rust-notes.md"}),
+    ('"data pipeline"', {"rust-notes.md", "meeting.md"}),
+    ('"pipeline data"', set()),
+    ("data-pipeline", {"rust-notes.md", "meeting.md"}),
+    ("titl*", set()),
+    ("tomat*", {"garden.md"}),
+    ("title:python", {"python-tips.md"}),
+    ("filename:notes", {"rust-notes.md"}),
+    ("title:(garden OR rust)", {"garden.md", "rust-notes.md"}),
+    ('title:"weekly meeting" python', {"meeting.md"}),
+    ("(rust OR garden) AND NOT snake", {"rust-notes.md"}),
+    ("PYTHON", {"python-tips.md", "garden.md", "meeting.md"}),
+])
+def test_search(engine, query, expected):
+    assert engine.search(query) == expected
+
+
+def test_follows_index_updates(engine):
+    index = engine.index
+    index.remove("garden.md")
+    assert engine.search("python") == {"python-tips.md", "meeting.md"}
+    assert engine.search("title:garden") == set()
+    index.put("garden.md", 9, 10, "# Orchard\nApples only.\n")
+    assert engine.search("title:orchard apples") == {"garden.md"}
+    assert engine.search("tomatoes") == set()
+
+
+def test_content_terms(engine):
+    query = parse_query('python "data pipeline" tomat* -borrow filename:rust')
+    assert engine.content_terms(query) == ["python", "data", "pipeline", "tomatoes"]
+
+
+def test_sorted_list_helpers():
+    a = [1, 3, 5, 7, 9, 11]
+    b = list(range(0, 100, 3))
+    assert _intersect(a, b) == [3, 9]
+    assert _intersect(b, a) == [3, 9]
+    assert _difference(a, b) == [1, 5, 7, 11]
+    assert _difference(a, []) == a
@@ -0,0 +1,42 @@
+"""BM25 ranking over the index."""
+
+from notes_organizer.index import NoteIndex
+from notes_organizer.ranking import BM25Ranker
+
+
+def make_ranker(notes_dir, index_dir) -> BM25Ranker:
+    index = NoteIndex(notes_dir, index_dir)
+    ranker = BM25Ranker(index)
+    index.put("title.md", 1, 1, "# Kubernetes\nA note about clusters.")
+    index.put("body.md", 2, 1, "# Ops\nWe deploy to kubernetes, kubernetes and more kubernetes.")
+    index.put("mention.md", 3, 1, "# Misc\nKubernetes came up once among many other unrelated words here.")
+    index.put("none.md", 4, 1, "# Cooking\nBread and butter.")
+    return ranker
+
+
+def test_ranks_by_relevance_with_title_boost(notes_dir, index_dir):
+    ranked, total = make_ranker(notes_dir, index_dir).rank("kubernetes")
+    assert total == 3
+    names = [file_name for _, file_name in ranked]
+    assert names[0] in ("title.md", "body.md")
+    assert names[-1] == "mention.md"
+    scores = [score for score, _ in ranked]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_pages_and_date_range(notes_dir, index_dir):
+    ranker = make_ranker(notes_dir, index_dir)
+    ranked, _ = ranker.rank("kubernetes")
+    first, _ = ranker.rank("kubernetes", limit=1)
+    rest, _ = ranker.rank("kubernetes", after=first[-1])
+    assert first + rest == ranked
+
+    in_range, total = ranker.rank("kubernetes", start_ns=2, end_ns=3)
+    assert total == 2 and {name for _, name in in_range} == {"body.md", "mention.md"}
+
+
+def test_removed_notes_stop_matching(notes_dir, index_dir):
+    ranker = make_ranker(notes_dir, index_dir)
+    ranker.index.remove("title.md")
+    ranked, total = ranker.rank("kubernetes")
+    assert total == 2 and "title.md" not in {name for _, name in ranked}
@@ -0,0 +1,50 @@
+"""Match snippets: window choice and UTF-8 byte offsets into the note."""
+
+import io
+
+import pytest
+
+from notes_organizer import snippets
+from notes_organizer.index import index_terms
+from notes_organizer.snippets import best_window, read_snippet, snippet_from
+
+TEXT = "# Café notes\nThe crème brûlée 😀 at the café was naïve; café again.\n" * 3
+
+
+def check_offsets(data: bytes, snippet: dict, hits: list[str]) -> None:
+    """The offsets must select exactly the snippet text and the highlighted words."""
+    assert data[snippet["offset"]:snippet["offset"] + snippet["length"]].decode('utf-8') == snippet["text"]
+    words = [data[start:start + length].decode('utf-8').lower() for start, length in snippet["highlights"]]
+    assert words == hits
+
+
+def test_best_window_prefers_distinct_words():
+    positions = {"café": [1, 40, 41], "naïve": [44], "crème": [90]}
+    first, last, hits = best_window(positions, size=10)
+    assert first <= 40 and last >= 44 and last - first == 9
+    assert hits == [40, 41, 44]
+    assert best_window({}) is None
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64, 16 * 1024])
+def test_offsets_are_utf8_bytes_at_any_chunk_size(monkeypatch, chunk_size):
+    monkeypatch.setattr(snippets, "READ_CHUNK_SIZE", chunk_size)
+    data = TEXT.encode('utf-8')
+    terms = index_terms(TEXT)
+    window = best_window({"café": terms["café"], "naïve": terms["naïve"]}, size=8)
+    snippet = snippet_from(io.BytesIO(data), *window)
+    first, last, hits = window
+    check_offsets(data, snippet, ["café" if p in terms["café"] else "naïve" for p in hits])
+    assert len(snippet["text"].split()) <= last - first + 2
+
+
+def test_read_snippet_from_a_note(write_note):
+    path = write_note("café.md", TEXT)
+    terms = index_terms(TEXT)
+    window = best_window({"brûlée": terms["brûlée"]})
+    snippet = read_snippet(path, *window)
+    check_offsets(path.read_bytes(), snippet, ["brûlée"] * len(window[2]))
+
+
+def test_note_shorter_than_the_window_start():
+    assert snippet_from(io.BytesIO(b"only three words"), 5, 8, [5]) is None
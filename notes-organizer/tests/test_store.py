@@ -0,0 +1,149 @@
+"""NoteStore: rescans and semantic search read notes without holding the store lock."""
+
+import threading
+
+import pytest
+
+from notes_organizer import store as store_module
+from notes_organizer.store import NoteStore
+
+
+def lock_is_free(lock) -> bool:
+    """Check from another thread whether the lock can be taken right now."""
+    acquired = []
+
+    def probe():
+        if lock.acquire(timeout=1):
+            acquired.append(True)
+            lock.release()
+
+    thread = threading.Thread(target=probe)
+    thread.start()
+    thread.join()
+    return bool(acquired)
+
+
+@pytest.fixture
+def store(notes_dir, index_dir, write_note):
+    for i in range(3):
+        write_note(f"note-{i}.md", f"# Note {i}\nAbout topic{i} and gardening\n")
+    return NoteStore(notes_dir, index_dir)
+
+
+@pytest.fixture
+def reads(store, monkeypatch):
+    """Record, for every note the store reads, whether the store lock was free meanwhile."""
+    seen = []
+    read_note_text = store_module.read_note_text
+
+    def checked(file_path):
+        seen.append((file_path.name, lock_is_free(store.lock)))
+        return read_note_text(file_path)
+
+    monkeypatch.setattr(store_module, "read_note_text", checked)
+    return seen
+
+
+def test_refresh_reads_notes_outside_the_lock(store, reads):
+    store.refresh()
+    assert sorted(reads) == [(f"note-{i}.md", True) for i in range(3)]
+    assert store.index.search("topic1") == {"note-1.md"}
+    assert store.metadata.get("note-2.md", store.stats["note-2.md"])["title"] == "Note 2"
+
+
+def test_refresh_drops_deleted_notes(store, notes_dir):
+    store.refresh()
+    (notes_dir / "note-0.md").unlink()
+    store.refresh()
+    assert "note-0.md" not in store.index.ids
+    assert sorted(store.stats) == ["note-1.md", "note-2.md"]
+
+
+def test_refresh_keeps_a_note_rewritten_while_it_was_read(store, notes_dir, monkeypatch):
+    read_note_text = store_module.read_note_text
+
+    def rewrite_first(file_path):
+        text = read_note_text(file_path)
+        if file_path.name == "note-0.md" and "topic0" in text:
+            # Another writer indexes a newer version before the rescan merges
+            file_path.write_text("# Note 0\nRewritten about orchids\n", encoding='utf-8')
+            store.note_changed("note-0.md")
+        return text
+
+    monkeypatch.setattr(store_module, "read_note_text", rewrite_first)
+    store.refresh()
+    assert store.index.search("orchids") == {"note-0.md"}
+    assert store.index.search("topic0") == set()
+
+
+def test_semantic_search_embeds_outside_the_lock(store, reads):
+    store.refresh()
+    reads.clear()
+    results = store.semantic_search("gardening topic2", 1)
+    assert sorted(reads) == [(f"note-{i}.md", True) for i in range(3)]
+    assert results[0]["file_name"] == "note-2.md"
+
+    # Unchanged notes are not embedded again
+    reads.clear()
+    store.semantic_search("gardening", 3)
+    assert reads == []
+
+
+def test_concurrent_creation_of_the_same_title(notes_dir, index_dir):
+    store = NoteStore(notes_dir, index_dir)
+    store.refresh()
+    content = "# Foo\n" + "body line\n" * 2000
+    barrier = threading.Barrier(16)
+    names = []
+
+    def create():
+        barrier.wait()
+        names.append(store.create_note("Foo", content))
+
+    threads = [threading.Thread(target=create) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(names)) == 16
+    assert sorted(names) == sorted(["Foo.md"] + [f"Foo-{i}.md" for i in range(1, 16)])
+    # Every note is complete and no temporary file is left behind
+    assert sorted(path.name for path in notes_dir.iterdir() if path.is_file()) == sorted(names)
+    assert all((notes_dir / name).read_text(encoding='utf-8') == content for name in names)
+    assert store.index.search("body line") == set(names)
+
+
+def test_suffix_follows_existing_notes(notes_dir, index_dir, write_note):
+    write_note("Foo.md", "# Foo\n")
+    write_note("Foo-3.md", "# Foo\n")
+    write_note("Foo-bar.md", "# Not a suffix\n")
+    store = NoteStore(notes_dir, index_dir)
+    store.refresh()
+    assert store.create_note("Foo", "# Foo again\n") == "Foo-4.md"
+    assert store.create_note("Foo-bar", "# Bar\n") == "Foo-bar-1.md"
+    assert store.create_note("New", "# New\n") == "New.md"
+
+
+def test_creation_skips_a_name_taken_behind_the_index(notes_dir, index_dir, write_note):
+    store = NoteStore(notes_dir, index_dir)
+    store.refresh()
+    assert store.create_note("Foo", "# One\n") == "Foo.md"
+    # Written by someone else and not yet seen by the index
+    write_note("Foo-1.md", "# Theirs\n")
+    assert store.create_note("Foo", "# Two\n") == "Foo-2.md"
+    assert (notes_dir / "Foo-1.md").read_text(encoding='utf-8') == "# Theirs\n"
+
+
+def test_failed_write_leaves_no_partial_file(notes_dir, index_dir, monkeypatch):
+    store = NoteStore(notes_dir, index_dir)
+    store.refresh()
+
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store_module.os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        store.create_note("Foo", "# Foo\n")
+    assert list(notes_dir.iterdir()) == []
+    assert "Foo.md" not in store.index.ids
@@ -0,0 +1,83 @@
+"""Timeline: bisect-based date ranges and newest-first pages."""
+
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+from notes_organizer.main import to_timestamp_ns
+from notes_organizer.timeline import Timeline
+
+# Two notes share t=200
+MTIMES = {"a.md": 100, "b.md": 200, "c.md": 200, "d.md": 300}
+
+
+@pytest.fixture
+def timeline() -> Timeline:
+    timeline = Timeline()
+    for file_name, mtime_ns in MTIMES.items():
+        timeline.update(file_name, mtime_ns)
+    return timeline
+
+
+def names(timeline, start_ns=None, end_ns=None, before=None) -> list[str]:
+    return [file_name for _, file_name in timeline.newest(start_ns, end_ns, before)]
+
+
+@pytest.mark.parametrize("start_ns, end_ns, expected", [
+    (None, None, ["d.md", "c.md", "b.md", "a.md"]),
+    # Both bounds are inclusive
+    (200, 200, ["c.md", "b.md"]),
+    (100, 300, ["d.md", "c.md", "b.md", "a.md"]),
+    # One nanosecond outside a note excludes it
+    (101, 299, ["c.md", "b.md"]),
+    (201, None, ["d.md"]),
+    (None, 199, ["a.md"]),
+    # Empty ranges
+    (301, None, []),
+    (None, 99, []),
+    (250, 260, []),
+    (300, 100, []),
+])
+def test_ranges(timeline, start_ns, end_ns, expected):
+    assert names(timeline, start_ns, end_ns) == expected
+    lo, hi = timeline.bounds(start_ns, end_ns)
+    assert hi - lo == len(expected)
+
+
+def test_pages_through_a_shared_timestamp(timeline):
+    assert names(timeline, before=(200, "c.md")) == ["b.md", "a.md"]
+    assert names(timeline, before=(200, "b.md")) == ["a.md"]
+    assert names(timeline, 200, 200, before=(200, "c.md")) == ["b.md"]
+    assert names(timeline, before=(100, "a.md")) == []
+    # A cursor whose note has since been deleted still splits the order
+    assert names(timeline, before=(250, "gone.md")) == ["c.md", "b.md", "a.md"]
+
+
+def test_update_moves_and_discard_removes(timeline):
+    timeline.update("a.md", 400)
+    assert names(timeline) == ["a.md", "d.md", "c.md", "b.md"]
+    timeline.discard("c.md")
+    timeline.discard("missing.md")
+    assert names(timeline, 200, 200) == ["b.md"]
+    assert len(timeline) == 3 and "c.md" not in timeline.mtimes
+
+
+def test_rebuild_matches_updates(timeline):
+    class Stat:
+        def __init__(self, mtime_ns):
+            self.st_mtime_ns = mtime_ns
+
+    rebuilt = Timeline()
+    rebuilt.rebuild([(file_name, Stat(mtime_ns)) for file_name, mtime_ns in MTIMES.items()])
+    assert rebuilt.keys == timeline.keys and rebuilt.mtimes == timeline.mtimes
+
+
+def test_date_filters_compare_with_file_times(write_note):
+    path = write_note("x.md", "x", mtime=1_700_000_000)
+    mtime_ns = os.stat(path).st_mtime_ns
+    moment = datetime.fromtimestamp(1_700_000_000, timezone.utc)
+    assert to_timestamp_ns(moment) == mtime_ns
+    timeline = Timeline()
+    timeline.update("x.md", mtime_ns)
+    assert names(timeline, to_timestamp_ns(moment), to_timestamp_ns(moment)) == ["x.md"]
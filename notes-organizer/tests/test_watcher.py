@@ -0,0 +1,124 @@
+"""NotesWatcher: changes reach the store under both backends without a rescan."""
+
+import os
+import time
+
+import pytest
+
+from notes_organizer import watcher
+from notes_organizer.store import NoteStore
+
+BACKENDS = [
+    pytest.param("inotify", marks=pytest.mark.skipif(watcher._load_libc() is None, reason="inotify is not available")),
+    "polling",
+]
+
+
+def wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("the watcher did not report the change in time")
+        time.sleep(0.01)
+
+
+@pytest.fixture(params=BACKENDS)
+def watched(request, notes_dir, index_dir, write_note, monkeypatch):
+    """A store watching a folder with one note; `rescans` counts refreshes after startup."""
+    if request.param == "polling":
+        monkeypatch.setattr(watcher, "_load_libc", lambda: None)
+    write_note("first.md", "# First\nAlpha content\n")
+    store = NoteStore(notes_dir, index_dir)
+    rescans = []
+    refresh = store.refresh
+
+    def counting_refresh(listing=None):
+        rescans.append(listing)
+        refresh(listing)
+
+    store.refresh = counting_refresh
+    assert store.start_watching(poll_interval=0.02, workers=1) == request.param
+    rescans.clear()
+    yield store, rescans
+    store.stop_watching()
+
+
+def listed(store) -> set[str]:
+    with store.lock:
+        return set(store.stats)
+
+
+def test_create(watched, write_note):
+    store, rescans = watched
+    write_note("second.md", "# Second\nBravo content\n")
+    wait_for(lambda: "second.md" in listed(store))
+    wait_for(lambda: store.index.search("bravo") == {"second.md"})
+    assert "second.md" in store.timeline.mtimes
+    assert rescans == []
+
+
+def test_modify(watched, write_note, notes_dir):
+    store, rescans = watched
+    write_note("first.md", "# First\nCharlie replaces the old content entirely\n")
+    wait_for(lambda: store.index.search("charlie") == {"first.md"})
+    assert store.index.search("alpha") == set()
+    assert store.stats["first.md"].st_size == (notes_dir / "first.md").stat().st_size
+    assert rescans == []
+
+
+def test_rename(watched, notes_dir):
+    store, rescans = watched
+    os.rename(notes_dir / "first.md", notes_dir / "renamed.md")
+    wait_for(lambda: listed(store) == {"renamed.md"})
+    wait_for(lambda: store.index.search("alpha") == {"renamed.md"})
+    assert "first.md" not in store.timeline.mtimes
+    assert rescans == []
+
+
+def test_delete(watched, notes_dir):
+    store, rescans = watched
+    (notes_dir / "first.md").unlink()
+    wait_for(lambda: listed(store) == set())
+    assert store.index.search("alpha") == set()
+    assert store.listing() == []
+    assert rescans == []
+
+
+def test_other_files_are_ignored(watched, notes_dir):
+    store, rescans = watched
+    (notes_dir / "draft.txt").write_text("not a note", encoding='utf-8')
+    (notes_dir / "later.md").write_text("# Later\n", encoding='utf-8')
+    wait_for(lambda: "later.md" in listed(store))
+    assert listed(store) == {"first.md", "later.md"}
+    assert rescans == []
+
+
+def event(mask: int, name: str = "") -> bytes:
+    encoded = name.encode('utf-8')
+    encoded += b"\0" * (-len(encoded) % 16 or 16) if name else b""
+    return watcher.EVENT_HEADER.pack(1, mask, 0, len(encoded)) + encoded
+
+
+def test_inotify_events_are_coalesced(notes_dir):
+    calls = []
+    notes_watcher = watcher.NotesWatcher(
+        notes_dir,
+        on_change=lambda name: calls.append(("change", name)),
+        on_delete=lambda name: calls.append(("delete", name)),
+        on_rescan=lambda: calls.append(("rescan",)),
+    )
+    data = b"".join([
+        event(watcher.IN_CLOSE_WRITE, "a.md"),
+        event(watcher.IN_CLOSE_WRITE, "a.md"),
+        event(watcher.IN_MOVED_FROM, "b.md"),
+        event(watcher.IN_MOVED_TO, "c.md"),
+        event(watcher.IN_CLOSE_WRITE, "c.md.swp"),
+        event(watcher.IN_DELETE, "a.md"),
+    ])
+    assert notes_watcher._handle_events(data) is False
+    assert calls == [("delete", "a.md"), ("delete", "b.md"), ("change", "c.md")]
+
+    calls.clear()
+    assert notes_watcher._handle_events(event(watcher.IN_CLOSE_WRITE, "a.md") + event(watcher.IN_Q_OVERFLOW)) is False
+    assert calls == [("rescan",)]
+    assert notes_watcher._handle_events(event(watcher.IN_DELETE_SELF)) is True
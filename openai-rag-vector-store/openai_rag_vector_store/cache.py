@@ -0,0 +1,90 @@
+"""
+LRU + TTL cache for retrieve_search_history results.
+
+Agents tend to repeat the same search; answering a repeat from memory skips
+the (paid) remote search entirely. Entries expire after a fixed time and the
+whole cache is dropped whenever documents are added, so a cached answer is
+never older than the last store. A search that was already running when the
+cache was dropped cannot put its (possibly outdated) answer back: callers
+read `generation` before searching and pass it to `put`, which discards the
+answer if the cache has been invalidated since.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class ResultCache:
+    """Thread-safe least-recently-used cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, max_entries: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Bumped by every invalidation
+        self.generation = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for a key, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self.clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """
+        Cache a value.
+
+        Args:
+            key: The cache key
+            value: The value to cache
+            generation: `generation` as read before the value was computed;
+                the value is discarded if the cache was invalidated since
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self) -> None:
+        """Drop every entry (e.g. because new documents were stored)."""
+        with self._lock:
+            if self._entries:
+                self._entries.clear()
+            self.generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
@@ -0,0 +1,272 @@
+"""
+Local mirror of the vector store for offline, low-latency recall.
+
+Every stored query is embedded locally with a hashed feature projection
+(word unigrams, word bigrams and character trigrams hashed into a fixed
+number of signed buckets), so neither storing nor searching needs an
+embeddings API call. The vectors live in a memory-mapped float32 matrix and
+the file ID, content and timestamp of each row in an append-only JSON Lines
+file next to it. A search is one matrix-vector product (cosine similarity of
+unit vectors) plus a vectorized date mask.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MATRIX_FILE = "vectors.f32"
+ENTRIES_FILE = "entries.jsonl"
+
+# Embedding width
+DIMENSIONS = 256
+
+# Rows the matrix file starts with; it doubles whenever it fills up
+INITIAL_CAPACITY = 1024
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def parse_timestamp(value: Optional[str]) -> float:
+    """
+    Convert an ISO 8601 timestamp to seconds since the epoch.
+
+    Timestamps without a timezone are taken as UTC (as written by
+    `datetime.utcnow().isoformat()`).
+
+    Returns:
+        float: The timestamp, or NaN if it is missing or invalid
+    """
+    if not value:
+        return math.nan
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return math.nan
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def hashed_features(text: str) -> Counter:
+    """Count the word, word-bigram and character-trigram features of some text."""
+    words = TOKEN_RE.findall(text.lower())
+    features = Counter(words)
+    features.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    for word in set(words):
+        padded = f"<{word}>"
+        features.update(f"#{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return features
+
+
+def embed(text: str) -> np.ndarray:
+    """Embed text into a unit-length hashed feature vector (all zeros for text without words)."""
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    features = hashed_features(text)
+    if not features:
+        return vector
+
+    hashes = np.fromiter(
+        (zlib.crc32(feature.encode('utf-8')) for feature in features),
+        dtype=np.uint32,
+        count=len(features),
+    )
+    weights = np.log1p(np.fromiter(features.values(), dtype=np.float32, count=len(features)))
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+    np.add.at(vector, (hashes % DIMENSIONS).astype(np.int64), signs * weights)
+
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+class LocalIndex:
+    """Memory-mapped matrix of stored query embeddings plus the metadata of each row."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.matrix: Optional[np.memmap] = None
+        self.capacity = 0
+        self.entries: List[Dict] = []
+        self.row_of: Dict[str, int] = {}
+        self.timestamps = np.empty(0, dtype=np.float64)
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return len(self.entries)
+
+    def __contains__(self, file_id: str) -> bool:
+        with self._lock:
+            self._load()
+            return file_id in self.row_of
+
+    def get(self, file_id: str) -> Optional[Dict]:
+        """Return the file_id, content and timestamp stored for a file, or None."""
+        with self._lock:
+            self._load()
+            row = self.row_of.get(file_id)
+            return None if row is None else self.entries[row]
+
+    def add(self, entries: List[Dict]) -> int:
+        """
+        Add stored documents to the index, skipping file IDs it already has.
+
+        Args:
+            entries: Dicts with `file_id`, `content` (the stored file's text),
+                `timestamp` and `text` (what to embed; defaults to the content)
+
+        Returns:
+            int: The number of documents added
+        """
+        with self._lock:
+            self._load()
+            new = {}
+            for entry in entries:
+                if entry["file_id"] not in self.row_of:
+                    new.setdefault(entry["file_id"], entry)
+            new = list(new.values())
+            if not new:
+                return 0
+
+            first_row = len(self.entries)
+            self._reserve(first_row + len(new))
+            for row, entry in enumerate(new, first_row):
+                self.matrix[row] = embed(entry.get("text") or entry["content"])
+            self.matrix.flush()
+
+            # Rows are written before their metadata, so a crash never leaves
+            # metadata pointing at an unwritten row
+            records = [
+                {"file_id": entry["file_id"], "content": entry["content"], "timestamp": entry.get("timestamp") or ""}
+                for entry in new
+            ]
+            with open(os.path.join(self.directory, ENTRIES_FILE), 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._append(records)
+            return len(new)
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> List[Dict]:
+        """
+        Find the stored documents most similar to a query.
+
+        Args:
+            query: The search text
+            limit: Maximum number of results
+            start: Only documents timestamped at or after this (epoch seconds)
+            end: Only documents timestamped at or before this (epoch seconds)
+
+        Returns:
+            list: Dicts with file_id, file_content, timestamp and similarity_score,
+            most similar first; documents sharing no feature with the query are left out
+        """
+        with self._lock:
+            self._load()
+            count = len(self.entries)
+            if not count or limit <= 0:
+                return []
+            scores = self.matrix[:count] @ embed(query)
+            timestamps = self.timestamps[:count]
+            entries = self.entries
+
+        mask = scores > 0
+        if start is not None:
+            mask &= timestamps >= start
+        if end is not None:
+            mask &= timestamps <= end
+        candidates = np.flatnonzero(mask)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+
+        return [
+            {
+                "file_id": entries[row]["file_id"],
+                "file_content": entries[row]["content"],
+                "timestamp": entries[row]["timestamp"],
+                "similarity_score": float(scores[row])
+            }
+            for row in candidates
+        ]
+
+    def _load(self) -> None:
+        if self.loaded:
+            return
+        self.loaded = True
+        os.makedirs(self.directory, exist_ok=True)
+
+        entries_path = os.path.join(self.directory, ENTRIES_FILE)
+        records = []
+        torn = False
+        try:
+            with open(entries_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        torn = True
+                        break
+        except FileNotFoundError:
+            pass
+        if torn:
+            # A torn final line is expected after a crash; drop it so later appends stay readable
+            logger.warning(f"Dropping an unreadable local index entry in {self.directory}")
+            tmp_path = entries_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, entries_path)
+
+        matrix_path = os.path.join(self.directory, MATRIX_FILE)
+        rows = os.path.getsize(matrix_path) // (DIMENSIONS * 4) if os.path.exists(matrix_path) else 0
+        if rows < len(records):
+            logger.warning(f"Local index {self.directory} is missing vectors; keeping the first {rows} entries")
+            records = records[:rows]
+        self._reserve(max(len(records), rows, 1))
+        self._append(records)
+
+    def _append(self, records: List[Dict]) -> None:
+        first_row = len(self.entries)
+        self.entries.extend(records)
+        for row, record in enumerate(records, first_row):
+            self.row_of[record["file_id"]] = row
+        self.timestamps = np.concatenate([
+            self.timestamps,
+            np.array([parse_timestamp(record["timestamp"]) for record in records], dtype=np.float64)
+        ])
+
+    def _reserve(self, rows: int) -> None:
+        """Make the matrix file hold at least `rows` rows."""
+        if rows <= self.capacity:
+            return
+        capacity = max(INITIAL_CAPACITY, self.capacity)
+        while capacity < rows:
+            capacity *= 2
+        matrix_path = os.path.join(self.directory, MATRIX_FILE)
+        if self.matrix is not None:
+            self.matrix.flush()
+        with open(matrix_path, 'ab') as f:
+            f.truncate(max(capacity * DIMENSIONS * 4, os.path.getsize(matrix_path)))
+        capacity = os.path.getsize(matrix_path) // (DIMENSIONS * 4)
+        self.matrix = np.memmap(matrix_path, dtype=np.float32, mode='r+', shape=(capacity, DIMENSIONS))
+        self.capacity = capacity
@@ -6,16 +6,24 @@ to persist and retrieve search query histories with semantic search capabilities
 """
 
 import os
+import io
 import json
+import asyncio
 import logging
-import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Callable, Optional, List, Dict, Union
 from dotenv import load_dotenv
 from openai import OpenAI
 from mcp.server.fastmcp import FastMCP
 import numpy as np
 
+from openai_rag_vector_store.cache import ResultCache
+from openai_rag_vector_store.local_index import LocalIndex, parse_timestamp
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -36,15 +44,66 @@ client = OpenAI(api_key=OPENAI_API_KEY)
 # Vector store configuration
 VECTOR_STORE_NAME = "search-history-vector-store"
 vector_store_id = None
+_vector_store_lock = threading.Lock()
+
+# Ingestion configuration
+# Files uploaded at once when storing a batch of queries
+UPLOAD_CONCURRENCY = 8
+# Most files attached to the vector store by one file-batch request
+MAX_FILE_BATCH = 500
+# Most queries accepted by one store_search_queries call
+MAX_BATCH_QUERIES = 500
+# Concurrent store_search_query calls arriving within this many seconds of
+# each other are uploaded together, up to WRITE_BEHIND_MAX_DOCUMENTS at a time
+WRITE_BEHIND_DELAY = 0.05
+WRITE_BEHIND_MAX_DOCUMENTS = 100
+
+# Each stored file carries its timestamp (seconds since the epoch) under this
+# attribute, so date ranges are filtered by the vector store search itself
+TIMESTAMP_ATTRIBUTE = "timestamp"
+# Most results one vector store search can return
+MAX_SEARCH_RESULTS = 50
+# Set once every file in the vector store is known to carry TIMESTAMP_ATTRIBUTE;
+# until then date-filtered searches also look for files stored without it
+timestamps_labeled = False
+
+# Local mirror of the vector store, searched without a network round-trip
+LOCAL_INDEX_DIR = os.getenv(
+    "LOCAL_INDEX_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "openai-rag-vector-store", VECTOR_STORE_NAME)
+)
+local_index = LocalIndex(LOCAL_INDEX_DIR)
+# Set once the local index holds every file in the vector store
+local_index_synced = False
+# Stored queries are written to the local index in the background, those
+# stored within this many seconds of each other together
+MIRROR_DELAY = 0.5
+# Where retrieve_search_history can search: "auto" uses the local index once
+# it is synced (and whenever the vector store cannot be reached)
+SEARCH_SOURCES = ("auto", "local", "remote")
+
+# Repeated retrieve_search_history calls are answered from memory for this
+# many seconds, or until a query is stored
+SEARCH_CACHE_SIZE = 256
+SEARCH_CACHE_TTL = 300.0
+search_cache = ResultCache(SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL)
 
 
 def get_or_create_vector_store() -> str:
     """Get existing vector store or create a new one."""
-    global vector_store_id
-    
     if vector_store_id:
         return vector_store_id
     
+    # Stores run on worker threads; make sure only one of them creates the store
+    with _vector_store_lock:
+        if vector_store_id:
+            return vector_store_id
+        return _find_or_create_vector_store()
+
+
+def _find_or_create_vector_store() -> str:
+    global vector_store_id, timestamps_labeled
+    
     try:
         # List existing vector stores
         vector_stores = client.vector_stores.list()
@@ -60,6 +119,8 @@ def get_or_create_vector_store() -> str:
             name=VECTOR_STORE_NAME
         )
         vector_store_id = vector_store.id
+        # Every file in a new store is stored with its timestamp attribute
+        timestamps_labeled = True
         logger.info(f"Created new vector store: {vector_store_id}")
         return vector_store_id
         
@@ -68,80 +129,459 @@ def get_or_create_vector_store() -> str:
         raise
 
 
-def store_search_query_handler(query: str, context: Optional[str] = None, timestamp: Optional[str] = None) -> dict:
+@dataclass
+class SearchDocument:
+    """A search query as stored in the vector store: one small text file."""
+    query: str
+    context: Optional[str]
+    timestamp: str
+    
+    @property
+    def filename(self) -> str:
+        """A filename with metadata (query truncated for filename limits)."""
+        safe_query = self.query[:50].replace('/', '_').replace('\\', '_')
+        return f"{self.timestamp}___{safe_query}.txt"
+    
+    @property
+    def content(self) -> str:
+        return f"""Query: {self.query}
+Context: {self.context or ""}
+Timestamp: {self.timestamp}
+
+Search query stored for semantic search and retrieval."""
+    
+    @property
+    def search_text(self) -> str:
+        """The part of the document worth embedding (without the fixed labels and footer)."""
+        return f"{self.query}\n{self.context or ''}"
+    
+    @property
+    def attributes(self) -> Dict[str, float]:
+        """The vector store file attributes (none if the timestamp is not ISO 8601)."""
+        timestamp = parse_timestamp(self.timestamp)
+        if timestamp != timestamp:  # NaN
+            return {}
+        return {TIMESTAMP_ATTRIBUTE: timestamp}
+
+
+def parse_document(content: str) -> SearchDocument:
+    """Recover the query, context and timestamp from the text of a stored document."""
+    head, _, _ = content.partition("\n\nSearch query stored for semantic search and retrieval.")
+    head, _, timestamp = head.rpartition("\nTimestamp: ")
+    query, _, context = head.partition("\nContext: ")
+    if query.startswith("Query: "):
+        query = query[len("Query: "):]
+    return SearchDocument(query, context or None, timestamp.strip())
+
+
+def make_document(query: str, context: Optional[str] = None, timestamp: Optional[str] = None) -> SearchDocument:
+    """Build the document for a query, timestamped now unless a timestamp is given."""
+    # Use current timestamp if not provided
+    if not timestamp:
+        timestamp = datetime.utcnow().isoformat()
+    return SearchDocument(query, context, timestamp)
+
+
+def upload_document(document: SearchDocument) -> str:
     """
-    Store a search query into OpenAI Vector Store.
+    Upload a document's file to OpenAI (without adding it to the vector store).
+    
+    The body is streamed from memory under the metadata-rich filename, so
+    storing a query does no local disk I/O.
+    
+    Returns:
+        str: The uploaded file's ID
+    """
+    file = client.files.create(
+        file=(document.filename, io.BytesIO(document.content.encode('utf-8')), 'text/plain'),
+        purpose='assistants',
+    )
+    return file.id
+
+
+def store_documents(documents: List[SearchDocument]) -> List[Union[str, Exception]]:
+    """
+    Store many documents with as few round-trips as possible.
+    
+    The files are uploaded UPLOAD_CONCURRENCY at a time, then added to the
+    vector store with one file-batch request per MAX_FILE_BATCH files instead
+    of one request each. Every file is attached with its document's
+    attributes.
     
     Args:
-        query: The search query text to store
-        context: Additional context or metadata about the search (can include the answer/result)
-        timestamp: ISO 8601 timestamp (defaults to current time)
+        documents: The documents to store
     
     Returns:
-        dict: Confirmation with vector store ID and file ID
+        For each document, in order, its file ID or the error that prevented
+        storing it
     """
+    if not documents:
+        return []
     try:
-        # Get or create vector store
         vs_id = get_or_create_vector_store()
-        
-        # Use current timestamp if not provided
-        if not timestamp:
-            timestamp = datetime.utcnow().isoformat()
-        
-        # Create a filename with metadata (query truncated for filename limits)
-        safe_query = query[:50].replace('/', '_').replace('\\', '_')
-        filename = f"{timestamp}___{safe_query}.txt"
-        
-        # Prepare document content
-        document_content = f"""Query: {query}
-Context: {context or ""}
-Timestamp: {timestamp}
+    except Exception as e:
+        return [e] * len(documents)
+    
+    def upload(document: SearchDocument) -> Union[str, Exception]:
+        try:
+            return upload_document(document)
+        except Exception as e:
+            return e
+    
+    with ThreadPoolExecutor(max_workers=min(UPLOAD_CONCURRENCY, len(documents))) as pool:
+        results: List[Union[str, Exception]] = list(pool.map(upload, documents))
+    
+    uploaded = [i for i, result in enumerate(results) if isinstance(result, str)]
+    for start in range(0, len(uploaded), MAX_FILE_BATCH):
+        chunk = uploaded[start:start + MAX_FILE_BATCH]
+        file_ids = [results[i] for i in chunk]
+        try:
+            client.vector_stores.file_batches.create(
+                vector_store_id=vs_id,
+                files=[
+                    {"file_id": results[i], "attributes": documents[i].attributes}
+                    for i in chunk
+                ]
+            )
+        except Exception as e:
+            logger.error(f"Error adding {len(file_ids)} files to the vector store: {str(e)}")
+            for i in chunk:
+                results[i] = e
+            _delete_files(file_ids)
+    
+    stored = sum(1 for result in results if isinstance(result, str))
+    logger.info(f"Stored {stored} of {len(documents)} queries in vector store {vs_id}")
+    mirror_documents(documents, results)
+    if stored:
+        search_cache.invalidate()
+    return results
 
-Search query stored for semantic search and retrieval."""
-        
-        # Create a temporary file with the query content
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, encoding='utf-8') as tmp_file:
-            tmp_file.write(document_content)
-            tmp_file_path = tmp_file.name
-        
+
+def mirror_documents(documents: List[SearchDocument], results: List[Union[str, Exception]]) -> None:
+    """
+    Queue stored documents for the local index.
+    
+    The mirror writer adds them in the background, so a store never waits
+    for the local index's disk writes.
+    """
+    entries = [
+        {
+            "file_id": result,
+            "content": document.content,
+            "timestamp": document.timestamp,
+            "text": document.search_text
+        }
+        for document, result in zip(documents, results)
+        if isinstance(result, str)
+    ]
+    if entries:
+        mirror_writer.submit(entries)
+
+
+def write_mirror(entries: List[Dict]) -> None:
+    """
+    Add queued documents to the local index (run by the mirror writer).
+    
+    A failure here never fails a store. The local index is then missing
+    documents, so "auto" searches go back to the vector store until a sync
+    has copied them.
+    """
+    global local_index_synced
+    try:
+        local_index.add(entries)
+    except Exception as e:
+        local_index_synced = False
+        logger.warning(f"Failed to add stored queries to the local index (searching the vector store until it is synced): {str(e)}")
+
+
+def sync_local_index() -> int:
+    """
+    Copy the documents the local index is missing from the vector store (e.g.
+    stored before it existed or from another machine). Once every document
+    has been copied, "auto" searches are served locally. Files stored
+    without TIMESTAMP_ATTRIBUTE are labeled along the way.
+    
+    Returns:
+        int: The number of documents added to the local index
+    """
+    global local_index_synced
+    # Documents still queued for the mirror are not fetched again
+    mirror_writer.drain()
+    vs_id = get_or_create_vector_store()
+    files = list(client.vector_stores.files.list(vector_store_id=vs_id, limit=100))
+    missing = [file.id for file in files if file.id not in local_index]
+    
+    def fetch(file_id: str) -> Optional[Dict]:
         try:
-            # Upload file to OpenAI for use with assistants/vector stores
-            with open(tmp_file_path, 'rb') as file_data:
-                # Upload with the metadata-rich filename
-                original_name = tmp_file_path
-                renamed_path = tmp_file_path.replace(os.path.basename(tmp_file_path), filename)
-                os.rename(tmp_file_path, renamed_path)
-                
-                with open(renamed_path, 'rb') as renamed_file:
-                    file = client.files.create(
-                        file=renamed_file,
-                        purpose='assistants',
+            content = "".join(
+                item.text
+                for item in client.vector_stores.files.content(file_id=file_id, vector_store_id=vs_id)
+                if item.type == 'text'
+            )
+        except Exception as e:
+            logger.warning(f"Failed to fetch {file_id} for the local index: {str(e)}")
+            return None
+        document = parse_document(content)
+        return {"file_id": file_id, "content": content, "timestamp": document.timestamp, "text": document.search_text}
+    
+    entries = []
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(UPLOAD_CONCURRENCY, len(missing))) as pool:
+            entries = list(pool.map(fetch, missing))
+    added = local_index.add([entry for entry in entries if entry is not None])
+    if added == len(missing):
+        local_index_synced = True
+    label_timestamps(vs_id, files)
+    # "auto" searches may now be answered by the local index instead
+    search_cache.invalidate()
+    logger.info(f"Local index synced: {added} of {len(missing)} missing documents added ({len(local_index)} total)")
+    return added
 
-                    )
-            
-            # Add file to vector store
-            vector_store_file = client.vector_stores.files.create(
+
+def label_timestamps(vs_id: str, files: List) -> int:
+    """
+    Give vector store files stored before timestamps were file attributes their
+    TIMESTAMP_ATTRIBUTE, read from the local index. Once every file has it,
+    date-filtered searches stop looking for unlabeled files.
+    
+    Args:
+        vs_id: The vector store ID
+        files: The vector store's files (as listed by the API)
+    
+    Returns:
+        int: The number of files labeled
+    """
+    global timestamps_labeled
+    unlabeled = [file for file in files if TIMESTAMP_ATTRIBUTE not in (file.attributes or {})]
+    
+    def label(file) -> Optional[bool]:
+        entry = local_index.get(file.id)
+        if entry is None:
+            return None
+        timestamp = parse_timestamp(entry["timestamp"])
+        if timestamp != timestamp:  # NaN: an undated document never matches a date range
+            return False
+        try:
+            client.vector_stores.files.update(
+                file.id,
                 vector_store_id=vs_id,
-                file_id=file.id
+                attributes={**(file.attributes or {}), TIMESTAMP_ATTRIBUTE: timestamp}
             )
+        except Exception as e:
+            logger.warning(f"Failed to label {file.id} with its timestamp: {str(e)}")
+            return None
+        return True
+    
+    outcomes = []
+    if unlabeled:
+        with ThreadPoolExecutor(max_workers=min(UPLOAD_CONCURRENCY, len(unlabeled))) as pool:
+            outcomes = list(pool.map(label, unlabeled))
+    if None not in outcomes:
+        timestamps_labeled = True
+    labeled = outcomes.count(True)
+    if unlabeled:
+        logger.info(f"Labeled {labeled} of {len(unlabeled)} vector store files with their timestamps")
+    return labeled
+
+
+def _delete_files(file_ids: List[str]) -> None:
+    """Best-effort removal of uploaded files that never made it into the vector store."""
+    for file_id in file_ids:
+        try:
+            client.files.delete(file_id)
+        except Exception as e:
+            logger.warning(f"Failed to delete orphaned file {file_id}: {str(e)}")
+
+
+class WriteBehindBuffer:
+    """
+    Collects documents from concurrent stores and writes them together.
+    
+    `submit` queues a document and returns a future for its file ID. A
+    background thread waits until `max_delay` seconds after the first queued
+    document (or until `max_documents` are queued), then stores everything
+    queued with a single `store_documents` call, so a burst of
+    `store_search_query` calls costs one file-batch request instead of one
+    request per query.
+    """
+    
+    def __init__(
+        self,
+        write: Callable[[List[SearchDocument]], List[Union[str, Exception]]],
+        max_documents: int = WRITE_BEHIND_MAX_DOCUMENTS,
+        max_delay: float = WRITE_BEHIND_DELAY
+    ):
+        self.write = write
+        self.max_documents = max_documents
+        self.max_delay = max_delay
+        self._pending: List[tuple] = []
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+    
+    def submit(self, document: SearchDocument) -> Future:
+        """Queue a document; the future resolves to its file ID or raises the store error."""
+        future: Future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The write buffer is closed")
+            self._pending.append((document, future))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return future
+    
+    def close(self) -> None:
+        """Write out whatever is queued and stop the background thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+    
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                deadline = time.monotonic() + self.max_delay
+                while len(self._pending) < self.max_documents and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._pending[:self.max_documents]
+                del self._pending[:self.max_documents]
             
-            logger.info(f"Stored query '{query}' with file ID: {file.id}")
-            
-            return {
-                "success": True,
-                "message": "Search query stored successfully in OpenAI Vector Store",
-                "vector_store_id": vs_id,
-                "file_id": file.id,
-                "query": query,
-                "timestamp": timestamp
-            }
+            try:
+                results = self.write([document for document, _ in batch])
+            except Exception as e:
+                results = [e] * len(batch)
+            for (_, future), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+class MirrorWriter:
+    """
+    Adds stored documents to the local index on a background thread.
+    
+    `submit` only queues the entries. The thread waits until `max_delay`
+    seconds after the first queued entry, then writes everything queued with
+    a single `write` call, so a burst of stores costs one matrix flush and
+    one append to the entries file. `drain` waits for everything queued so
+    far (without the delay), for readers of the local index.
+    """
+    
+    def __init__(self, write: Callable[[List[Dict]], None], max_delay: float = MIRROR_DELAY):
+        self.write = write
+        self.max_delay = max_delay
+        self._pending: List[Dict] = []
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        # Entries queued and written so far, and threads waiting in drain
+        self._submitted = 0
+        self._written = 0
+        self._draining = 0
+    
+    def submit(self, entries: List[Dict]) -> None:
+        """Queue entries for the local index."""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The mirror writer is closed")
+            self._pending.extend(entries)
+            self._submitted += len(entries)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="local-index-mirror", daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+    
+    def drain(self) -> None:
+        """Wait until every entry queued so far has been written (or has failed to)."""
+        with self._condition:
+            target = self._submitted
+            self._draining += 1
+            self._condition.notify_all()
+            try:
+                while self._written < target:
+                    self._condition.wait()
+            finally:
+                self._draining -= 1
+    
+    def close(self) -> None:
+        """Write out whatever is queued and stop the background thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+    
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                deadline = time.monotonic() + self.max_delay
+                while not self._draining and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch, self._pending = self._pending, []
+                submitted = self._submitted
             
-        finally:
-            # Clean up temporary files
-            if os.path.exists(tmp_file_path):
-                os.remove(tmp_file_path)
-            if 'renamed_path' in locals() and os.path.exists(renamed_path):
-                os.remove(renamed_path)
+            try:
+                self.write(batch)
+            except Exception as e:
+                logger.error(f"Error writing {len(batch)} documents to the local index: {str(e)}")
+            with self._condition:
+                self._written = submitted
+                self._condition.notify_all()
+
+
+write_buffer = WriteBehindBuffer(store_documents)
+mirror_writer = MirrorWriter(write_mirror)
+
+
+def store_search_query_handler(query: str, context: Optional[str] = None, timestamp: Optional[str] = None) -> dict:
+    """
+    Store a search query into OpenAI Vector Store.
+    
+    The query goes through the write-behind buffer, so queries stored
+    concurrently share their round-trips to the vector store.
+    
+    Args:
+        query: The search query text to store
+        context: Additional context or metadata about the search (can include the answer/result)
+        timestamp: ISO 8601 timestamp (defaults to current time)
+    
+    Returns:
+        dict: Confirmation with vector store ID and file ID
+    """
+    try:
+        document = make_document(query, context, timestamp)
+        file_id = write_buffer.submit(document).result()
+        
+        logger.info(f"Stored query '{query}' with file ID: {file_id}")
+        
+        return {
+            "success": True,
+            "message": "Search query stored successfully in OpenAI Vector Store",
+            "vector_store_id": vector_store_id,
+            "file_id": file_id,
+            "query": query,
+            "timestamp": document.timestamp
+        }
                 
     except Exception as e:
         logger.error(f"Error storing search query: {str(e)}")
@@ -152,109 +592,293 @@ Search query stored for semantic search and retrieval."""
         }
 
 
+def store_search_queries_handler(queries: List[dict]) -> dict:
+    """
+    Store a batch of search queries into OpenAI Vector Store.
+    
+    Invalid entries are reported and skipped; the valid ones are uploaded
+    concurrently and added to the vector store with file-batch requests.
+    
+    Args:
+        queries: Objects with `query` and optional `context` and `timestamp`
+    
+    Returns:
+        dict: How many queries were stored and failed, and a result per query
+    """
+    if len(queries) > MAX_BATCH_QUERIES:
+        return {
+            "success": False,
+            "error": "Validation Error",
+            "message": f"At most {MAX_BATCH_QUERIES} queries can be stored per call (got {len(queries)})"
+        }
+    
+    results: List[Optional[dict]] = [None] * len(queries)
+    documents = []
+    positions = []
+    for i, entry in enumerate(queries):
+        query = entry.get("query") if isinstance(entry, dict) else None
+        if not isinstance(query, str) or not query.strip():
+            results[i] = {
+                "index": i,
+                "success": False,
+                "error": "Validation Error",
+                "message": "query is required and cannot be empty"
+            }
+            continue
+        documents.append(make_document(query, entry.get("context") or None, entry.get("timestamp") or None))
+        positions.append(i)
+    
+    for i, document, outcome in zip(positions, documents, store_documents(documents)):
+        if isinstance(outcome, Exception):
+            results[i] = {
+                "index": i,
+                "success": False,
+                "error": str(outcome),
+                "message": "Failed to store search query"
+            }
+        else:
+            results[i] = {
+                "index": i,
+                "success": True,
+                "file_id": outcome,
+                "query": document.query,
+                "timestamp": document.timestamp
+            }
+    
+    stored = sum(1 for result in results if result["success"])
+    return {
+        "success": stored > 0 or not queries,
+        "message": f"Stored {stored} of {len(queries)} search queries",
+        "vector_store_id": vector_store_id,
+        "stored": stored,
+        "failed": len(queries) - stored,
+        "results": results
+    }
+
+
+def parse_date_filter(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a start_date/end_date filter into seconds since the epoch.
+    
+    Raises:
+        ValueError: If the date is not ISO 8601
+    """
+    if not value:
+        return None
+    timestamp = parse_timestamp(value)
+    if timestamp != timestamp:  # NaN
+        raise ValueError(f"Invalid date: {value} (expected ISO 8601, e.g. '2025-01-01')")
+    return timestamp
+
+
+def date_filter(start: Optional[float] = None, end: Optional[float] = None) -> Optional[dict]:
+    """Build the vector store search filter for a date range (None if it is unbounded)."""
+    comparisons = []
+    if start is not None:
+        comparisons.append({"type": "gte", "key": TIMESTAMP_ATTRIBUTE, "value": start})
+    if end is not None:
+        comparisons.append({"type": "lte", "key": TIMESTAMP_ATTRIBUTE, "value": end})
+    if len(comparisons) < 2:
+        return comparisons[0] if comparisons else None
+    return {"type": "and", "filters": comparisons}
+
+
+def search_result(result) -> dict:
+    """Turn a vector store search result into a retrieve_search_history result."""
+    # Extract content from search result
+    file_content = ""
+    if hasattr(result, 'content') and result.content:
+        for content_item in result.content:
+            if content_item.type == 'text':
+                file_content += content_item.text
+    
+    # Parse timestamp from content
+    timestamp = ""
+    for line in file_content.split('\n'):
+        if line.startswith('Timestamp: '):
+            timestamp = line.replace('Timestamp: ', '', 1)
+    
+    return {
+        "file_id": result.file_id,
+        "file_content": file_content,
+        "timestamp": timestamp,
+        "similarity_score": result.score
+    }
+
+
+def remote_search(
+    search_term: str,
+    limit: int,
+    start: Optional[float] = None,
+    end: Optional[float] = None
+) -> List[dict]:
+    """
+    Search the OpenAI vector store.
+    
+    A date range is pushed down to the vector store as a filter on
+    TIMESTAMP_ATTRIBUTE, so every result returned is in range and counts
+    towards `limit`. Until every file is known to carry that attribute, a
+    short answer is topped up with unlabeled files found by `search_unlabeled`.
+    
+    Args:
+        search_term: The search text
+        limit: Maximum number of results
+        start: Only documents timestamped at or after this (epoch seconds)
+        end: Only documents timestamped at or before this (epoch seconds)
+    
+    Returns:
+        list: Result dicts, most similar first
+    """
+    vs_id = get_or_create_vector_store()
+    filters = date_filter(start, end)
+    if filters is None:
+        search_results = client.vector_stores.search(
+            vector_store_id=vs_id,
+            query=search_term,
+            max_num_results=limit
+        )
+        return [search_result(result) for result in search_results.data]
+    
+    search_results = client.vector_stores.search(
+        vector_store_id=vs_id,
+        query=search_term,
+        filters=filters,
+        max_num_results=limit
+    )
+    results = [search_result(result) for result in search_results.data]
+    if len(results) < limit and not timestamps_labeled:
+        results += search_unlabeled(vs_id, search_term, limit, start, end)
+        results.sort(key=lambda result: result["similarity_score"], reverse=True)
+    return results[:limit]
+
+
+def search_unlabeled(
+    vs_id: str,
+    search_term: str,
+    limit: int,
+    start: Optional[float] = None,
+    end: Optional[float] = None
+) -> List[dict]:
+    """
+    Find in-range files stored without TIMESTAMP_ATTRIBUTE, which a filtered
+    search never returns.
+    
+    Their dates are only in their text, so this searches without a filter,
+    keeps the unlabeled results whose Timestamp line is in range and asks for
+    more results (up to MAX_SEARCH_RESULTS) until `limit` of them are found.
+    """
+    requested = min(2 * limit, MAX_SEARCH_RESULTS)
+    while True:
+        search_results = client.vector_stores.search(
+            vector_store_id=vs_id,
+            query=search_term,
+            max_num_results=requested
+        )
+        matches = []
+        for result in search_results.data:
+            if TIMESTAMP_ATTRIBUTE in (result.attributes or {}):
+                continue
+            entry = search_result(result)
+            timestamp = parse_timestamp(entry["timestamp"])
+            if timestamp != timestamp:  # NaN
+                continue
+            if (start is None or timestamp >= start) and (end is None or timestamp <= end):
+                matches.append(entry)
+        # Not every client version reports has_more; a full page may have more behind it
+        has_more = getattr(search_results, "has_more", len(search_results.data) >= requested)
+        if len(matches) >= limit or not has_more or requested >= MAX_SEARCH_RESULTS:
+            return matches[:limit]
+        requested = min(4 * requested, MAX_SEARCH_RESULTS)
+
+
 def retrieve_search_history_handler(
     search_term: Optional[str] = None,
     limit: int = 10,
     start_date: Optional[str] = None,
-    end_date: Optional[str] = None
+    end_date: Optional[str] = None,
+    source: str = "auto"
 ) -> dict:
     """
-    Retrieve and search through stored query history using OpenAI Vector Store.
+    Retrieve and search through stored query history.
+    
+    Searches the local index (see local_index.py) or the OpenAI Vector Store.
     
     Args:
         search_term: Query to search for similar past searches
         limit: Maximum number of results to return (default: 10)
         start_date: ISO 8601 date to filter results from
         end_date: ISO 8601 date to filter results until
+        source: "local", "remote", or "auto" (default): local once the local
+            index is synced with the vector store, otherwise remote with the
+            local index as a fallback when the vector store cannot be reached
     
     Returns:
-        dict: Search results with file_id, file_content (full text), timestamp, and similarity scores
+        dict: Search results with file_id, file_content (full text), timestamp, and similarity scores,
+        the source that answered and whether the response came from the result cache
     """
+    # Both the local index and the vector store search API need a search_term
+    if not search_term:
+        return {
+            "success": False,
+            "results": [],
+            "count": 0,
+            "message": "search_term is required to retrieve search history"
+        }
+    
+    if source not in SEARCH_SOURCES:
+        return {
+            "success": False,
+            "error": "Validation Error",
+            "message": f"Invalid source: {source} (expected one of {', '.join(SEARCH_SOURCES)})"
+        }
     try:
-        # Get or create vector store
-        vs_id = get_or_create_vector_store()
-        
-        # Use vector store search API (requires search_term)
-        if not search_term:
-            return {
-                "success": False,
-                "results": [],
-                "count": 0,
-                "message": "search_term is required to retrieve search history"
-            }
-        
-        try:
-            # Use OpenAI's vector store search API
-            search_results = client.vector_stores.search(
-                vector_store_id=vs_id,
-                query=search_term,
-                max_num_results=limit
-            )
-            
-            # Process search results and extract content directly
-            results = []
-            for result in search_results.data:
-                # Extract content from search result
-                file_content = ""
-                if hasattr(result, 'content') and result.content:
-                    for content_item in result.content:
-                        if content_item.type == 'text':
-                            file_content += content_item.text
-                
-                # Parse timestamp from content
-                timestamp = ""
-                
-                for line in file_content.split('\n'):
-                    if line.startswith('Timestamp: '):
-                        timestamp = line.replace('Timestamp: ', '', 1)
-                
-                # Apply date filtering if specified
-                if timestamp and (start_date or end_date):
-                    try:
-                        entry_timestamp = datetime.fromisoformat(timestamp)
-                        
-                        if start_date:
-                            start_dt = datetime.fromisoformat(start_date)
-                            if entry_timestamp < start_dt:
-                                continue
-                        
-                        if end_date:
-                            end_dt = datetime.fromisoformat(end_date)
-                            if entry_timestamp > end_dt:
-                                continue
-                    except ValueError:
-                        logger.warning(f"Invalid timestamp format: {timestamp}")
-                        continue
-                
-                results.append({
-                    "file_id": result.file_id,
-                    "file_content": file_content,
-                    "timestamp": timestamp,
-                    "similarity_score": result.score
-                })
-            
-            return {
-                "success": True,
-                "results": results,
-                "count": len(results),
-                "message": f"Retrieved {len(results)} search queries matching '{search_term}'"
-            }
-            
-        except Exception as e:
-            logger.error(f"Error performing vector store search: {str(e)}")
-            return {
-                "success": False,
-                "error": str(e),
-                "message": f"Failed to perform search. Error: {str(e)}"
-            }
-        
-    except Exception as e:
-        logger.error(f"Error retrieving search history: {str(e)}")
+        start = parse_date_filter(start_date)
+        end = parse_date_filter(end_date)
+    except ValueError as e:
         return {
             "success": False,
-            "error": str(e),
-            "message": "Failed to retrieve search history. Please check your OpenAI API key and try again."
+            "error": "Validation Error",
+            "message": str(e)
         }
+    
+    cache_key = (" ".join(search_term.lower().split()), limit, start, end, source)
+    # Read before searching, so a store that lands mid-search keeps this answer out of the cache
+    generation = search_cache.generation
+    cached = search_cache.get(cache_key)
+    if cached is not None:
+        return {**cached, "cached": True}
+    
+    # Stored queries still queued for the local index are written first
+    mirror_writer.drain()
+    use_local = source == "local" or (source == "auto" and local_index_synced)
+    fallback = False
+    if not use_local:
+        try:
+            results = remote_search(search_term, limit, start, end)
+        except Exception as e:
+            logger.error(f"Error performing vector store search: {str(e)}")
+            if source == "remote" or not len(local_index):
+                return {
+                    "success": False,
+                    "error": str(e),
+                    "message": f"Failed to perform search. Error: {str(e)}"
+                }
+            logger.warning("Answering from the local index instead")
+            use_local = fallback = True
+    if use_local:
+        results = local_index.search(search_term, limit, start, end)
+    
+    response = {
+        "success": True,
+        "results": results,
+        "count": len(results),
+        "source": "local" if use_local else "remote",
+        "message": f"Retrieved {len(results)} search queries matching '{search_term}'"
+    }
+    # An offline fallback is not cached, so the next call tries the vector store again
+    if not fallback:
+        search_cache.put(cache_key, response, generation)
+    return {**response, "cached": False}
 
 
 # Create FastMCP Server
@@ -262,7 +886,7 @@ mcp = FastMCP("openai-rag-vector-store")
 
 
 @mcp.tool()
-def store_search_query(query: str, context: str = "", timestamp: str = "") -> dict:
+async def store_search_query(query: str, context: str = "", timestamp: str = "") -> dict:
     """
     Store a search query and its context into OpenAI Vector Store for future retrieval.
     
@@ -274,7 +898,25 @@ def store_search_query(query: str, context: str = "", timestamp: str = "") -> di
     Returns:
         dict: Confirmation with vector store ID and file ID
     """
-    return store_search_query_handler(query, context if context else None, timestamp if timestamp else None)
+    # Run on a worker thread so concurrent calls can share a write-behind batch
+    return await asyncio.to_thread(
+        store_search_query_handler, query, context if context else None, timestamp if timestamp else None
+    )
+
+
+@mcp.tool()
+async def store_search_queries(queries: List[Dict[str, str]]) -> dict:
+    """
+    Store many search queries at once, e.g. when importing a search history.
+    
+    Args:
+        queries: Up to 500 objects with `query` (required), `context` and `timestamp`
+            (ISO 8601, defaults to current time), as taken by store_search_query
+    
+    Returns:
+        dict: Counts of stored and failed queries, and for each query (by index) its file ID or error
+    """
+    return await asyncio.to_thread(store_search_queries_handler, queries)
 
 
 @mcp.tool()
@@ -282,7 +924,8 @@ def retrieve_search_history(
     search_term: str,
     limit: int = 10,
     start_date: str = "",
-    end_date: str = ""
+    end_date: str = "",
+    source: str = "auto"
 ) -> dict:
     """
     Retrieve and search through stored query history using semantic search with optional date filtering.
@@ -292,6 +935,7 @@ def retrieve_search_history(
         limit: Maximum number of results to return (default: 10)
         start_date: ISO 8601 date to filter results from (e.g., '2025-01-01')
         end_date: ISO 8601 date to filter results until (e.g., '2025-12-31')
+        source: 'local' (offline index on this machine), 'remote' (OpenAI Vector Store) or 'auto' (default)
     
     Returns:
         dict: Search results with file_id, file_content (includes Query, Context, Timestamp), and similarity_score for each result
@@ -300,10 +944,32 @@ def retrieve_search_history(
         search_term,
         limit,
         start_date if start_date else None,
-        end_date if end_date else None
+        end_date if end_date else None,
+        source
     )
 
 
+@mcp.tool()
+def get_search_cache_stats() -> dict:
+    """
+    Report how well the retrieve_search_history result cache is working.
+    
+    Returns:
+        dict: Cache size and limits, hit and miss counts, hit rate, evictions and invalidations
+    """
+    return {
+        "success": True,
+        **search_cache.stats()
+    }
+
+
+def _sync_local_index_in_background() -> None:
+    try:
+        sync_local_index()
+    except Exception as e:
+        logger.warning(f"Could not sync the local index (searches fall back to it only when offline): {str(e)}")
+
+
 def main():
     """Main entry point for the MCP Server."""
     logger.info("Starting OpenAI RAG Vector Store MCP Server...")
@@ -316,8 +982,15 @@ def main():
         logger.error(f"Failed to initialize vector store: {str(e)}")
         logger.error("Server will continue but may not function properly.")
     
+    # Fill in the local index in the background; searches go remote until it is done
+    threading.Thread(target=_sync_local_index_in_background, name="local-index-sync", daemon=True).start()
+    
     # Run the FastMCP server
-    mcp.run()
+    try:
+        mcp.run()
+    finally:
+        write_buffer.close()
+        mirror_writer.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,641 @@
+"""
+Tests for the MCP tool handlers, run against a local fake of the OpenAI client.
+
+No API key or network access is needed:
+    python test_handlers.py
+    python -m pytest test_handlers.py
+"""
+import builtins
+import logging
+import mmap
+import os
+import tempfile
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from openai_rag_vector_store import main  # noqa: E402
+from openai_rag_vector_store.cache import ResultCache  # noqa: E402
+from openai_rag_vector_store.local_index import LocalIndex, parse_timestamp  # noqa: E402
+
+
+class FakeOpenAI:
+    """
+    In-memory stand-in for the parts of the OpenAI client the server uses.
+
+    Uploaded files are kept as text; `vector_stores.search` scores every file
+    in the store by the share of query words it contains, after applying
+    `filters` to the file attributes as the API does. `calls` counts each
+    API method used, and `fail_uploads` makes uploads of files whose content
+    contains one of its strings raise. Search pages carry `has_more` unless
+    `has_more` is set to False (older client versions leave it out).
+    """
+
+    def __init__(self):
+        self.calls = Counter()
+        self.files_by_id = {}
+        self.store_files = {}
+        self.stores = []
+        self.fail_uploads = set()
+        self.fail_batches = False
+        self.offline = False
+        self.has_more = True
+        self._lock = threading.Lock()
+        self.files = SimpleNamespace(create=self._create_file, delete=self._delete_file)
+        self.vector_stores = SimpleNamespace(
+            list=self._list_stores,
+            create=self._create_store,
+            search=self._search,
+            files=SimpleNamespace(
+                create=self._add_file,
+                list=self._list_files,
+                content=self._file_content,
+                update=self._update_file,
+            ),
+            file_batches=SimpleNamespace(create=self._add_file_batch),
+        )
+
+    def _count(self, name):
+        with self._lock:
+            self.calls[name] += 1
+
+    def _create_file(self, file, purpose):
+        self._count("files.create")
+        if isinstance(file, tuple):
+            filename, data = file[0], file[1]
+        else:
+            filename, data = os.path.basename(file.name), file.read()
+        if hasattr(data, "read"):
+            data = data.read()
+        text = data.decode("utf-8")
+        if any(marker in text for marker in self.fail_uploads):
+            raise RuntimeError("upload rejected")
+        with self._lock:
+            file_id = f"file-{len(self.files_by_id) + 1}"
+            self.files_by_id[file_id] = SimpleNamespace(id=file_id, filename=filename, text=text)
+        return SimpleNamespace(id=file_id, filename=filename)
+
+    def _delete_file(self, file_id):
+        self._count("files.delete")
+        with self._lock:
+            self.files_by_id.pop(file_id, None)
+            self.store_files.pop(file_id, None)
+
+    def _list_stores(self):
+        self._count("vector_stores.list")
+        return SimpleNamespace(data=list(self.stores))
+
+    def _create_store(self, name):
+        self._count("vector_stores.create")
+        store = SimpleNamespace(id=f"vs-{len(self.stores) + 1}", name=name)
+        self.stores.append(store)
+        return store
+
+    def _attach(self, file_id, attributes):
+        if file_id not in self.files_by_id:
+            raise RuntimeError(f"No such file: {file_id}")
+        self.store_files[file_id] = attributes or {}
+
+    def _add_file(self, vector_store_id, file_id, attributes=None):
+        self._count("vector_stores.files.create")
+        with self._lock:
+            self._attach(file_id, attributes)
+        return SimpleNamespace(id=file_id, vector_store_id=vector_store_id)
+
+    def _list_files(self, vector_store_id, limit=20):
+        self._count("vector_stores.files.list")
+        return [
+            SimpleNamespace(id=file_id, attributes=dict(attributes))
+            for file_id, attributes in list(self.store_files.items())
+        ]
+
+    def _update_file(self, file_id, vector_store_id, attributes):
+        self._count("vector_stores.files.update")
+        with self._lock:
+            self.store_files[file_id] = attributes
+        return SimpleNamespace(id=file_id, attributes=attributes)
+
+    def _file_content(self, file_id, vector_store_id):
+        self._count("vector_stores.files.content")
+        return [SimpleNamespace(type="text", text=self.files_by_id[file_id].text)]
+
+    def _add_file_batch(self, vector_store_id, file_ids=None, files=None):
+        self._count("vector_stores.file_batches.create")
+        if self.fail_batches:
+            raise RuntimeError("batch rejected")
+        entries = [{"file_id": file_id} for file_id in file_ids or []] + list(files or [])
+        with self._lock:
+            for entry in entries:
+                self._attach(entry["file_id"], entry.get("attributes"))
+        return SimpleNamespace(id="batch-1", vector_store_id=vector_store_id, status="in_progress")
+
+    @classmethod
+    def _matches(cls, filters, attributes):
+        if filters["type"] in ("and", "or"):
+            matches = [cls._matches(each, attributes) for each in filters["filters"]]
+            return all(matches) if filters["type"] == "and" else any(matches)
+        if filters["key"] not in attributes:
+            return False
+        value, operand = attributes[filters["key"]], filters["value"]
+        return {
+            "eq": value == operand, "ne": value != operand,
+            "gt": value > operand, "gte": value >= operand,
+            "lt": value < operand, "lte": value <= operand,
+        }[filters["type"]]
+
+    def _search(self, vector_store_id, query, max_num_results=10, filters=None, **kwargs):
+        self._count("vector_stores.search")
+        if self.offline:
+            raise ConnectionError("Connection error.")
+        if not 1 <= max_num_results <= 50:
+            raise ValueError("max_num_results must be between 1 and 50")
+        words = set(query.lower().split())
+        scored = []
+        for file_id, attributes in self.store_files.items():
+            if filters is not None and not self._matches(filters, attributes):
+                continue
+            file = self.files_by_id[file_id]
+            score = len(words & set(file.text.lower().split())) / max(len(words), 1)
+            if score > 0:
+                scored.append(SimpleNamespace(
+                    file_id=file_id,
+                    filename=file.filename,
+                    score=score,
+                    attributes=attributes,
+                    content=[SimpleNamespace(type="text", text=file.text)],
+                ))
+        scored.sort(key=lambda result: (-result.score, result.file_id))
+        page = SimpleNamespace(data=scored[:max_num_results])
+        if self.has_more:
+            page.has_more = len(scored) > max_num_results
+        return page
+
+
+def use_fake_client() -> FakeOpenAI:
+    """Point the server at a fresh fake client and reset its module state."""
+    fake = FakeOpenAI()
+    # Let the previous test's mirror finish with its own local index
+    main.mirror_writer.close()
+    main.client = fake
+    main.vector_store_id = None
+    main.write_buffer = main.WriteBehindBuffer(main.store_documents)
+    main.mirror_writer = main.MirrorWriter(main.write_mirror)
+    main.local_index = LocalIndex(tempfile.mkdtemp(prefix="local-index-"))
+    main.local_index_synced = False
+    main.timestamps_labeled = False
+    main.search_cache = ResultCache(main.SEARCH_CACHE_SIZE, main.SEARCH_CACHE_TTL)
+    return fake
+
+
+def test_store_search_query():
+    fake = use_fake_client()
+    result = main.store_search_query_handler("python decorators", "Functions that wrap functions", "2025-01-02T03:04:05")
+    assert result["success"], result
+    assert result["vector_store_id"] == "vs-1"
+    stored = fake.files_by_id[result["file_id"]]
+    assert stored.filename == "2025-01-02T03:04:05___python decorators.txt"
+    assert stored.text.startswith("Query: python decorators\nContext: Functions that wrap functions\n")
+    assert result["file_id"] in fake.store_files
+
+
+@contextmanager
+def recording_file_io():
+    """
+    Record (and refuse) every file opened or memory-mapped while active,
+    except by the local index mirror's own thread.
+    """
+    opened = []
+    real = {"open": builtins.open, "os_open": os.open, "mmap": mmap.mmap}
+
+    def refused(name):
+        def call(file, *args, **kwargs):
+            if isinstance(file, int) and name != "mmap":  # Unrelated file descriptors (e.g. logging)
+                return real[name](file, *args, **kwargs)
+            if threading.current_thread().name == "local-index-mirror":
+                return real[name](file, *args, **kwargs)
+            # Recorded as well as raised, in case the caller swallows the error
+            opened.append((name, file))
+            raise AssertionError(f"store path used {name} on {file}")
+        return call
+
+    builtins.open, os.open, mmap.mmap = refused("open"), refused("os_open"), refused("mmap")
+    try:
+        yield opened
+    finally:
+        builtins.open, os.open, mmap.mmap = real["open"], real["os_open"], real["mmap"]
+
+
+class WarningRecorder(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_store_does_no_disk_io():
+    fake = use_fake_client()
+    warnings = WarningRecorder()
+    package_logger = logging.getLogger("openai_rag_vector_store")
+    package_logger.addHandler(warnings)
+    try:
+        with recording_file_io() as opened:
+            result = main.store_search_queries_handler([{"query": "in memory", "timestamp": "2025-01-01T00:00:00"}])
+            single = main.store_search_query_handler("also in memory")
+        main.mirror_writer.drain()
+    finally:
+        package_logger.removeHandler(warnings)
+    assert opened == [], opened
+    assert [record.getMessage() for record in warnings.records] == []
+    assert result["stored"] == 1, result
+    file_id = result["results"][0]["file_id"]
+    assert fake.files_by_id[file_id].filename == "2025-01-01T00:00:00___in memory.txt"
+    assert single["success"], single
+    assert file_id in main.local_index and single["file_id"] in main.local_index
+
+
+def test_store_search_queries_uses_one_file_batch():
+    fake = use_fake_client()
+    queries = [{"query": f"query {i}", "context": f"context {i}"} for i in range(25)]
+    queries.insert(3, {"query": "  "})
+    result = main.store_search_queries_handler(queries)
+    assert result["stored"] == 25 and result["failed"] == 1, result
+    assert [entry["index"] for entry in result["results"]] == list(range(26))
+    assert result["results"][3]["error"] == "Validation Error"
+    assert result["results"][4]["query"] == "query 3"
+    assert fake.calls["files.create"] == 25
+    assert fake.calls["vector_stores.file_batches.create"] == 1
+    assert fake.calls["vector_stores.files.create"] == 0
+    assert len(fake.store_files) == 25
+
+
+def test_store_search_queries_splits_large_batches():
+    fake = use_fake_client()
+    main.MAX_FILE_BATCH, old = 10, main.MAX_FILE_BATCH
+    try:
+        result = main.store_search_queries_handler([{"query": f"query {i}"} for i in range(25)])
+    finally:
+        main.MAX_FILE_BATCH = old
+    assert result["stored"] == 25
+    assert fake.calls["vector_stores.file_batches.create"] == 3
+
+
+def test_store_search_queries_reports_failures():
+    fake = use_fake_client()
+    fake.fail_uploads = {"bad"}
+    result = main.store_search_queries_handler([{"query": "good one"}, {"query": "bad one"}, {"query": "good two"}])
+    assert [entry["success"] for entry in result["results"]] == [True, False, True]
+    assert len(fake.store_files) == 2
+
+    fake = use_fake_client()
+    fake.fail_batches = True
+    result = main.store_search_queries_handler([{"query": "one"}, {"query": "two"}])
+    assert not result["success"] and result["failed"] == 2
+    # Uploaded files that could not be added to the store are cleaned up
+    assert fake.files_by_id == {}
+
+
+def test_store_search_queries_limit():
+    use_fake_client()
+    result = main.store_search_queries_handler([{"query": "q"}] * (main.MAX_BATCH_QUERIES + 1))
+    assert not result["success"] and result["error"] == "Validation Error"
+
+
+def test_write_behind_groups_concurrent_stores():
+    fake = use_fake_client()
+    main.write_buffer = main.WriteBehindBuffer(main.store_documents, max_delay=0.2)
+    results = [None] * 20
+
+    def store(i):
+        results[i] = main.store_search_query_handler(f"concurrent query {i}")
+
+    threads = [threading.Thread(target=store, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    main.write_buffer.close()
+
+    assert all(result["success"] for result in results), results
+    assert len({result["file_id"] for result in results}) == 20
+    assert fake.calls["files.create"] == 20
+    assert fake.calls["vector_stores.file_batches.create"] < 20
+    assert fake.calls["vector_stores.list"] + fake.calls["vector_stores.create"] == 2
+
+
+def test_write_behind_reports_errors_per_document():
+    fake = use_fake_client()
+    fake.fail_uploads = {"rejected"}
+    assert not main.store_search_query_handler("rejected query")["success"]
+    assert main.store_search_query_handler("accepted query")["success"]
+
+
+def store_history():
+    return main.store_search_queries_handler([
+        {"query": "best python web frameworks", "context": "Django and Flask", "timestamp": "2025-01-10T09:00:00"},
+        {"query": "rust borrow checker explained", "context": "Ownership rules", "timestamp": "2025-03-05T12:00:00"},
+        {"query": "python asyncio tutorial", "context": "Event loops and tasks", "timestamp": "2025-06-20T18:30:00"},
+    ])
+
+
+def test_local_index_mirrors_stored_queries():
+    fake = use_fake_client()
+    store_history()
+    result = main.retrieve_search_history_handler("python frameworks", limit=2, source="local")
+    assert result["success"] and result["source"] == "local", result
+    assert fake.calls["vector_stores.search"] == 0
+    assert result["results"][0]["file_content"].startswith("Query: best python web frameworks")
+    assert result["results"][0]["timestamp"] == "2025-01-10T09:00:00"
+    scores = [entry["similarity_score"] for entry in result["results"]]
+    assert scores == sorted(scores, reverse=True)
+
+    result = main.retrieve_search_history_handler("python", start_date="2025-02-01", end_date="2025-12-31", source="local")
+    assert [entry["timestamp"] for entry in result["results"]] == ["2025-06-20T18:30:00"]
+
+    result = main.retrieve_search_history_handler("python", start_date="next tuesday", source="local")
+    assert result["error"] == "Validation Error"
+
+
+def test_local_index_persists():
+    use_fake_client()
+    store_history()
+    main.mirror_writer.drain()
+    reopened = LocalIndex(main.local_index.directory)
+    assert len(reopened) == 3
+    assert reopened.search("rust ownership", 1)[0]["file_content"].startswith("Query: rust borrow checker")
+
+
+def test_local_index_grows():
+    index = LocalIndex(tempfile.mkdtemp(prefix="local-index-"))
+    entries = [{"file_id": f"file-{i}", "content": f"query number {i}", "timestamp": ""} for i in range(3000)]
+    assert index.add(entries) == 3000
+    assert index.add(entries[:10]) == 0
+    assert index.capacity >= 3000
+    assert index.search("query number 2999", 1)[0]["file_id"] == "file-2999"
+    assert len(LocalIndex(index.directory)) == 3000
+
+
+def test_store_documents_does_no_file_io():
+    use_fake_client()
+    documents = [main.make_document(f"offline query {i}", timestamp="2025-01-01T00:00:00") for i in range(3)]
+    with recording_file_io() as opened:
+        results = main.store_documents(documents)
+    assert opened == [], opened
+    assert all(isinstance(result, str) for result in results), results
+
+    # The mirror writes them in the background
+    main.mirror_writer.drain()
+    assert all(file_id in main.local_index for file_id in results)
+    assert len(LocalIndex(main.local_index.directory)) == 3
+
+
+def test_mirror_writes_stores_in_batches():
+    use_fake_client()
+    main.mirror_writer = main.MirrorWriter(main.write_mirror, max_delay=0.2)
+    batches = []
+    real_add = main.local_index.add
+
+    def add(entries):
+        batches.append(len(entries))
+        return real_add(entries)
+
+    main.local_index.add = add
+    for i in range(5):
+        assert main.store_search_query_handler(f"burst query {i}")["success"]
+    main.mirror_writer.close()
+    assert sum(batches) == 5 and len(batches) < 5, batches
+
+    # A search waits for queued entries instead of missing them
+    main.mirror_writer = main.MirrorWriter(main.write_mirror, max_delay=60)
+    assert main.store_search_query_handler("queued query")["success"]
+    result = main.retrieve_search_history_handler("queued query", source="local")
+    assert result["results"][0]["file_content"].startswith("Query: queued query")
+
+
+def test_auto_source_goes_remote_until_synced():
+    fake = use_fake_client()
+    store_history()
+    result = main.retrieve_search_history_handler("python asyncio")
+    assert result["source"] == "remote" and fake.calls["vector_stores.search"] == 1
+
+    # Queries stored elsewhere reach the local index through a sync
+    main.local_index = LocalIndex(tempfile.mkdtemp(prefix="local-index-"))
+    assert main.sync_local_index() == 3
+    assert main.local_index_synced
+    result = main.retrieve_search_history_handler("python asyncio")
+    assert result["source"] == "local" and fake.calls["vector_stores.search"] == 1
+    assert result["results"][0]["file_content"].startswith("Query: python asyncio tutorial")
+
+
+def test_failed_mirror_sends_auto_searches_back_to_the_vector_store():
+    fake = use_fake_client()
+    store_history()
+    assert main.sync_local_index() == 0 and main.local_index_synced
+    assert main.retrieve_search_history_handler("python packaging")["source"] == "local"
+
+    def broken_add(entries):
+        raise OSError("disk full")
+
+    working_add, main.local_index.add = main.local_index.add, broken_add
+    try:
+        assert main.store_search_query_handler("python packaging", "Wheels and sdists")["success"]
+        main.mirror_writer.drain()
+    finally:
+        main.local_index.add = working_add
+    assert not main.local_index_synced
+    result = main.retrieve_search_history_handler("python packaging")
+    assert result["source"] == "remote" and fake.calls["vector_stores.search"] == 1
+    assert result["results"][0]["file_content"].startswith("Query: python packaging")
+
+    # The next sync copies the missing document and serves "auto" locally again
+    assert main.sync_local_index() == 1 and main.local_index_synced
+    assert main.retrieve_search_history_handler("python packaging")["source"] == "local"
+
+
+def test_offline_search_falls_back_to_local_index():
+    fake = use_fake_client()
+    store_history()
+    fake.offline = True
+    result = main.retrieve_search_history_handler("rust")
+    assert result["success"] and result["source"] == "local", result
+    assert not main.retrieve_search_history_handler("rust", source="remote")["success"]
+
+
+def test_parse_document():
+    document = main.make_document("a query", "multi\nline context", "2025-01-01T00:00:00")
+    assert main.parse_document(document.content) == document
+
+
+def test_repeated_search_is_served_from_cache():
+    fake = use_fake_client()
+    store_history()
+    first = main.retrieve_search_history_handler("Python asyncio", limit=5, start_date="2025-01-01")
+    again = main.retrieve_search_history_handler("  python   ASYNCIO ", limit=5, start_date="2025-01-01T00:00:00")
+    assert not first["cached"] and again["cached"]
+    assert again["results"] == first["results"]
+    assert fake.calls["vector_stores.search"] == 1
+
+    # A different limit, date range or source is a different query
+    main.retrieve_search_history_handler("python asyncio", limit=6, start_date="2025-01-01")
+    main.retrieve_search_history_handler("python asyncio", limit=5)
+    assert fake.calls["vector_stores.search"] == 3
+
+    stats = main.get_search_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 3, 3), stats
+
+
+def test_store_invalidates_cache():
+    fake = use_fake_client()
+    store_history()
+    main.retrieve_search_history_handler("python")
+    main.store_search_query_handler("python packaging", "pyproject.toml")
+    result = main.retrieve_search_history_handler("python")
+    assert not result["cached"] and fake.calls["vector_stores.search"] == 2
+    assert any("python packaging" in entry["file_content"] for entry in result["results"])
+
+
+def test_store_during_a_search_keeps_its_answer_out_of_the_cache():
+    fake = use_fake_client()
+    store_history()
+    remote_search = main.remote_search
+
+    def search_then_store(*args):
+        results = remote_search(*args)
+        # A store that completes after the search read the vector store
+        main.store_search_query_handler("python packaging", "pyproject.toml")
+        return results
+
+    main.remote_search = search_then_store
+    try:
+        stale = main.retrieve_search_history_handler("python")
+    finally:
+        main.remote_search = remote_search
+    assert not any("python packaging" in entry["file_content"] for entry in stale["results"])
+
+    result = main.retrieve_search_history_handler("python")
+    assert not result["cached"] and fake.calls["vector_stores.search"] == 2
+    assert any("python packaging" in entry["file_content"] for entry in result["results"])
+
+
+def test_offline_fallback_is_not_cached():
+    fake = use_fake_client()
+    store_history()
+    fake.offline = True
+    assert main.retrieve_search_history_handler("rust")["source"] == "local"
+    fake.offline = False
+    result = main.retrieve_search_history_handler("rust")
+    assert result["source"] == "remote" and not result["cached"]
+
+
+def test_result_cache_discards_puts_from_before_an_invalidation():
+    cache = ResultCache(max_entries=4, ttl=10)
+    generation = cache.generation
+    cache.invalidate()
+    cache.put("a", 1, generation)
+    assert cache.get("a") is None
+    cache.put("a", 2, cache.generation)
+    assert cache.get("a") == 2
+
+
+def test_result_cache_ttl_and_lru():
+    now = [0.0]
+    cache = ResultCache(max_entries=2, ttl=10, clock=lambda: now[0])
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None and cache.get("c") == 3
+    now[0] = 10
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1 and cache.stats()["hits"] == 2
+
+
+def store_later_asyncio_queries(count):
+    return main.store_search_queries_handler([
+        {"query": f"python asyncio tutorial part {i}", "timestamp": f"2025-09-{i % 28 + 1:02d}T08:00:00+00:00"}
+        for i in range(count)
+    ])
+
+
+def test_stored_files_carry_timestamp_attribute():
+    fake = use_fake_client()
+    store_history()
+    main.store_search_query_handler("no date", timestamp="sometime")
+    assert sorted(attributes.get("timestamp", 0) for attributes in fake.store_files.values()) == [
+        0,
+        parse_timestamp("2025-01-10T09:00:00"),
+        parse_timestamp("2025-03-05T12:00:00"),
+        parse_timestamp("2025-06-20T18:30:00"),
+    ]
+
+
+def test_date_range_is_filtered_by_the_vector_store():
+    fake = use_fake_client()
+    # Later, equally similar queries used to crowd out the one in range
+    store_later_asyncio_queries(20)
+    store_history()
+    result = main.retrieve_search_history_handler("python asyncio tutorial", limit=1, end_date="2025-06-30")
+    assert [entry["timestamp"] for entry in result["results"]] == ["2025-06-20T18:30:00"], result
+    assert fake.calls["vector_stores.search"] == 1
+
+    result = main.retrieve_search_history_handler(
+        "python", limit=5, start_date="2025-01-01T00:00:00Z", end_date="2025-03-31"
+    )
+    assert [entry["timestamp"] for entry in result["results"]] == ["2025-01-10T09:00:00"]
+
+
+def test_unlabeled_files_are_found_by_over_fetching():
+    fake = use_fake_client()
+    store_later_asyncio_queries(40)
+    store_history()
+    # As stored before timestamps were file attributes
+    for file_id in fake.store_files:
+        fake.store_files[file_id] = {}
+    main.timestamps_labeled = False
+
+    result = main.retrieve_search_history_handler("python asyncio tutorial", limit=1, end_date="2025-06-30")
+    assert [entry["timestamp"] for entry in result["results"]] == ["2025-06-20T18:30:00"], result
+    assert fake.calls["vector_stores.search"] > 2
+
+    # A sync labels them, after which the filter alone answers
+    main.sync_local_index()
+    assert main.timestamps_labeled and fake.calls["vector_stores.files.update"] == 43
+    assert all("timestamp" in attributes for attributes in fake.store_files.values())
+    searches = fake.calls["vector_stores.search"]
+    result = main.retrieve_search_history_handler(
+        "python asyncio tutorial", limit=1, end_date="2025-06-30", source="remote"
+    )
+    assert [entry["timestamp"] for entry in result["results"]] == ["2025-06-20T18:30:00"], result
+    assert fake.calls["vector_stores.search"] == searches + 1
+
+
+def test_over_fetching_without_has_more():
+    fake = use_fake_client()
+    fake.has_more = False
+    store_later_asyncio_queries(40)
+    store_history()
+    for file_id in fake.store_files:
+        fake.store_files[file_id] = {}
+    main.timestamps_labeled = False
+
+    result = main.retrieve_search_history_handler("python asyncio tutorial", limit=1, end_date="2025-06-30")
+    assert result["success"], result
+    assert [entry["timestamp"] for entry in result["results"]] == ["2025-06-20T18:30:00"], result
+    assert fake.calls["vector_stores.search"] > 2
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing OpenAI RAG Vector Store MCP Server Handlers")
+    print("=" * 60)
+    tests = [(name, test) for name, test in list(globals().items()) if name.startswith("test_")]
+    for number, (name, test) in enumerate(tests, 1):
+        test()
+        print(f"{number}. {name}: OK")
+    print("=" * 60)
+    print(f"All {len(tests)} tests passed!")
+    print("=" * 60)